@@ -1,24 +1,59 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, g, Response
 from flask_cors import CORS
 import mysql.connector
-from mysql.connector import Error
+from mysql.connector import Error, pooling
+from mysql.connector.errors import PoolError
 from datetime import datetime, timedelta, timezone
 import os
-import bcrypt
+import time
+import atexit
+import json
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait
 import jwt
 from functools import wraps
 from dotenv import load_dotenv
 from sql_loader import SQLLoader
 from query_timer import QueryTimer
+from row_types import RowTypes
+from metrics import MetricsRegistry, QueryTimerCollector, EventRate
+from request_trace import TraceCollector
+from slow_query_log import SlowQueryLog
+from warmup import HOT_QUERIES, WarmUp, warm_connections, warm_hot_queries, touch_indexes, find_missing
+from market_math import odds_from_volumes, odds_from_cents, apply_holding_gains, unrealized_gains_total
+from fixed_point import CENTS, to_cents, to_bps, to_units, from_fixed, div_round, value_cents
+from serializer import FastJSONProvider
+from compression import ResponseCompressor
+from auth_cache import TokenCache, TTLCache
+from password_pool import PasswordHasher, PasswordPoolFull
+from bet_journal import BetJournal
+from bet_store import BetStore, user_profits
+from candles import parse_interval, parse_time, plan_query, merge_candles, format_interval
 
 load_dotenv()
 
+# Keys run as server-side prepared statements, compiled once per pooled connection ('*' for all).
+# Binding goes through user variables, which costs a round trip, so only the long CTEs by default.
+PREPARED_QUERY_KEYS = os.getenv('PREPARED_QUERY_KEYS',
+                                'bets.get_user_holdings,bets.get_user_profits,markets.get_trending_markets')
+
 # Initialize SQL loader
-sql = SQLLoader()
+sql = SQLLoader(prepared_keys=[key.strip() for key in PREPARED_QUERY_KEYS.split(',') if key.strip()])
 
 # Initialize query timer
 query_timer = QueryTimer()
 
+# Rows are fetched as tuples and built into a generated __slots__ record type per query key
+row_types = RowTypes()
+
+# Per-request query traces; keys run more than TRACE_REPEAT_THRESHOLD times in one request are flagged as N+1
+request_traces = TraceCollector(
+    capacity=int(os.getenv('TRACE_BUFFER_SIZE', '200')),
+    sample_rate=float(os.getenv('TRACE_SAMPLE_RATE', '1.0')),
+    repeat_threshold=int(os.getenv('TRACE_REPEAT_THRESHOLD', '5'))
+)
+
 def execute_timed_query(cursor, query_key: str, params=None):
     """
     Execute a SQL query with timing using the query timer.
@@ -32,7 +67,56 @@ def execute_timed_query(cursor, query_key: str, params=None):
         Result of cursor.execute()
     """
     sql_query = sql.get_query(query_key)
-    return query_timer.time_query(cursor, query_key, sql_query, params)
+    trace = request_traces.current()
+    if trace is None:
+        return query_timer.time_query(cursor, query_key, sql_query, params, sql.execute)
+    
+    # Capture the previous query's row count before this cursor is reused
+    trace.settle()
+    start_time = time.perf_counter()
+    try:
+        result = query_timer.time_query(cursor, query_key, sql_query, params, sql.execute)
+    except Exception:
+        trace.record(query_key, time.perf_counter() - start_time, error=True)
+        raise
+    trace.record(query_key, time.perf_counter() - start_time, cursor)
+    return result
+
+def fetch_all_timed(cursor, query_key: str):
+    """
+    Fetch all remaining rows of the last query, timing the fetch phase.
+    
+    Args:
+        cursor: Database cursor the query was executed on
+        query_key: The query identifier the rows belong to
+        
+    Returns:
+        List of records (see row_types) from cursor.fetchall()
+    """
+    start_time = time.perf_counter()
+    rows = query_timer.time_fetch(cursor, query_key, row_factory=row_types.wrap)
+    trace = request_traces.current()
+    if trace is not None:
+        trace.record_fetch(query_key, time.perf_counter() - start_time, len(rows))
+    return rows
+
+def fetch_one_timed(cursor, query_key: str):
+    """
+    Fetch the next row of the last query, timing the fetch phase.
+    
+    Args:
+        cursor: Database cursor the query was executed on
+        query_key: The query identifier the row belongs to
+        
+    Returns:
+        The record from cursor.fetchone(), or None
+    """
+    start_time = time.perf_counter()
+    row = query_timer.time_fetch(cursor, query_key, fetch_all=False, row_factory=row_types.wrap)
+    trace = request_traces.current()
+    if trace is not None:
+        trace.record_fetch(query_key, time.perf_counter() - start_time, 0 if row is None else 1)
+    return row
 
 app = Flask(__name__)
 
@@ -45,9 +129,22 @@ CORS(app, resources={
 })
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'your-secret-key-here')
 
+# Rows are returned as fetched: the provider encodes Decimal and datetime columns itself,
+# with orjson when installed (JSON_ENCODER=auto|orjson|stdlib)
+app.json = FastJSONProvider(app, os.getenv('JSON_ENCODER', 'auto'))
+
+# Shared secret for the diagnostic endpoints; when unset they stay open as in development
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')
+
 # Token expiration time
 TOKEN_EXPIRATION = 24 * 60 * 60
 
+# Verified tokens are remembered (by digest, until their exp) so a token's signature is checked once (0 disables)
+token_cache = TokenCache(max_entries=int(os.getenv('TOKEN_CACHE_SIZE', '10000')))
+# User balance rows are served from memory for USER_CACHE_TTL seconds; bets placed here invalidate them (0 disables)
+user_cache = TTLCache(ttl=float(os.getenv('USER_CACHE_TTL', '5')),
+                      max_entries=int(os.getenv('USER_CACHE_SIZE', '10000')))
+
 # Database configuration from environment variables
 DB_CONFIG = {
     'host': os.getenv('DB_HOST'),
@@ -56,17 +153,292 @@ DB_CONFIG = {
     'database': os.getenv('DB_DATABASE')
 }
 
+# Connection pool; sessions are kept on return so prepared statements survive between requests
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '10'))
+# Seconds a request waits for a free pooled connection before failing
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '5'))
+_db_pool = None
+_db_pool_lock = threading.Lock()
+
+# Queries whose execution reaches SLOW_QUERY_THRESHOLD_MS are logged with their EXPLAIN plan (0 disables)
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv('SLOW_QUERY_THRESHOLD_MS', '250'))
+slow_query_log = SlowQueryLog(
+    DB_CONFIG,
+    os.getenv('SLOW_QUERY_LOG_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'logs', 'slow_queries.jsonl')),
+    max_bytes=int(os.getenv('SLOW_QUERY_LOG_MAX_BYTES', str(5 * 1024 * 1024)))
+)
+if SLOW_QUERY_THRESHOLD_MS > 0:
+    query_timer.slow_query_threshold = SLOW_QUERY_THRESHOLD_MS / 1000.0
+    query_timer.slow_query_handler = slow_query_log.submit
+
+# Prometheus metrics exported on /metrics
+metrics = MetricsRegistry()
+metrics.register(QueryTimerCollector(query_timer))
+http_request_duration = metrics.histogram('polymarket_http_request_duration_seconds',
+                                          'HTTP request latency by route', ('method', 'route'))
+http_requests_total = metrics.counter('polymarket_http_requests_total',
+                                      'HTTP responses by route and status code', ('method', 'route', 'status'))
+db_connections_opened = metrics.counter('polymarket_db_connections_opened_total',
+                                        'Database connections checked out of the pool')
+db_connection_errors = metrics.counter('polymarket_db_connection_errors_total',
+                                       'Failed attempts to get a database connection')
+repeated_queries_total = metrics.counter('polymarket_repeated_query_requests_total',
+                                         'Requests that ran one query key more than TRACE_REPEAT_THRESHOLD times',
+                                         ('route', 'query_key'))
+bets_created = metrics.counter('polymarket_bets_created_total', 'Bets committed')
+comments_created = metrics.counter('polymarket_comments_created_total', 'Comments and replies committed')
+bet_journal_errors = metrics.counter('polymarket_bet_journal_errors_total',
+                                     'Committed bets that could not be appended to the bet journal')
+response_bytes_total = metrics.counter('polymarket_response_bytes_total',
+                                      'Bytes of compressed response bodies before and after compression',
+                                      ('encoding', 'stage'))
+password_hash_duration = metrics.histogram('polymarket_password_hash_duration_seconds',
+                                           'bcrypt time per password operation (hash or check)', ('operation',),
+                                           buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5))
+password_hash_wait = metrics.histogram('polymarket_password_hash_queue_seconds',
+                                       'Time a password operation waited for a hashing worker', ('operation',),
+                                       buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0))
+password_hash_rejected = metrics.counter('polymarket_password_hash_rejected_total',
+                                         'Logins and registrations turned away with 503 because the hashing pool was full')
+password_rehashes = metrics.counter('polymarket_password_rehashes_total',
+                                    'Stored password hashes replaced at the current BCRYPT_ROUNDS after a login')
+bet_rate = EventRate()
+comment_rate = EventRate()
+
+def record_password_hash(operation, queued_seconds, hash_seconds):
+    password_hash_wait.observe(queued_seconds, operation)
+    password_hash_duration.observe(hash_seconds, operation)
+
+# bcrypt runs on PASSWORD_HASH_WORKERS threads with at most PASSWORD_HASH_QUEUE operations waiting; beyond that
+# login and registration answer 503, so auth cannot take every request thread or core. Hashes with a cost other
+# than BCRYPT_ROUNDS are replaced at the new cost after the user's next successful login.
+password_hasher = PasswordHasher(
+    workers=int(os.getenv('PASSWORD_HASH_WORKERS', str(max(1, (os.cpu_count() or 2) // 2)))),
+    max_queue=int(os.getenv('PASSWORD_HASH_QUEUE', '32')),
+    rounds=int(os.getenv('BCRYPT_ROUNDS', '12')),
+    observer=record_password_hash
+)
+# Upgraded hashes are written back from here rather than from the hashing workers
+rehash_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='password-rehash')
+
+def record_compression(encoding, raw_bytes, sent_bytes):
+    response_bytes_total.inc(encoding, 'raw', amount=raw_bytes)
+    response_bytes_total.inc(encoding, 'sent', amount=sent_bytes)
+
+# Accept-Encoding negotiated compression (zstd/br when installed, else gzip) of bodies of at least
+# COMPRESSION_MIN_SIZE bytes; compressed bodies are cached by content so repeated payloads compress once
+COMPRESSION_ENABLED = os.getenv('COMPRESSION_ENABLED', 'True').lower() == 'true'
+response_compressor = ResponseCompressor(
+    min_size=int(os.getenv('COMPRESSION_MIN_SIZE', '1024')),
+    encodings=[encoding.strip() for encoding in os.getenv('COMPRESSION_ENCODINGS', 'zstd,br,gzip').split(',')
+               if encoding.strip()],
+    cache_bytes=int(os.getenv('COMPRESSION_CACHE_BYTES', str(16 * 1024 * 1024))),
+    observer=record_compression
+)
+
+# Committed bets are also appended to a binary journal that journal_replay.py rebuilds aggregates from ('' disables)
+BET_JOURNAL_DIR = os.getenv('BET_JOURNAL_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'journal'))
+bet_journal = None
+if BET_JOURNAL_DIR:
+    bet_journal = BetJournal(BET_JOURNAL_DIR,
+                             fsync=os.getenv('BET_JOURNAL_FSYNC', 'interval'),
+                             fsync_interval=float(os.getenv('BET_JOURNAL_FSYNC_INTERVAL', '1')),
+                             segment_records=int(os.getenv('BET_JOURNAL_SEGMENT_RECORDS', '1000000')))
+    atexit.register(bet_journal.close)
+
+# In-process columnar copy of bets for odds and leaderboard aggregates; loaded during warm-up, SQL is used until then
+BET_STORE_ENABLED = os.getenv('BET_STORE_ENABLED', 'True').lower() == 'true'
+# Seconds between pulls of bets written by other processes (scripts, other workers)
+BET_STORE_SYNC_INTERVAL = float(os.getenv('BET_STORE_SYNC_INTERVAL', '30'))
+bet_store = BetStore()
+
+def load_bet_store():
+    """Warm-up step: bulk load the bet store, then keep it in sync"""
+    connection = get_db_connection()
+    if connection is None:
+        raise RuntimeError("could not get a database connection")
+    try:
+        bets = bet_store.load(connection)
+    finally:
+        connection.close()
+    if BET_STORE_SYNC_INTERVAL > 0:
+        bet_store.start_sync(get_db_connection, BET_STORE_SYNC_INTERVAL)
+    return {'bets': bets, 'bytes': bet_store.get_stats()['bytes']}
+
+# Fast paths that need tables and triggers installed by a maintenance script. Warm-up checks for them; a
+# feature with any missing is served by its fallback and listed under 'degraded' in /ready
+FEATURE_REQUIREMENTS = {
+    'trending': {'tables': ('market_trending',), 'triggers': ('bumpTrendingOnBet', 'bumpTrendingOnComment'),
+                 'fallback': 'full scan of bets and comments', 'fix': 'python3 backend/trending.py install'},
+    'history': {'tables': ('market_odds_rollups',), 'triggers': ('rollupOddsOnBet',),
+                'fallback': "candles built from the market's bets", 'fix': 'python3 backend/odds_rollups.py install'},
+}
+# Query served instead of a hot query while its feature is degraded
+FALLBACK_QUERIES = {'markets.get_trending_markets': ('trending', 'markets.get_trending_markets_rescan')}
+degraded_features = {}
+
+def check_feature_requirements():
+    """Warm-up step: record the features whose tables or triggers are missing"""
+    missing = set(find_missing(get_db_connection,
+                               [table for needs in FEATURE_REQUIREMENTS.values() for table in needs['tables']],
+                               [trigger for needs in FEATURE_REQUIREMENTS.values() for trigger in needs['triggers']]))
+    degraded = {}
+    for feature, needs in FEATURE_REQUIREMENTS.items():
+        absent = [name for name in (*needs['tables'], *needs['triggers']) if name in missing]
+        if absent:
+            degraded[feature] = {'missing': absent, 'fallback': needs['fallback'], 'fix': needs['fix']}
+            print(f"{feature} is degraded, missing {', '.join(absent)}; run {needs['fix']}")
+    degraded_features.clear()
+    degraded_features.update(degraded)
+    return {'degraded': sorted(degraded)}
+
+def hot_queries():
+    """HOT_QUERIES, with the fallback of any degraded feature in place of its query"""
+    queries = []
+    for key, params in HOT_QUERIES:
+        feature, fallback = FALLBACK_QUERIES.get(key, (None, None))
+        queries.append((fallback, params) if feature in degraded_features else (key, params))
+    return queries
+
+# Markets returned by /markets/trending unless ?limit= asks for another number (up to TRENDING_MAX_LIMIT)
+TRENDING_LIMIT = int(os.getenv('TRENDING_LIMIT', '100'))
+TRENDING_MAX_LIMIT = int(os.getenv('TRENDING_MAX_LIMIT', '1000'))
+
+# Threads shared by all /markets/<id>/page requests for their concurrent sections. Each section holds
+# a pooled connection while it runs, so the default leaves half the pool to other routes.
+PAGE_QUERY_WORKERS = int(os.getenv('PAGE_QUERY_WORKERS', str(max(2, DB_POOL_SIZE // 2))))
+page_executor = ThreadPoolExecutor(max_workers=PAGE_QUERY_WORKERS, thread_name_prefix='page-query')
+
+# Most markets one GET /markets?ids= may ask for
+MARKETS_MAX_IDS = int(os.getenv('MARKETS_MAX_IDS', '200'))
+
+# POST /batch: sub-requests per batch, and threads shared by all batches to run them
+BATCH_MAX_REQUESTS = int(os.getenv('BATCH_MAX_REQUESTS', '20'))
+BATCH_WORKERS = int(os.getenv('BATCH_WORKERS', '4'))
+batch_executor = ThreadPoolExecutor(max_workers=BATCH_WORKERS, thread_name_prefix='batch')
+
+# Sections of /markets/<id>/page; the user sections need a logged-in caller
+MARKET_PAGE_FIELDS = ('market', 'bets', 'comments', 'holdings', 'balance')
+USER_PAGE_FIELDS = ('holdings', 'balance')
+
+# /markets/<id>/history widens the interval of long ranges so no response has more candles than this
+HISTORY_MAX_POINTS = int(os.getenv('HISTORY_MAX_POINTS', '500'))
+# Candles covered when ?from= is not given
+HISTORY_DEFAULT_POINTS = int(os.getenv('HISTORY_DEFAULT_POINTS', '200'))
+# MySQL's FROM_UNIXTIME returns NULL after this (3001-01-19)
+MAX_FROM_UNIXTIME = 32536771199
+
+# Active market count is refreshed at most this often, so scrapes rarely touch MySQL
+ACTIVE_MARKETS_TTL = float(os.getenv('ACTIVE_MARKETS_TTL', '30'))
+_active_markets_cache = {'value': None, 'expires': 0.0}
+_active_markets_lock = threading.Lock()
+
+def get_db_pool():
+    """Create the connection pool on first use so the app can start before MySQL"""
+    global _db_pool
+    if _db_pool is None:
+        with _db_pool_lock:
+            if _db_pool is None:
+                # pool_reset_session=False: resetting would deallocate the prepared statements
+                _db_pool = pooling.MySQLConnectionPool(pool_name='polymarket', pool_size=DB_POOL_SIZE,
+                                                       pool_reset_session=False, **DB_CONFIG)
+    return _db_pool
+
 def get_db_connection():
-    """Create and return a database connection"""
+    """Return a pooled database connection; close() hands it back to the pool"""
     try:
-        connection = mysql.connector.connect(**DB_CONFIG)
+        pool = get_db_pool()
+        deadline = time.monotonic() + DB_POOL_TIMEOUT
+        while True:
+            try:
+                connection = pool.get_connection()
+                break
+            except PoolError:
+                if time.monotonic() >= deadline:
+                    raise
+                time.sleep(0.01)
+        
+        # The session is not reset, so clear anything the previous request left behind
+        if connection.unread_result:
+            connection.consume_results()
+        if connection.in_transaction:
+            connection.rollback()
         connection.autocommit = True
+        db_connections_opened.inc()
         return connection
     except Error as e:
+        db_connection_errors.inc()
         print(f"Error connecting to MySQL: {e}")
         return None
 
-def calculate_market_odds(market_id, cursor, exclude_user_id=None):
+def get_active_market_count():
+    """Return the number of active markets, cached for ACTIVE_MARKETS_TTL seconds"""
+    now = time.monotonic()
+    if now < _active_markets_cache['expires']:
+        return _active_markets_cache['value']
+    
+    # Only one scrape refreshes; concurrent scrapes keep serving the old value
+    if not _active_markets_lock.acquire(blocking=False):
+        return _active_markets_cache['value']
+    try:
+        # Back off for a full TTL even on failure so scrapes never pile up on a dead database
+        _active_markets_cache['expires'] = now + ACTIVE_MARKETS_TTL
+        connection = get_db_connection()
+        if not connection:
+            return _active_markets_cache['value']
+        try:
+            cursor = connection.cursor()
+            execute_timed_query(cursor, 'metrics.count_active_markets')
+            _active_markets_cache['value'] = fetch_one_timed(cursor, 'metrics.count_active_markets')['active_markets']
+            cursor.close()
+        finally:
+            connection.close()
+        return _active_markets_cache['value']
+    finally:
+        _active_markets_lock.release()
+
+metrics.gauge('polymarket_active_markets', 'Markets with open volume', get_active_market_count)
+metrics.gauge('polymarket_token_cache_hit_ratio', 'Share of token verifications answered from the token cache',
+              token_cache.hit_ratio)
+metrics.gauge('polymarket_user_cache_hit_ratio', 'Share of user balance lookups answered from the user cache',
+              user_cache.hit_ratio)
+metrics.gauge('polymarket_password_hash_queue_depth', 'Password operations waiting for a hashing worker',
+              password_hasher.queue_depth)
+metrics.gauge('polymarket_bets_per_second', 'Bets committed per second over the last minute', bet_rate.rate)
+metrics.gauge('polymarket_comments_per_second', 'Comments committed per second over the last minute',
+              comment_rate.rate)
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    g.trace_token = request_traces.start(request.method, route, request.path)
+
+@app.after_request
+def record_request_metrics(response):
+    start = g.get('request_start')
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    if start is not None:
+        http_request_duration.observe(time.perf_counter() - start, request.method, route)
+        http_requests_total.inc(request.method, route, response.status_code)
+    
+    trace = request_traces.finish(response.status_code)
+    if trace is not None:
+        for query_key, count in trace.repeated_keys.items():
+            repeated_queries_total.inc(route, query_key)
+            print(f"Repeated query warning: {request.method} {route} ran {query_key} {count} times")
+    return response
+
+@app.teardown_request
+def end_request_trace(exc):
+    token = g.pop('trace_token', None)
+    if token is not None:
+        request_traces.end(token)
+
+if COMPRESSION_ENABLED:
+    response_compressor.init_app(app)
+
+def calculate_market_odds(market_id, cursor, exclude_user_id=None, from_store=True):
     """
     Calculate market odds based on current volume distribution.
     This implements a proper prediction market mechanism where:
@@ -79,45 +451,57 @@ def calculate_market_odds(market_id, cursor, exclude_user_id=None):
         market_id: The market ID to calculate odds for
         cursor: Database cursor
         exclude_user_id: Optional user ID whose bets should be excluded from calculation
+        from_store: Answer from the in-memory bet store once it is loaded; pass False
+            to read the bets table inside the caller's transaction
         
     Returns the probability (0.01 to 0.99) for YES outcome.
     """
+    if from_store and bet_store.ready:
+        yes_cents, no_cents = bet_store.side_volumes(market_id, exclude_user_id)
+        return odds_from_cents(yes_cents, no_cents)
+    
     try:
         # Get total volume on YES and NO sides
         if exclude_user_id is not None:
-            execute_timed_query(cursor, 'markets.get_market_volume_distribution_excluding_user', (market_id, exclude_user_id))
+            query_key = 'markets.get_market_volume_distribution_excluding_user'
+            execute_timed_query(cursor, query_key, (market_id, exclude_user_id))
         else:
-            execute_timed_query(cursor, 'markets.get_market_volume_distribution', (market_id,))
+            query_key = 'markets.get_market_volume_distribution'
+            execute_timed_query(cursor, query_key, (market_id,))
         
-        result = cursor.fetchone()
+        result = fetch_one_timed(cursor, query_key)
+        return odds_from_volumes(result['yes_volume'] or 0, result['no_volume'] or 0)
         
-        # Handle both dictionary and tuple results
-        if isinstance(result, dict):
-            yes_volume = float(result['yes_volume']) if result['yes_volume'] else 0.0
-            no_volume = float(result['no_volume']) if result['no_volume'] else 0.0
+    except Error as e:
+        print(f"Error calculating market odds: {e}")
+        return 0.50
+
+def calculate_market_odds_many(market_ids, cursor, exclude_user_id=None):
+    """
+    calculate_market_odds for several markets with one store lookup or one grouped query.
+    
+    Returns a dict of market ID -> probability (0.01 to 0.99) for YES outcome.
+    """
+    if not market_ids:
+        return {}
+    if bet_store.ready:
+        volumes = bet_store.side_volumes_many(market_ids, exclude_user_id)
+        return {market_id: odds_from_cents(*volumes[market_id]) for market_id in market_ids}
+    
+    try:
+        ids = json.dumps(list(market_ids))
+        if exclude_user_id is not None:
+            query_key = 'markets.get_market_volume_distributions_excluding_user'
+            execute_timed_query(cursor, query_key, (ids, exclude_user_id))
         else:
-            yes_volume = float(result[0]) if result[0] else 0.0
-            no_volume = float(result[1]) if result[1] else 0.0
-        
-        total_volume = yes_volume + no_volume
-        
-        # If no bets yet, return default 0.50 (50/50)
-        if total_volume == 0:
-            return 0.50
-        
-        # Calculate probability based on volume distribution
-        # Add a small smoothing factor to prevent division by zero and extreme odds
-        smoothing_factor = 1.0
-        yes_probability = (yes_volume + smoothing_factor) / (total_volume + 2 * smoothing_factor)
-        
-        # Ensure odds are within reasonable bounds (0.01 to 0.99)
-        yes_probability = max(0.01, min(0.99, yes_probability))
-        
-        return round(yes_probability, 2)
+            query_key = 'markets.get_market_volume_distributions'
+            execute_timed_query(cursor, query_key, (ids,))
+        volumes = {row['mId']: (row['yes_volume'], row['no_volume']) for row in fetch_all_timed(cursor, query_key)}
+        return {market_id: odds_from_volumes(*volumes.get(market_id, (0, 0))) for market_id in market_ids}
         
     except Error as e:
         print(f"Error calculating market odds: {e}")
-        return 0.50
+        return {market_id: 0.50 for market_id in market_ids}
 
 def get_user_market_odds(market_id, user_id, cursor):
     """
@@ -146,6 +530,13 @@ def get_display_market_odds(market_id, cursor):
     """
     return calculate_market_odds(market_id, cursor)
 
+def _jwt_decode(token):
+    return jwt.decode(token, app.config['SECRET_KEY'], algorithms=['HS256'])
+
+def decode_token(token):
+    """Verify a token and return its payload; raises jwt.InvalidTokenError (or ExpiredSignatureError)"""
+    return token_cache.decode(token, _jwt_decode)
+
 def get_user_from_token():
     """
     Extract user information from the Authorization header if present.
@@ -164,13 +555,22 @@ def get_user_from_token():
 
     try:
         # Decode the token
-        payload = jwt.decode(token, app.config['SECRET_KEY'], algorithms=['HS256'])
+        payload = decode_token(token)
         return payload.get('user_id')
     except jwt.ExpiredSignatureError:
         return None
     except jwt.InvalidTokenError:
         return None
 
+def admin_required(f):
+    """Restrict a diagnostic endpoint to callers presenting ADMIN_TOKEN in X-Admin-Token"""
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        if ADMIN_TOKEN and request.headers.get('X-Admin-Token') != ADMIN_TOKEN:
+            return jsonify({'error': 'Admin token required'}), 403
+        return f(*args, **kwargs)
+    return decorated
+
 # Authentication decorator
 def token_required(f):
     @wraps(f)
@@ -187,7 +587,7 @@ def token_required(f):
             return jsonify({'error': 'Token is missing'}), 401
 
         try:
-            data = jwt.decode(token, app.config['SECRET_KEY'], algorithms=['HS256'])
+            data = decode_token(token)
             # Add the current user to the request context
             request.current_user = data
         except jwt.ExpiredSignatureError:
@@ -198,6 +598,158 @@ def token_required(f):
         return f(*args, **kwargs)
     return decorated
 
+def load_market(cursor, market_id, user_id=None):
+    """
+    One market with current odds, excluding user_id's volume when given.
+    Returns None if the market does not exist.
+    """
+    execute_timed_query(cursor, 'markets.get_market_by_id', (market_id,))
+    market = fetch_one_timed(cursor, 'markets.get_market_by_id')
+    if not market:
+        return None
+    
+    # Calculate odds dynamically based on user login status
+    if user_id:
+        # Logged in user: exclude their own volume
+        market['podd'] = get_user_market_odds(market_id, user_id, cursor)
+    else:
+        # Logged out user: include all volume
+        market['podd'] = get_display_market_odds(market_id, cursor)
+    return market
+
+def market_exists(cursor, market_id):
+    execute_timed_query(cursor, 'validation.check_market_exists', (market_id,))
+    return fetch_one_timed(cursor, 'validation.check_market_exists') is not None
+
+def load_market_bets(cursor, market_id):
+    """All bets of a market with user information"""
+    execute_timed_query(cursor, 'markets.get_market_bets', (market_id,))
+    return fetch_all_timed(cursor, 'markets.get_market_bets')
+
+def load_market_comments(cursor, market_id):
+    """A market's comments in threaded order"""
+    execute_timed_query(cursor, 'comments.get_threaded_comments', (market_id, market_id))
+    return fetch_all_timed(cursor, 'comments.get_threaded_comments')
+
+def load_user_holdings(cursor, user_id, market_id=None):
+    """
+    A user's holdings with unrealized gains, largest gains first.
+    
+    Args:
+        cursor: Database cursor
+        user_id: The user whose holdings to load
+        market_id: Only keep holdings in this market (before odds are calculated)
+    """
+    execute_timed_query(cursor, 'bets.get_user_holdings', (user_id,))
+    holdings = fetch_all_timed(cursor, 'bets.get_user_holdings')
+    if market_id is not None:
+        holdings = [holding for holding in holdings if holding['mId'] == market_id]
+    
+    # Calculate current odds excluding this user's volume
+    holding_odds = [get_user_market_odds(holding['mId'], user_id, cursor) for holding in holdings]
+    
+    # Calculate unrealized gains for each holding
+    with query_timer.phase('bets.get_user_holdings'):
+        for holding, current_odds in zip(holdings, holding_odds):
+            apply_holding_gains(holding, current_odds)
+    
+    # Sort by unrealized gains (descending)
+    holdings.sort(key=lambda x: x['unrealized_gains'], reverse=True)
+    return holdings
+
+def load_user_balance(cursor, user_id):
+    """A user's balance as a float, or None if the user does not exist. The row comes from user_cache when fresh."""
+    def load():
+        execute_timed_query(cursor, 'bets.get_user_balance', (user_id,))
+        return fetch_one_timed(cursor, 'bets.get_user_balance')
+    user = user_cache.get_or_load(user_id, load)
+    return float(user['balance']) if user else None
+
+def _run_loader(loader, args, trace):
+    """Run loader(cursor, *args) on its own pooled connection, recording into `trace`"""
+    token = request_traces.attach(trace)
+    try:
+        connection = get_db_connection()
+        if not connection:
+            raise Error('Database connection failed')
+        try:
+            cursor = connection.cursor()
+            result = loader(cursor, *args)
+            cursor.close()
+            return result
+        finally:
+            connection.close()
+    finally:
+        request_traces.end(token)
+
+def run_concurrently(calls):
+    """
+    Run independent loaders at the same time, each on its own pooled connection.
+    
+    Each call runs on page_executor in a copy of the request's context, so
+    request, g and the user's token are visible to it. Queries are recorded in
+    per-call subtraces that are merged into the request's trace afterwards.
+    
+    Args:
+        calls: name -> (loader, args), where loader takes a cursor followed by args
+        
+    Returns:
+        name -> loader result. The first failure is re-raised once every call has finished.
+    """
+    parent = request_traces.current()
+    submitted = {}
+    for name, (loader, args) in calls.items():
+        subtrace = parent.subtrace() if parent is not None else None
+        context = contextvars.copy_context()
+        submitted[name] = (page_executor.submit(context.run, _run_loader, loader, args, subtrace), subtrace)
+    
+    wait([future for future, _ in submitted.values()])
+    if parent is not None:
+        for _, subtrace in submitted.values():
+            parent.adopt(subtrace)
+    return {name: future.result() for name, (future, _) in submitted.items()}
+
+def auth_busy_response():
+    """503 for a login or registration the hashing pool had no room for"""
+    password_hash_rejected.inc()
+    response = jsonify({'error': 'Too many sign-in requests, please try again shortly'})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
+def rehash_password(user_id, password, old_hash):
+    """
+    Replace a stored hash made with an old cost factor, in the background after a
+    successful login. Skipped when the pool is busy (the next login retries), and
+    the update only applies if the hash was not changed in the meantime. The write
+    runs on rehash_executor so hashing workers never wait for a pooled connection.
+    """
+    try:
+        future = password_hasher.hash_async(password)
+    except PasswordPoolFull:
+        return
+    
+    def store(future):
+        if future.exception() is not None:
+            print(f"Password rehash failed for user {user_id}: {future.exception()}")
+            return
+        connection = get_db_connection()
+        if not connection:
+            return
+        try:
+            cursor = connection.cursor()
+            execute_timed_query(cursor, 'auth.update_password_hash',
+                                (future.result().decode('utf-8'), user_id, old_hash))
+            connection.commit()
+            if cursor.rowcount:
+                password_rehashes.inc()
+            cursor.close()
+        except Error as e:
+            print(f"Password rehash failed for user {user_id}: {e}")
+        finally:
+            connection.close()
+    
+    future.add_done_callback(lambda future: rehash_executor.submit(store, future))
+
 @app.route('/auth/register', methods=['POST'])
 def register():
     try:
@@ -222,33 +774,46 @@ def register():
         connection = get_db_connection()
         if not connection:
             return jsonify({'error': 'Database connection failed'}), 500
-            
-        cursor = connection.cursor(dictionary=True)
         
-        # Check if username already exists
-        execute_timed_query(cursor, 'auth.check_username_exists', (username,))
-        if cursor.fetchone():
-            cursor.close()
-            connection.close()
-            return jsonify({'error': 'Username already exists'}), 400
+        try:
+            cursor = connection.cursor()
             
-        # Check if email already exists
-        execute_timed_query(cursor, 'auth.check_email_exists', (email,))
-        if cursor.fetchone():
+            # Check if username already exists
+            execute_timed_query(cursor, 'auth.check_username_exists', (username,))
+            if fetch_one_timed(cursor, 'auth.check_username_exists'):
+                cursor.close()
+                return jsonify({'error': 'Username already exists'}), 400
+                
+            # Check if email already exists
+            execute_timed_query(cursor, 'auth.check_email_exists', (email,))
+            if fetch_one_timed(cursor, 'auth.check_email_exists'):
+                cursor.close()
+                return jsonify({'error': 'Email already registered'}), 400
             cursor.close()
+        finally:
             connection.close()
-            return jsonify({'error': 'Email already registered'}), 400
         
-        # Hash the password
-        hashed_password = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+        # Hash the password on the hashing pool, without holding a pooled connection while it queues
+        try:
+            hashed_password = password_hasher.hash(password)
+        except PasswordPoolFull:
+            return auth_busy_response()
         
-        # Insert the new user
-        execute_timed_query(cursor, 'auth.insert_user', (username, email, hashed_password.decode('utf-8'), phone_number))
+        connection = get_db_connection()
+        if not connection:
+            return jsonify({'error': 'Database connection failed'}), 500
         
-        user_id = cursor.lastrowid
-        connection.commit()
-        cursor.close()
-        connection.close()
+        try:
+            cursor = connection.cursor()
+            
+            # Insert the new user; a username taken meanwhile fails on its unique key
+            execute_timed_query(cursor, 'auth.insert_user', (username, email, hashed_password, phone_number))
+            
+            user_id = cursor.lastrowid
+            connection.commit()
+            cursor.close()
+        finally:
+            connection.close()
         
         return jsonify({
             'message': 'Registration successful',
@@ -273,18 +838,27 @@ def login():
         if not connection:
             return jsonify({'error': 'Database connection failed'}), 500
             
-        cursor = connection.cursor(dictionary=True)
-        execute_timed_query(cursor, 'auth.get_user_by_username', (username,))
-        user = cursor.fetchone()
-        cursor.close()
-        connection.close()
+        try:
+            cursor = connection.cursor()
+            execute_timed_query(cursor, 'auth.get_user_by_username', (username,))
+            user = fetch_one_timed(cursor, 'auth.get_user_by_username')
+            cursor.close()
+        finally:
+            connection.close()
         
         if not user:
             return jsonify({'error': 'User not found'}), 401
             
-        # Verify password
-        if not bcrypt.checkpw(password.encode('utf-8'), user['passwordHash'].encode('utf-8')):
-            return jsonify({'error': 'Incorrect password'}), 401
+        # Verify password on the hashing pool
+        try:
+            if not password_hasher.check(password, user['passwordHash']):
+                return jsonify({'error': 'Incorrect password'}), 401
+        except PasswordPoolFull:
+            return auth_busy_response()
+        
+        # Hashes made with an older BCRYPT_ROUNDS are upgraded now that the password is known
+        if password_hasher.needs_rehash(user['passwordHash']):
+            rehash_password(user['uid'], password, user['passwordHash'])
             
         # Create JWT token
         token = jwt.encode({
@@ -310,38 +884,34 @@ def login():
 
 @app.route('/markets', methods=['GET'])
 def get_markets():
-    """Get all available markets for the home screen"""
+    """Get all available markets for the home screen, or the markets listed in ?ids="""
+    if request.args.get('ids'):
+        return get_markets_by_ids(request.args['ids'])
+    
     connection = get_db_connection()
     if not connection:
         return jsonify({'error': 'Database connection failed'}), 500
     
     try:
-        cursor = connection.cursor(dictionary=True)
+        cursor = connection.cursor()
         # Modified to fetch only active markets (volume > 0)
         execute_timed_query(cursor, 'markets.get_active_markets')
         
-        markets = cursor.fetchall()
+        markets = fetch_all_timed(cursor, 'markets.get_active_markets')
         
         # Get user ID if logged in
         user_id = get_user_from_token()
         
-        # Convert datetime objects to strings for JSON serialization and calculate dynamic odds
+        # Calculate odds dynamically based on user login status
         for market in markets:
-            if market['end_date']:
-                market['end_date'] = market['end_date'].isoformat()
-            
-            # Calculate odds dynamically based on user login status
             if user_id:
                 # Logged in user: exclude their own volume
                 market['podd'] = get_user_market_odds(market['mid'], user_id, cursor)
             else:
                 # Logged out user: include all volume
                 market['podd'] = get_display_market_odds(market['mid'], cursor)
-            
-            market['volume'] = float(market['volume'])
         
         cursor.close()
-        connection.close()
         
         return jsonify({
             'success': True,
@@ -352,6 +922,48 @@ def get_markets():
     except Error as e:
         print(f"Database error: {e}")
         return jsonify({'error': 'Failed to fetch markets'}), 500
+    finally:
+        connection.close()
+
+def get_markets_by_ids(ids_param):
+    """GET /markets?ids=1,2,3: the listed markets in the order asked, with batched odds"""
+    try:
+        market_ids = list(dict.fromkeys(int(value) for value in ids_param.split(',') if value.strip()))
+    except ValueError:
+        return jsonify({'error': 'ids must be a comma-separated list of market IDs'}), 400
+    if len(market_ids) > MARKETS_MAX_IDS:
+        return jsonify({'error': f'At most {MARKETS_MAX_IDS} ids per request'}), 400
+    
+    connection = get_db_connection()
+    if not connection:
+        return jsonify({'error': 'Database connection failed'}), 500
+    
+    try:
+        cursor = connection.cursor()
+        execute_timed_query(cursor, 'markets.get_markets_by_ids', (json.dumps(market_ids),))
+        found = {market['mid']: market for market in fetch_all_timed(cursor, 'markets.get_markets_by_ids')}
+        markets = [found[market_id] for market_id in market_ids if market_id in found]
+        
+        # Odds for every market at once, excluding the logged-in user's volume if any
+        odds = calculate_market_odds_many([market['mid'] for market in markets], cursor,
+                                          exclude_user_id=get_user_from_token())
+        for market in markets:
+            market['podd'] = odds[market['mid']]
+        
+        cursor.close()
+        
+        return jsonify({
+            'success': True,
+            'markets': markets,
+            'count': len(markets),
+            'missing': [market_id for market_id in market_ids if market_id not in found]
+        })
+        
+    except Error as e:
+        print(f"Database error: {e}")
+        return jsonify({'error': 'Failed to fetch markets'}), 500
+    finally:
+        connection.close()
 
 @app.route('/markets/trending', methods=['GET'])
 def get_trending_markets():
@@ -361,31 +973,36 @@ def get_trending_markets():
         return jsonify({'error': 'Database connection failed'}), 500
     
     try:
-        cursor = connection.cursor(dictionary=True)
-        # This can remain as is, assuming trending logic inherently filters out old markets
-        execute_timed_query(cursor, 'markets.get_trending_markets')
+        limit = min(max(int(request.args.get('limit', TRENDING_LIMIT)), 1), TRENDING_MAX_LIMIT)
         
-        markets = cursor.fetchall()
+        cursor = connection.cursor()
+        if 'trending' in degraded_features:
+            # Scores are not maintained without the triggers; rank every open market by scanning bets and comments
+            execute_timed_query(cursor, 'markets.get_trending_markets_rescan', (limit,))
+            markets = fetch_all_timed(cursor, 'markets.get_trending_markets_rescan')
+        else:
+            # Top-K by the maintained score (market_trending), read in index order
+            execute_timed_query(cursor, 'markets.get_trending_markets', (limit,))
+            markets = fetch_all_timed(cursor, 'markets.get_trending_markets')
+            
+            # Open markets without any activity follow, by id, as in the full-scan ranking
+            if len(markets) < limit:
+                execute_timed_query(cursor, 'markets.get_untrended_markets', (limit - len(markets),))
+                markets += fetch_all_timed(cursor, 'markets.get_untrended_markets')
         
         # Get user ID if logged in
         user_id = get_user_from_token()
         
+        # Calculate odds dynamically based on user login status
         for market in markets:
-            if market['end_date']:
-                market['end_date'] = market['end_date'].isoformat()
-            
-            # Calculate odds dynamically based on user login status
             if user_id:
                 # Logged in user: exclude their own volume
                 market['podd'] = get_user_market_odds(market['mid'], user_id, cursor)
             else:
                 # Logged out user: include all volume
                 market['podd'] = get_display_market_odds(market['mid'], cursor)
-            
-            market['volume'] = float(market['volume'])
         
         cursor.close()
-        connection.close()
         
         return jsonify({
             'success': True,
@@ -393,9 +1010,13 @@ def get_trending_markets():
             'count': len(markets)
         })
         
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
     except Error as e:
         print(f"Database error: {e}")
         return jsonify({'error': 'Failed to fetch trending markets'}), 500
+    finally:
+        connection.close()
 
 @app.route('/markets/<int:market_id>', methods=['GET'])
 def get_market(market_id):
@@ -405,35 +1026,15 @@ def get_market(market_id):
         return jsonify({'error': 'Database connection failed'}), 500
     
     try:
-        cursor = connection.cursor(dictionary=True)
-        
-        # Get market information
-        execute_timed_query(cursor, 'markets.get_market_by_id', (market_id,))
+        cursor = connection.cursor()
         
-        market = cursor.fetchone()
+        # Get market information, with odds for the logged-in user if any
+        market = load_market(cursor, market_id, get_user_from_token())
         if not market:
             cursor.close()
-            connection.close()
             return jsonify({'error': 'Market not found'}), 404
         
-        # Get user ID if logged in
-        user_id = get_user_from_token()
-        
-        # Calculate odds dynamically based on user login status
-        if user_id:
-            # Logged in user: exclude their own volume
-            market['podd'] = get_user_market_odds(market_id, user_id, cursor)
-        else:
-            # Logged out user: include all volume
-            market['podd'] = get_display_market_odds(market_id, cursor)
-        
-        # Convert data types for JSON serialization
-        market['volume'] = float(market['volume'])
-        if market['end_date']:
-            market['end_date'] = market['end_date'].isoformat()
-        
         cursor.close()
-        connection.close()
         
         return jsonify({
             'success': True,
@@ -443,6 +1044,51 @@ def get_market(market_id):
     except Error as e:
         print(f"Database error: {e}")
         return jsonify({'error': 'Failed to fetch market'}), 500
+    finally:
+        connection.close()
+
+@app.route('/markets/<int:market_id>/page', methods=['GET'])
+def get_market_page(market_id):
+    """
+    Everything the market page renders in one response: the market, its bets and
+    comments, and the logged-in user's holdings in it and balance. ?fields= picks
+    sections (default: all that apply to the caller); they are loaded concurrently.
+    """
+    user_id = get_user_from_token()
+    if request.args.get('fields'):
+        fields = list(dict.fromkeys(field.strip() for field in request.args['fields'].split(',') if field.strip()))
+        unknown = [field for field in fields if field not in MARKET_PAGE_FIELDS]
+        if unknown:
+            return jsonify({'error': f"Unknown fields: {', '.join(unknown)}"}), 400
+        if not user_id and any(field in USER_PAGE_FIELDS for field in fields):
+            return jsonify({'error': 'holdings and balance require a valid Authorization token'}), 401
+    else:
+        fields = [field for field in MARKET_PAGE_FIELDS if user_id or field not in USER_PAGE_FIELDS]
+    
+    loaders = {
+        'market': (load_market, (market_id, user_id)),
+        'bets': (load_market_bets, (market_id,)),
+        'comments': (load_market_comments, (market_id,)),
+        'holdings': (load_user_holdings, (user_id, market_id)),
+        'balance': (load_user_balance, (user_id,)),
+    }
+    calls = {field: loaders[field] for field in fields}
+    # The other sections would come back empty for a missing market, so always check it exists
+    if 'market' not in calls:
+        calls['market'] = (market_exists, (market_id,))
+    
+    try:
+        results = run_concurrently(calls)
+    except Error as e:
+        print(f"Database error: {e}")
+        return jsonify({'error': 'Failed to fetch market page'}), 500
+    
+    if not results['market']:
+        return jsonify({'error': 'Market not found'}), 404
+    
+    page = {'success': True, 'market_id': market_id}
+    page.update((field, results[field]) for field in fields)
+    return jsonify(page)
 
 @app.route('/markets/<int:market_id>/bets', methods=['GET'])
 def get_market_bets(market_id):
@@ -452,28 +1098,18 @@ def get_market_bets(market_id):
         return jsonify({'error': 'Database connection failed'}), 500
     
     try:
-        cursor = connection.cursor(dictionary=True)
+        cursor = connection.cursor()
         
         # First check if market exists
         execute_timed_query(cursor, 'validation.check_market_exists', (market_id,))
-        if not cursor.fetchone():
+        if not fetch_one_timed(cursor, 'validation.check_market_exists'):
             cursor.close()
-            connection.close()
             return jsonify({'error': 'Market not found'}), 404
         
         # Get all bets for the market with user information
-        execute_timed_query(cursor, 'markets.get_market_bets', (market_id,))
-        
-        bets = cursor.fetchall()
-        
-        # Convert data types for JSON serialization
-        for bet in bets:
-            bet['podd'] = float(bet['podd'])
-            bet['amt'] = float(bet['amt'])
-            bet['createdAt'] = bet['createdAt'].isoformat()
+        bets = load_market_bets(cursor, market_id)
         
         cursor.close()
-        connection.close()
         
         return jsonify({
             'success': True,
@@ -485,68 +1121,173 @@ def get_market_bets(market_id):
     except Error as e:
         print(f"Database error: {e}")
         return jsonify({'error': 'Failed to fetch bets'}), 500
+    finally:
+        connection.close()
+
+@app.route('/markets/<int:market_id>/stats', methods=['GET'])
+def get_market_stats(market_id):
+    """Hourly volume, side split and bettor counts of a market from the in-memory bet store"""
+    if not bet_store.ready:
+        return jsonify({'error': 'Market statistics are not available yet'}), 503
+    
+    try:
+        hours = min(max(int(request.args.get('hours', 24)), 1), 24 * 90)
+    except ValueError:
+        return jsonify({'error': 'hours must be an integer'}), 400
+    
+    since = int(time.time()) // 3600 * 3600 - (hours - 1) * 3600
+    with query_timer.phase('bet_store.market_stats'):
+        hourly = bet_store.aggregate(('hour', 'yes'), where={'market_id': market_id}, since=since)
+        sides = bet_store.aggregate('yes', where={'market_id': market_id})
+        bettors = bet_store.aggregate('user_id', where={'market_id': market_id})
+        
+        buckets = {}
+        for hour, yes, volume, count in zip(hourly['hour'].tolist(), hourly['yes'].tolist(),
+                                            hourly['sum'].tolist(), hourly['count'].tolist()):
+            bucket = buckets.setdefault(hour, {'hour': datetime.fromtimestamp(hour, timezone.utc).isoformat(),
+                                               'yes_volume': 0.0, 'no_volume': 0.0, 'bets': 0})
+            bucket['yes_volume' if yes else 'no_volume'] += volume
+            bucket['bets'] += count
+        side_volume = dict(zip(sides['yes'].tolist(), sides['sum'].tolist()))
+        side_count = dict(zip(sides['yes'].tolist(), sides['count'].tolist()))
+    
+    return jsonify({
+        'success': True,
+        'market_id': market_id,
+        'yes_volume': side_volume.get(1, 0.0),
+        'no_volume': side_volume.get(0, 0.0),
+        'yes_bets': side_count.get(1, 0),
+        'no_bets': side_count.get(0, 0),
+        'bettors': len(bettors['user_id']),
+        'hourly': [buckets[hour] for hour in sorted(buckets)]
+    })
+
+@app.route('/markets/<int:market_id>/history', methods=['GET'])
+def get_market_history(market_id):
+    """
+    Odds candles (open/high/low/close, YES/NO volume, bet count) from the
+    precomputed rollups, or from the bets while the rollup trigger is missing
+    """
+    try:
+        requested = parse_interval(request.args.get('interval', '1h'))
+        end = parse_time(request.args['to']) if request.args.get('to') else int(time.time())
+        start = parse_time(request.args['from']) if request.args.get('from') else max(0, end - requested * HISTORY_DEFAULT_POINTS)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if start >= end:
+        return jsonify({'error': 'from must be before to'}), 400
+    
+    interval, resolution = plan_query(requested, start, end, HISTORY_MAX_POINTS)
+    # Candles cover whole intervals, so the first one may start before `from`
+    start -= start % interval
+    
+    connection = get_db_connection()
+    if not connection:
+        return jsonify({'error': 'Database connection failed'}), 500
+    
+    try:
+        cursor = connection.cursor()
+        execute_timed_query(cursor, 'validation.check_market_exists', (market_id,))
+        if not fetch_one_timed(cursor, 'validation.check_market_exists'):
+            cursor.close()
+            return jsonify({'error': 'Market not found'}), 404
+        
+        if 'history' in degraded_features:
+            # Rollups are not maintained without the trigger; aggregate the market's bets into the candles,
+            # covering the same bets as the rollup buckets starting before `to` would
+            until = min(-(-end // resolution) * resolution, MAX_FROM_UNIXTIME)
+            execute_timed_query(cursor, 'markets.get_odds_candles_from_bets', (interval, market_id, start, until))
+            rows = fetch_all_timed(cursor, 'markets.get_odds_candles_from_bets')
+        else:
+            execute_timed_query(cursor, 'markets.get_odds_rollups', (market_id, resolution, start, end))
+            rows = fetch_all_timed(cursor, 'markets.get_odds_rollups')
+        cursor.close()
+        
+        with query_timer.phase('markets.get_odds_rollups'):
+            candles = merge_candles(rows, interval)
+        
+        return jsonify({
+            'success': True,
+            'market_id': market_id,
+            'interval': format_interval(interval),
+            'requested_interval': format_interval(requested),
+            'downsampled': interval != requested,
+            'from': datetime.fromtimestamp(start, timezone.utc).isoformat(),
+            'to': datetime.fromtimestamp(end, timezone.utc).isoformat(),
+            'candles': candles
+        })
+        
+    except Error as e:
+        print(f"Database error: {e}")
+        return jsonify({'error': 'Failed to fetch market history'}), 500
+    finally:
+        connection.close()
 
 @app.route('/markets/<int:market_id>/bets', methods=['POST'])
 @token_required
 def create_bet(market_id):
     """Create a new bet on a specific market"""
-    connection = get_db_connection()
-    connection.autocommit = False
-    if not connection:
-        return jsonify({'error': 'Database connection failed'}), 500
+    # Get user ID from JWT token
+    user_id = request.current_user['user_id']
     
+    # The request is validated before taking a pooled connection
     try:
         # Get JSON data from request
         data = request.get_json()
         
-        # Get user ID from JWT token
-        user_id = request.current_user['user_id']
-        
         # Validate required fields
         required_fields = ['amount', 'prediction']
         for field in required_fields:
             if field not in data:
                 return jsonify({'error': f'Missing required field: {field}'}), 400
         
-        amount = float(data['amount'])
+        # Money is validated in integer cents; the amount is stored as the exact Decimal of those cents
+        amount_cents = to_cents(data['amount'])
+        amount = from_fixed(amount_cents, CENTS)
         prediction = bool(data['prediction'])  # True for YES, False for NO
-                
-        cursor = connection.cursor(dictionary=True)
+    except (ValueError, TypeError):
+        return jsonify({'error': 'Invalid data format'}), 400
+    
+    connection = get_db_connection()
+    if not connection:
+        return jsonify({'error': 'Database connection failed'}), 500
+    connection.autocommit = False
+    
+    try:
+        cursor = connection.cursor()
         execute_timed_query(cursor, 'transactions.set_serializable_isolation')
         
         # Check if market exists and is still active
         execute_timed_query(cursor, 'validation.check_market_active', (market_id,))
-        market_result = cursor.fetchone()
+        market_result = fetch_one_timed(cursor, 'validation.check_market_active')
         if not market_result:
             connection.rollback() # rollback the transaction
             cursor.close()
-            connection.close()
             return jsonify({'error': 'Market not found or has ended'}), 404
         
-        # Calculate odds excluding the current user's bets to prevent manipulation
-        current_odds = get_user_market_odds(market_id, user_id, cursor)
+        # Calculate odds excluding the current user's bets to prevent manipulation.
+        # Read from the table so the price is consistent with this serializable transaction.
+        current_odds = calculate_market_odds(market_id, cursor, exclude_user_id=user_id, from_store=False)
         
         # Check if user exists
         execute_timed_query(cursor, 'bets.get_user_balance', (user_id,))
-        user = cursor.fetchone()
+        user = fetch_one_timed(cursor, 'bets.get_user_balance')
         if not user:
             connection.rollback()
             cursor.close()
-            connection.close()
             return jsonify({'error': 'User not found'}), 404
         
         # Handle balance validation based on whether this is a buy or sell
-        if amount > 0:
+        if amount_cents > 0:
             # BUY: Check if user has sufficient balance
-            if user['balance'] < amount:
+            if to_cents(user['balance']) < amount_cents:
                 connection.rollback()
                 cursor.close()
-                connection.close()
                 return jsonify({'error': 'Insufficient balance'}), 400
         else:
             # SELL: Check if user has sufficient holdings to sell
             execute_timed_query(cursor, 'bets.get_user_holdings', (user_id,))
-            holdings = cursor.fetchall()
+            holdings = fetch_all_timed(cursor, 'bets.get_user_holdings')
             
             # Find the specific holding for this market and prediction
             target_holding = None
@@ -558,36 +1299,19 @@ def create_bet(market_id):
             if not target_holding:
                 connection.rollback()
                 cursor.close()
-                connection.close()
                 return jsonify({'error': 'No holdings found for this market and prediction'}), 400
             
-            # Check if user has enough current market value to sell
-            net_units = float(target_holding['net_units'])
-            is_yes = bool(target_holding['yes'])
-            
-            # Calculate the correct unit price for YES and NO
-            if is_yes:
-                unit_price = current_odds
-            else:
-                unit_price = 1 - current_odds
-            
-            # For NO, units are based on amt/(1-podd), so selling should check units * unit_price
-            current_market_value = net_units * unit_price
+            # Check if user has enough current market value to sell. YES units are priced at the odds,
+            # NO units (bought at 1 - podd) at 1 - odds. The value is in cents exactly as
+            # /api/user-holdings reports it, so selling everything needs no tolerance.
+            current_value_cents = value_cents(to_units(target_holding['net_units']), bool(target_holding['yes']),
+                                              to_bps(current_odds))
+            sell_cents = -amount_cents
             
-            # Define epsilon for floating-point comparison (1 cent tolerance)
-            EPSILON = 0.01
-            sell_amount = abs(amount)
-            
-            # Special handling for "sell all" - if trying to sell within epsilon of total value, allow it
-            if abs(sell_amount - current_market_value) <= EPSILON:
-                # This is effectively a "sell all" operation - allow it to proceed
-                pass
-            elif sell_amount > current_market_value + EPSILON:
-                # Only reject if sell amount significantly exceeds holdings
+            if sell_cents > current_value_cents:
                 connection.rollback()
                 cursor.close()
-                connection.close()
-                return jsonify({'error': f'Insufficient holdings. Your current market value is ${current_market_value:.2f}, trying to sell ${sell_amount:.2f}'}), 400
+                return jsonify({'error': f'Insufficient holdings. Your current market value is ${current_value_cents / CENTS:.2f}, trying to sell ${sell_cents / CENTS:.2f}'}), 400
         
         try:
             # Insert the bet using current market odds (trigger will handle balance and volume updates)
@@ -597,19 +1321,32 @@ def create_bet(market_id):
             
             # After inserting the bet, update the market's podd
             execute_timed_query(cursor, 'bets.get_all_market_bets', (market_id,))
-            all_bets = cursor.fetchall()
+            all_bets = fetch_all_timed(cursor, 'bets.get_all_market_bets')
 
-            yes_volume = sum(b['amt'] for b in all_bets if b['yes'])
-            no_volume = sum(b['amt'] for b in all_bets if not b['yes'])
-            total_volume = yes_volume + no_volume
+            yes_cents = sum(to_cents(b['amt']) for b in all_bets if b['yes'])
+            total_cents = sum(to_cents(b['amt']) for b in all_bets)
 
-            if total_volume > 0:
-                new_podd = yes_volume / total_volume
+            if total_cents > 0:
+                # YES share rounded to the podd column's two decimals here rather than by MySQL
+                new_podd = from_fixed(div_round(yes_cents * 100, total_cents), 100)
                 execute_timed_query(cursor, 'markets.update_market_podd', (new_podd, market_id))
 
             connection.commit() # commit the transaction
             cursor.close()
-            connection.close()
+            
+            # The bet trigger changed the balance
+            user_cache.invalidate(user_id)
+            bets_created.inc()
+            bet_rate.record()
+            bet_store.append(bet_id, user_id, market_id, current_odds, amount, prediction)
+            
+            # The table stays the source of truth; journal_replay.py backfill repairs a missed append
+            if bet_journal is not None:
+                try:
+                    bet_journal.append(bet_id, user_id, market_id, current_odds, amount, prediction)
+                except OSError as e:
+                    bet_journal_errors.inc()
+                    print(f"Bet journal append failed for bet {bet_id}: {e}")
             
             return jsonify({
                 'success': True,
@@ -625,21 +1362,18 @@ def create_bet(market_id):
         except Error as e:
             connection.rollback() # rollback the transaction
             cursor.close()
-            connection.close()
             print(f"Transaction error: {e}")
             return jsonify({'error': 'Failed to create bet'}), 500
         
     except (ValueError, TypeError) as e:
         connection.rollback()
-        cursor.close()
-        connection.close()
         return jsonify({'error': 'Invalid data format'}), 400
     except Error as e:
         connection.rollback()
-        cursor.close()
-        connection.close()
         print(f"Database error: {e}")
         return jsonify({'error': 'Failed to create bet'}), 500
+    finally:
+        connection.close()
 
 
 
@@ -652,15 +1386,10 @@ def get_market_comments(market_id):
     
     try:
         # Get threaded comments
-        cursor = connection.cursor(dictionary=True)
-        execute_timed_query(cursor, 'comments.get_threaded_comments', (market_id, market_id))
-        comments = cursor.fetchall()
-
-        for comment in comments:
-            comment['created_at'] = comment['created_at'].isoformat()
+        cursor = connection.cursor()
+        comments = load_market_comments(cursor, market_id)
 
         cursor.close()
-        connection.close()
 
         return jsonify({
             'success': True,
@@ -672,6 +1401,8 @@ def get_market_comments(market_id):
     except Error as e:
         print(f"Database error: {e}")
         return jsonify({'error': 'Failed to fetch comments'}), 500
+    finally:
+        connection.close()
 
 @app.route('/markets/<int:market_id>/comments', methods=['POST'])
 def create_comment(market_id):
@@ -696,16 +1427,14 @@ def create_comment(market_id):
         
         # Check if market exists
         execute_timed_query(cursor, 'validation.check_market_exists', (market_id,))
-        if not cursor.fetchone():
+        if not fetch_one_timed(cursor, 'validation.check_market_exists'):
             cursor.close()
-            connection.close()
             return jsonify({'error': 'Market not found'}), 404
         
         # Check if user exists
         execute_timed_query(cursor, 'validation.check_user_exists', (user_id,))
-        if not cursor.fetchone():
+        if not fetch_one_timed(cursor, 'validation.check_user_exists'):
             cursor.close()
-            connection.close()
             return jsonify({'error': 'User not found'}), 404
         
         # Insert the comment
@@ -715,7 +1444,9 @@ def create_comment(market_id):
         
         connection.commit()
         cursor.close()
-        connection.close()
+        
+        comments_created.inc()
+        comment_rate.record()
         
         return jsonify({
             'success': True,
@@ -728,6 +1459,8 @@ def create_comment(market_id):
     except Error as e:
         print(f"Database error: {e}")
         return jsonify({'error': 'Failed to create comment'}), 500
+    finally:
+        connection.close()
 
 @app.route('/markets/<int:market_id>/comments/<int:parent_id>/replies', methods=['POST'])
 def create_reply(market_id, parent_id):
@@ -752,23 +1485,20 @@ def create_reply(market_id, parent_id):
         
         # Check if market exists
         execute_timed_query(cursor, 'validation.check_market_exists', (market_id,))
-        if not cursor.fetchone():
+        if not fetch_one_timed(cursor, 'validation.check_market_exists'):
             cursor.close()
-            connection.close()
             return jsonify({'error': 'Market not found'}), 404
         
         # Check if parent comment exists and belongs to this market
         execute_timed_query(cursor, 'validation.check_comment_exists_in_market', (parent_id, market_id))
-        if not cursor.fetchone():
+        if not fetch_one_timed(cursor, 'validation.check_comment_exists_in_market'):
             cursor.close()
-            connection.close()
             return jsonify({'error': 'Parent comment not found'}), 404
         
         # Check if user exists
         execute_timed_query(cursor, 'validation.check_user_exists', (user_id,))
-        if not cursor.fetchone():
+        if not fetch_one_timed(cursor, 'validation.check_user_exists'):
             cursor.close()
-            connection.close()
             return jsonify({'error': 'User not found'}), 404
         
         connection.start_transaction()
@@ -783,7 +1513,9 @@ def create_reply(market_id, parent_id):
             connection.commit()
             
             cursor.close()
-            connection.close()
+            
+            comments_created.inc()
+            comment_rate.record()
             
             return jsonify({
                 'success': True,
@@ -801,6 +1533,8 @@ def create_reply(market_id, parent_id):
     except Error as e:
         print(f"Database error: {e}")
         return jsonify({'error': 'Failed to create reply'}), 500
+    finally:
+        connection.close()
 
 @app.route('/api/user-profits', methods=['GET'])
 def get_user_profits():
@@ -810,11 +1544,25 @@ def get_user_profits():
         return jsonify({'error': 'Database connection failed'}), 500
     
     try:
-        cursor = connection.cursor(dictionary=True)
+        cursor = connection.cursor()
+        
+        if bet_store.ready:
+            # Realized and unrealized gains for every user from the bet store in one pass
+            execute_timed_query(cursor, 'bets.get_all_user_balances')
+            users = fetch_all_timed(cursor, 'bets.get_all_user_balances')
+            with query_timer.phase('bets.get_user_profits'):
+                results = user_profits(bet_store.snapshot(), users)
+            
+            cursor.close()
+            
+            return jsonify({
+                'success': True,
+                'users': results
+            })
         
         # Get all users with their basic info and realized gains
         execute_timed_query(cursor, 'bets.get_user_profits')
-        results = cursor.fetchall()
+        results = fetch_all_timed(cursor, 'bets.get_user_profits')
         
         # For each user, calculate unrealized gains using current odds excluding their volume
         for user in results:
@@ -822,49 +1570,31 @@ def get_user_profits():
             
             # Get user holdings to calculate unrealized gains
             execute_timed_query(cursor, 'bets.get_user_holdings', (user_id,))
-            holdings = cursor.fetchall()
+            holdings = fetch_all_timed(cursor, 'bets.get_user_holdings')
             
-            unrealized_gains = 0.0
+            # Calculate current odds excluding this user's volume
+            holding_odds = [get_user_market_odds(holding['mId'], user_id, cursor) for holding in holdings]
             
-            for holding in holdings:
-                market_id = holding['mId']
-                net_units = float(holding['net_units'])
-                avg_buy_price = float(holding['avg_buy_price_per_unit'])
-                total_invested = float(holding['total_invested'])
-                is_yes = bool(holding['yes'])
+            with query_timer.phase('bets.get_user_profits'):
+                unrealized_gains, total_investment = unrealized_gains_total(holdings, holding_odds)
                 
-                # Calculate current odds excluding this user's volume
-                current_odds = get_user_market_odds(market_id, user_id, cursor)
+                # Update user data
+                user['current_balance'] = float(user['current_balance'])
+                user['realized_gains'] = float(user['realized_gains'])
+                user['unrealized_gains'] = float(unrealized_gains)
+                user['total_profits'] = float(user['realized_gains']) + float(unrealized_gains)
                 
-                # Calculate unrealized gains for this holding
-                if is_yes:
-                    # For YES holdings: net_units * current_odds - total_invested
-                    current_value = net_units * current_odds
-                    unrealized_gains += current_value - total_invested
+                # Calculate percent change from initial investment
+                # Use total invested from holdings for more accurate calculation
+                if total_investment > 0:
+                    user['percent_change'] = (user['total_profits'] / total_investment) * 100
                 else:
-                    # For NO holdings: net_units * (1-current_odds) - total_invested
-                    current_value = net_units * (1 - current_odds)
-                    unrealized_gains += current_value - total_invested
-            
-            # Update user data
-            user['current_balance'] = float(user['current_balance'])
-            user['realized_gains'] = float(user['realized_gains'])
-            user['unrealized_gains'] = float(unrealized_gains)
-            user['total_profits'] = float(user['realized_gains']) + float(unrealized_gains)
-            
-            # Calculate percent change from initial investment
-            # Use total invested from holdings for more accurate calculation
-            total_investment = sum([float(holding['total_invested']) for holding in holdings])
-            if total_investment > 0:
-                user['percent_change'] = (user['total_profits'] / total_investment) * 100
-            else:
-                user['percent_change'] = 0.0
+                    user['percent_change'] = 0.0
         
         # Sort by total profits
         results.sort(key=lambda x: x['total_profits'], reverse=True)
         
         cursor.close()
-        connection.close()
         
         return jsonify({
             'success': True,
@@ -874,6 +1604,8 @@ def get_user_profits():
     except Error as e:
         print(f"Database error: {e}")
         return jsonify({'error': 'Failed to get user profits'}), 500
+    finally:
+        connection.close()
 
 @app.route('/api/user-holdings', methods=['GET'])
 @token_required
@@ -884,62 +1616,13 @@ def get_user_holdings():
         return jsonify({'error': 'Database connection failed'}), 500
     
     try:
-        cursor = connection.cursor(dictionary=True)
+        cursor = connection.cursor()
         user_id = request.current_user['user_id']
         
-        # Get user holdings with bet unit calculations
-        execute_timed_query(cursor, 'bets.get_user_holdings', (user_id,))
-        holdings = cursor.fetchall()
-        
-        # Calculate unrealized gains for each holding
-        for holding in holdings:
-            market_id = holding['mId']
-            net_units = float(holding['net_units'])
-            avg_buy_price = float(holding['avg_buy_price_per_unit'])
-            is_yes = bool(holding['yes'])
-            
-            # Calculate current odds excluding this user's volume
-            current_odds = get_user_market_odds(market_id, user_id, cursor)
-            
-            # Calculate unrealized gains for this holding
-            if is_yes:
-                # For YES holdings: net_units * current_odds - total_invested
-                unrealized_gains = (net_units * current_odds) - float(holding['total_invested'])
-            else:
-                # For NO holdings: net_units * (1-current_odds) - total_invested
-                unrealized_gains = (net_units * (1 - current_odds)) - float(holding['total_invested'])
-            
-            # Calculate current market value
-            if is_yes:
-                current_value = net_units * current_odds
-            else:
-                current_value = net_units * (1 - current_odds)
-            
-            # Calculate percent change
-            total_invested = float(holding['total_invested'])
-            if total_invested > 0:
-                percent_change = ((current_value - total_invested) / total_invested) * 100
-            else:
-                percent_change = 0.0
-            
-            # Update holding data
-            holding['unrealized_gains'] = float(unrealized_gains)
-            holding['current_value'] = float(current_value)
-            holding['percent_change'] = float(percent_change)
-            holding['current_odds'] = float(current_odds)
-            
-            # Convert numeric fields to float
-            holding['bought_units'] = float(holding['bought_units'])
-            holding['sold_units'] = float(holding['sold_units'])
-            holding['net_units'] = float(holding['net_units'])
-            holding['total_invested'] = float(holding['total_invested'])
-            holding['avg_buy_price_per_unit'] = float(holding['avg_buy_price_per_unit'])
-        
-        # Sort by unrealized gains (descending)
-        holdings.sort(key=lambda x: x['unrealized_gains'], reverse=True)
+        # Get user holdings with unrealized gains
+        holdings = load_user_holdings(cursor, user_id)
         
         cursor.close()
-        connection.close()
         
         return jsonify({
             'success': True,
@@ -953,6 +1636,8 @@ def get_user_holdings():
     except Error as e:
         print(f"Database error: {e}")
         return jsonify({'error': 'Failed to get user holdings'}), 500
+    finally:
+        connection.close()
 
 @app.route('/api/user-bets', methods=['GET'])
 @token_required
@@ -963,21 +1648,14 @@ def get_user_bets():
         return jsonify({'error': 'Database connection failed'}), 500
     
     try:
-        cursor = connection.cursor(dictionary=True)
+        cursor = connection.cursor()
         user_id = request.current_user['user_id']
         
         # Get user bets with market information
         execute_timed_query(cursor, 'bets.get_user_bets', (user_id,))
-        bets = cursor.fetchall()
-        
-        # Convert data types for JSON serialization
-        for bet in bets:
-            bet['podd'] = float(bet['podd'])
-            bet['amt'] = float(bet['amt'])
-            bet['createdAt'] = bet['createdAt'].isoformat()
+        bets = fetch_all_timed(cursor, 'bets.get_user_bets')
         
         cursor.close()
-        connection.close()
         
         return jsonify({
             'success': True,
@@ -988,6 +1666,8 @@ def get_user_bets():
     except Error as e:
         print(f"Database error: {e}")
         return jsonify({'error': 'Failed to fetch user bets'}), 500
+    finally:
+        connection.close()
 
 @app.route('/api/user-balance', methods=['GET'])
 @token_required
@@ -998,29 +1678,82 @@ def get_user_balance():
         return jsonify({'error': 'Database connection failed'}), 500
     
     try:
-        cursor = connection.cursor(dictionary=True)
+        cursor = connection.cursor()
         user_id = request.current_user['user_id']
         
         # Get user balance
-        execute_timed_query(cursor, 'bets.get_user_balance', (user_id,))
-        user = cursor.fetchone()
+        balance = load_user_balance(cursor, user_id)
         
-        if not user:
+        if balance is None:
             cursor.close()
-            connection.close()
             return jsonify({'error': 'User not found'}), 404
         
         cursor.close()
-        connection.close()
         
         return jsonify({
             'success': True,
-            'balance': float(user['balance'])
+            'balance': balance
         })
         
     except Error as e:
         print(f"Database error: {e}")
         return jsonify({'error': 'Failed to get user balance'}), 500
+    finally:
+        connection.close()
+
+def _dispatch_subrequest(path, headers):
+    """Run one GET sub-request through the app's full request handling"""
+    with app.test_request_context(path, method='GET', headers=headers):
+        try:
+            response = app.full_dispatch_request()
+        except Exception as e:
+            print(f"Batch sub-request {path} failed: {e}")
+            return {'status': 500, 'body': {'error': 'Internal server error'}}
+        body = response.get_json(silent=True)
+        return {'status': response.status_code,
+                'body': body if body is not None else response.get_data(as_text=True)}
+
+@app.route('/batch', methods=['POST'])
+def batch_requests():
+    """
+    Run several read (GET) sub-requests in one round trip. Each is handled like a
+    separate request with the caller's Authorization header, on batch_executor
+    threads, and gets its own status code in the response.
+    """
+    data = request.get_json(silent=True)
+    subrequests = data.get('requests') if isinstance(data, dict) else None
+    if not isinstance(subrequests, list) or not subrequests:
+        return jsonify({'error': 'requests must be a non-empty list'}), 400
+    if len(subrequests) > BATCH_MAX_REQUESTS:
+        return jsonify({'error': f'At most {BATCH_MAX_REQUESTS} requests per batch'}), 400
+    
+    headers = {}
+    if request.headers.get('Authorization'):
+        headers['Authorization'] = request.headers['Authorization']
+    
+    responses = [None] * len(subrequests)
+    futures = {}
+    for i, subrequest in enumerate(subrequests):
+        if not isinstance(subrequest, dict) or not isinstance(subrequest.get('path'), str) \
+                or not subrequest['path'].startswith('/'):
+            responses[i] = {'status': 400, 'body': {'error': 'Each request needs an absolute path'}}
+        elif str(subrequest.get('method', 'GET')).upper() != 'GET':
+            responses[i] = {'status': 405, 'body': {'error': 'Only GET requests can be batched'}}
+        elif subrequest['path'].split('?', 1)[0].rstrip('/') == '/batch':
+            responses[i] = {'status': 400, 'body': {'error': 'Batches cannot be nested'}}
+        else:
+            futures[i] = batch_executor.submit(_dispatch_subrequest, subrequest['path'], headers)
+    
+    for i, future in futures.items():
+        responses[i] = future.result()
+    for subrequest, response in zip(subrequests, responses):
+        if isinstance(subrequest, dict) and 'id' in subrequest:
+            response['id'] = subrequest['id']
+    
+    return jsonify({
+        'success': True,
+        'responses': responses
+    })
 
 @app.route('/api/query-stats', methods=['GET'])
 def get_query_stats():
@@ -1029,12 +1762,64 @@ def get_query_stats():
         stats = query_timer.get_all_stats()
         return jsonify({
             'success': True,
-            'stats': stats
+            'stats': stats,
+            'slow_query_log': slow_query_log.get_stats(),
+            'auth_cache': {'tokens': token_cache.get_stats(), 'users': user_cache.get_stats()},
+            'password_hasher': password_hasher.get_stats()
         })
     except Exception as e:
         print(f"Error getting query stats: {e}")
         return jsonify({'error': 'Failed to get query statistics'}), 500
 
+@app.route('/api/traces', methods=['GET'])
+@admin_required
+def get_request_traces():
+    """Get the slowest recently sampled request traces with their query breakdown"""
+    try:
+        limit = request.args.get('limit', 20, type=int)
+        return jsonify({
+            'success': True,
+            'repeat_threshold': request_traces.repeat_threshold,
+            'traces': request_traces.slowest(limit)
+        })
+    except Exception as e:
+        print(f"Error getting request traces: {e}")
+        return jsonify({'error': 'Failed to get request traces'}), 500
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Expose application metrics in Prometheus text exposition format"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/ready', methods=['GET'])
+def get_readiness():
+    """
+    Report whether start-up warm-up has finished; 503 until it has. Features
+    running on a fallback because their tables or triggers are missing are
+    listed under 'degraded' (still 200).
+    """
+    status = warmup.get_status()
+    status['degraded'] = dict(degraded_features)
+    return jsonify(status), 200 if status['ready'] else 503
+
+# Warm-up before reporting ready: open the pool, prepare statements, load hot pages
+WARMUP_ENABLED = os.getenv('WARMUP_ENABLED', 'True').lower() == 'true'
+WARMUP_MARKETS = int(os.getenv('WARMUP_MARKETS', '50'))
+WARMUP_TABLES = [table.strip() for table in os.getenv('WARMUP_TABLES', 'markets,bets,comments,users').split(',') if table.strip()]
+warmup_steps = [('connections', lambda: warm_connections(get_db_connection, DB_POOL_SIZE, sql)),
+                ('schema', check_feature_requirements)]
+if BET_STORE_ENABLED:
+    warmup_steps.append(('bet_store', load_bet_store))
+warmup_steps += [
+    ('hot_queries', lambda: warm_hot_queries(get_db_connection, sql, WARMUP_MARKETS, hot_queries())),
+    ('indexes', lambda: touch_indexes(get_db_connection, WARMUP_TABLES)),
+]
+warmup = WarmUp(warmup_steps, retry_delay=float(os.getenv('WARMUP_RETRY_DELAY', '5')))
+if WARMUP_ENABLED:
+    warmup.start()
+else:
+    warmup.mark_ready()
+
 if __name__ == '__main__':
     debug_mode = os.getenv('FLASK_DEBUG', 'False').lower() == 'true'
     app.run(debug=debug_mode, host='0.0.0.0', port=5000)
\ No newline at end of file
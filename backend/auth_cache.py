@@ -0,0 +1,156 @@
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+def token_digest(token: str) -> bytes:
+    """Cache key of a token, so the cache does not hold bearer credentials"""
+    return hashlib.blake2b(token.encode('utf-8'), digest_size=16).digest()
+
+class TokenCache:
+    """
+    LRU of verified JWT payloads keyed by a digest of the token, so a token's
+    signature is checked once instead of on every request that sends it.
+
+    Entries are dropped when the token's exp passes; tokens without exp are not
+    cached. Only tokens that verified are stored, so an invalid or expired token
+    still goes through the decoder and gets its error. max_entries=0 disables
+    caching.
+    """
+
+    def __init__(self, max_entries: int = 10000, clock: Callable[[], float] = time.time):
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries: 'OrderedDict[bytes, Tuple[Dict[str, Any], float]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        """A copy of the token's payload if it was verified and has not expired, else None"""
+        key = token_digest(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            # jwt rejects a token once exp <= now
+            if entry is None or entry[1] <= self.clock():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(entry[0])
+
+    def put(self, token: str, payload: Dict[str, Any]):
+        if self.max_entries <= 0 or not isinstance(payload.get('exp'), (int, float)):
+            return
+        key = token_digest(token)
+        with self._lock:
+            self._entries[key] = (dict(payload), payload['exp'])
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def decode(self, token: str, decoder: Callable[[str], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        The payload of a token, from the cache or from decoder(token) (which
+        verifies it and raises for a bad token) on a miss.
+        """
+        if self.max_entries <= 0:
+            return decoder(token)
+        payload = self.get(token)
+        if payload is None:
+            payload = decoder(token)
+            self.put(token, payload)
+        return payload
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = len(self._entries)
+        return {'entries': entries, 'max_entries': self.max_entries, 'hits': self.hits, 'misses': self.misses,
+                'hit_ratio': self.hit_ratio()}
+
+class TTLCache:
+    """
+    Bounded LRU whose entries expire ttl seconds after they were loaded, for
+    rows that change under the cache (a user's balance). Writers call
+    invalidate() for the rows they change; the TTL bounds how stale a row
+    changed elsewhere (market resolution, other processes) can be.
+
+    A load that was running while any key was invalidated is returned but not
+    stored, so a value read before a write cannot be cached after it.
+    ttl=0 disables caching.
+    """
+
+    def __init__(self, ttl: float, max_entries: int = 10000, clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries: 'OrderedDict[Hashable, Tuple[Any, float]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._invalidations = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_entries > 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= self.clock():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def get_or_load(self, key: Hashable, load: Callable[[], Any]) -> Any:
+        """The cached value of key, or load() on a miss; None results are not cached"""
+        if not self.enabled:
+            return load()
+        value = self.get(key)
+        if value is not None:
+            return value
+        invalidations = self._invalidations
+        value = load()
+        if value is not None:
+            with self._lock:
+                if self._invalidations == invalidations:
+                    self._entries[key] = (value, self.clock() + self.ttl)
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            self._invalidations += 1
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._invalidations += 1
+            self._entries.clear()
+
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = len(self._entries)
+        return {'entries': entries, 'max_entries': self.max_entries, 'ttl': self.ttl, 'hits': self.hits,
+                'misses': self.misses, 'hit_ratio': self.hit_ratio()}
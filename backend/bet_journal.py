@@ -0,0 +1,263 @@
+import os
+import glob
+import time
+import zlib
+import struct
+import threading
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+
+from fixed_point import CENTS, to_fixed
+
+# Segment file header: magic, format version, record size
+HEADER = struct.Struct('<4sHH8x')
+MAGIC = b'PMBJ'
+VERSION = 1
+
+# bet id, user id, market id, amount (cents), created at (epoch seconds), odds (hundredths), yes, crc32
+RECORD = struct.Struct('<QIIqqHBxI')
+RECORD_DTYPE = np.dtype([
+    ('bet_id', '<u8'), ('user_id', '<u4'), ('market_id', '<u4'), ('amount', '<i8'),
+    ('created_at', '<i8'), ('podd', '<u2'), ('yes', 'u1'), ('pad', 'u1'), ('crc', '<u4'),
+])
+assert RECORD_DTYPE.itemsize == RECORD.size
+
+# Bytes of a record covered by its checksum
+CHECKED_BYTES = RECORD.size - 4
+
+SEGMENT_PATTERN = 'bets-*.journal'
+
+FSYNC_POLICIES = ('always', 'interval', 'never')
+
+def to_hundredths(value: Any) -> int:
+    """Round like a DECIMAL(_, 2) column does (half away from zero) and scale to an integer"""
+    return to_fixed(value, CENTS)
+
+def encode_record(bet_id: int, user_id: int, market_id: int, podd: Any, amount: Any, yes: bool,
+                  created_at: int) -> bytes:
+    body = RECORD.pack(bet_id, user_id, market_id, to_hundredths(amount), created_at,
+                       to_hundredths(podd), 1 if yes else 0, 0)
+    return body[:CHECKED_BYTES] + struct.pack('<I', zlib.crc32(body[:CHECKED_BYTES]))
+
+def segment_paths(journal_dir: str) -> List[str]:
+    return sorted(glob.glob(os.path.join(journal_dir, SEGMENT_PATTERN)))
+
+def _segment_name(index: int) -> str:
+    return f"bets-{index:06d}.journal"
+
+def _check_header(path: str, header: bytes):
+    magic, version, record_size = HEADER.unpack(header)
+    if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+        raise ValueError(f"{path} is not a version {VERSION} bet journal segment")
+
+class BetJournal:
+    """
+    Append-only journal of committed bets in fixed-width binary records.
+
+    Records go into numbered segment files of at most segment_records records
+    each, so old segments are immutable and can be memory-mapped, copied or
+    archived while the current one grows. A partially written record at the end
+    of the last segment (crash mid-write) is truncated when the journal is opened.
+
+    fsync policy:
+        always: fsync after every record; nothing acknowledged is lost on a crash
+        interval: fsync when fsync_interval seconds have passed since the last one
+        never: leave flushing to the OS
+
+    One process should write to a journal directory at a time.
+    """
+
+    def __init__(self, journal_dir: str, fsync: str = 'interval', fsync_interval: float = 1.0,
+                 segment_records: int = 1_000_000):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {', '.join(FSYNC_POLICIES)}")
+        self.journal_dir = journal_dir
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.segment_records = segment_records
+        self._lock = threading.Lock()
+        self._fd = None
+        self._segment_index = 0
+        self._segment_count = 0
+        self._last_sync = time.monotonic()
+        self._unsynced = False
+        self._stats = {'appended': 0, 'errors': 0, 'fsyncs': 0}
+
+    def _open(self):
+        os.makedirs(self.journal_dir, exist_ok=True)
+        paths = segment_paths(self.journal_dir)
+        if not paths:
+            self._start_segment(1)
+            return
+        path = paths[-1]
+        self._segment_index = int(os.path.basename(path)[5:11])
+        fd = os.open(path, os.O_RDWR | os.O_APPEND)
+        size = os.fstat(fd).st_size
+        if size < HEADER.size:
+            os.close(fd)
+            os.remove(path)
+            self._start_segment(self._segment_index)
+            return
+        _check_header(path, os.pread(fd, HEADER.size, 0))
+        complete = (size - HEADER.size) // RECORD.size
+        if HEADER.size + complete * RECORD.size != size:
+            os.ftruncate(fd, HEADER.size + complete * RECORD.size)
+        self._fd = fd
+        self._segment_count = complete
+
+    def _start_segment(self, index: int):
+        if self._fd is not None:
+            os.fsync(self._fd)
+            os.close(self._fd)
+        path = os.path.join(self.journal_dir, _segment_name(index))
+        self._fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        os.write(self._fd, HEADER.pack(MAGIC, VERSION, RECORD.size))
+        os.fsync(self._fd)
+        self._segment_index = index
+        self._segment_count = 0
+
+    def append(self, bet_id: int, user_id: int, market_id: int, podd: Any, amount: Any, yes: bool,
+               created_at: Optional[int] = None):
+        """Append one committed bet. created_at defaults to now."""
+        record = encode_record(bet_id, user_id, market_id, podd, amount, yes,
+                               int(time.time()) if created_at is None else created_at)
+        with self._lock:
+            try:
+                if self._fd is None:
+                    self._open()
+                if self._segment_count >= self.segment_records:
+                    self._start_segment(self._segment_index + 1)
+                # One write() per record, so a crash leaves at most one partial record
+                os.write(self._fd, record)
+                self._segment_count += 1
+                self._stats['appended'] += 1
+                self._unsynced = True
+                if self.fsync == 'always' or (self.fsync == 'interval'
+                                              and time.monotonic() - self._last_sync >= self.fsync_interval):
+                    self._sync()
+            except OSError:
+                self._stats['errors'] += 1
+                raise
+
+    def _sync(self):
+        os.fsync(self._fd)
+        self._last_sync = time.monotonic()
+        self._unsynced = False
+        self._stats['fsyncs'] += 1
+
+    def flush(self):
+        with self._lock:
+            if self._fd is not None and self._unsynced:
+                self._sync()
+
+    def close(self):
+        with self._lock:
+            if self._fd is not None:
+                if self._unsynced:
+                    self._sync()
+                os.close(self._fd)
+                self._fd = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return dict(self._stats, journal_dir=self.journal_dir, fsync=self.fsync,
+                    segment=self._segment_index, segment_records=self._segment_count)
+
+def iter_segments(journal_dir: str) -> Iterator[np.ndarray]:
+    """
+    Yield each segment's records as a read-only memory map.
+
+    A trailing partial record (a write in progress) is left out.
+    """
+    for path in segment_paths(journal_dir):
+        size = os.path.getsize(path)
+        if size < HEADER.size:
+            continue
+        with open(path, 'rb') as f:
+            _check_header(path, f.read(HEADER.size))
+        count = (size - HEADER.size) // RECORD.size
+        if count:
+            yield np.memmap(path, dtype=RECORD_DTYPE, mode='r', offset=HEADER.size, shape=(count,))
+
+def read_journal(journal_dir: str) -> np.ndarray:
+    """All records in append order (copied out of the memory maps)"""
+    segments = list(iter_segments(journal_dir))
+    if not segments:
+        return np.zeros(0, dtype=RECORD_DTYPE)
+    return np.concatenate(segments)
+
+def corrupt_records(records: np.ndarray) -> np.ndarray:
+    """Indices of records whose checksum does not match"""
+    raw = records.view(np.uint8).reshape(-1, RECORD.size)
+    bad = [i for i in range(len(records))
+           if zlib.crc32(raw[i, :CHECKED_BYTES].tobytes()) != int(records['crc'][i])]
+    return np.array(bad, dtype=np.int64)
+
+def market_aggregates(records: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Per-market volume and odds, as maintained by the bet trigger and create_bet.
+
+    Returns:
+        Arrays indexed by position in 'market_id': volume, yes_volume, no_volume, podd
+        (yes share of volume, NaN for markets whose volume nets to zero)
+    """
+    market_ids, inverse = np.unique(records['market_id'], return_inverse=True)
+    amount = records['amount'] / 100.0
+    yes = records['yes'].astype(bool)
+    volume = np.bincount(inverse, weights=amount, minlength=len(market_ids))
+    yes_volume = np.bincount(inverse, weights=np.where(yes, amount, 0.0), minlength=len(market_ids))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        podd = np.where(volume > 0, yes_volume / volume, np.nan)
+    return {'market_id': market_ids, 'volume': volume, 'yes_volume': yes_volume,
+            'no_volume': volume - yes_volume, 'podd': podd}
+
+def position_aggregates(records: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Per (user, market, side) positions with the same arithmetic as
+    bets.get_user_holdings and the realized gains of bets.get_user_profits.
+
+    Returns:
+        Arrays indexed by position: user_id, market_id, yes, bought_units,
+        sold_units, net_units, bought_amount, sold_amount, total_invested,
+        realized_gains
+    """
+    keys = (records['user_id'].astype(np.uint64) << np.uint64(33)) \
+        | (records['market_id'].astype(np.uint64) << np.uint64(1)) | records['yes'].astype(np.uint64)
+    unique_keys, inverse = np.unique(keys, return_inverse=True)
+    count = len(unique_keys)
+
+    amount = records['amount'] / 100.0
+    podd = records['podd'] / 100.0
+    yes = records['yes'].astype(bool)
+    units = np.abs(amount) / np.where(yes, podd, 1.0 - podd)
+    buys = amount > 0
+    sells = amount < 0
+
+    bought_units = np.bincount(inverse, weights=np.where(buys, units, 0.0), minlength=count)
+    sold_units = np.bincount(inverse, weights=np.where(sells, units, 0.0), minlength=count)
+    bought_amount = np.bincount(inverse, weights=np.where(buys, amount, 0.0), minlength=count)
+    sold_amount = np.bincount(inverse, weights=np.where(sells, -amount, 0.0), minlength=count)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cost_per_unit = np.where(bought_units > 0, bought_amount / bought_units, 0.0)
+    total_invested = np.where(bought_units > 0, bought_amount - sold_units * cost_per_unit, 0.0)
+    realized_gains = np.where((sold_units > 0) & (bought_units > 0),
+                              sold_amount - sold_units * cost_per_unit, 0.0)
+
+    return {
+        'user_id': (unique_keys >> np.uint64(33)).astype(np.int64),
+        'market_id': ((unique_keys >> np.uint64(1)) & np.uint64(0xFFFFFFFF)).astype(np.int64),
+        'yes': (unique_keys & np.uint64(1)).astype(bool),
+        'bought_units': bought_units,
+        'sold_units': sold_units,
+        'net_units': bought_units - sold_units,
+        'bought_amount': bought_amount,
+        'sold_amount': sold_amount,
+        'total_invested': total_invested,
+        'realized_gains': realized_gains,
+    }
+
+def user_realized_gains(positions: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    user_ids, inverse = np.unique(positions['user_id'], return_inverse=True)
+    return {'user_id': user_ids,
+            'realized_gains': np.bincount(inverse, weights=positions['realized_gains'], minlength=len(user_ids))}
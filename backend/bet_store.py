@@ -0,0 +1,461 @@
+import time
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from bet_journal import to_hundredths, position_aggregates
+from fixed_point import CENTS, UNIT_SCALE, odds_bps_array, value_cents_array
+
+# Column name -> dtype. amount and podd are in hundredths, like the DECIMAL(_, 2) columns, so sums are exact.
+COLUMNS = {
+    'bet_id': np.int64,
+    'user_id': np.int32,
+    'market_id': np.int32,
+    'podd': np.int16,
+    'amount': np.int64,
+    'yes': np.bool_,
+    'created_at': np.int64,  # epoch seconds
+}
+
+# Derived columns accepted by aggregate(by=...)
+DERIVED_COLUMNS = {
+    'hour': lambda columns: columns['created_at'] // 3600 * 3600,
+    'day': lambda columns: columns['created_at'] // 86400 * 86400,
+}
+
+LOAD_BET_SQL = """
+    SELECT bId, uId, mId, CAST(ROUND(podd * 100) AS SIGNED), CAST(ROUND(amt * 100) AS SIGNED), yes,
+           COALESCE(UNIX_TIMESTAMP(createdAt), 0)
+    FROM bets WHERE bId > %s ORDER BY bId
+"""
+
+# Compared with the store on every sync, so a truncated or restored table is noticed
+TABLE_EXTENT_SQL = "SELECT COALESCE(MAX(bId), 0), COUNT(*) FROM bets"
+
+# Rows fetched per round trip while loading
+FETCH_ROWS = 50000
+
+# Ids of this many recent bets are remembered so a bet seen by both append() and sync() is stored once
+RECENT_IDS = 100000
+
+# A sync re-reads this many ids below the highest one seen, to pick up bets whose
+# transaction committed after a higher bId had already been stored
+SYNC_OVERLAP = 1000
+
+Where = Union[Dict[str, Any], Callable[[Dict[str, np.ndarray]], np.ndarray], None]
+
+
+class BetStore:
+    """
+    In-process columnar copy of the bets table for aggregate queries.
+
+    Bets are held in NumPy arrays (one per column in COLUMNS) that grow by
+    doubling. load() reads the table in bulk, append() adds a bet committed by
+    this process, and sync() pulls bets written by anything else (scripts, other
+    workers). Readers work on a snapshot of views of the first n rows, so they
+    never block appends.
+
+    Per-market YES/NO volume is kept up to date on every append, so odds
+    lookups are O(1); excluding one user's volume only reads that user's rows
+    through a by-user index.
+
+    If the table shrinks (TRUNCATE, a fixture restore) or a bet id turns up
+    below the ids the store has seen, the next sync() reloads it from scratch;
+    until then readers see ready == False and use SQL.
+    """
+
+    def __init__(self, initial_capacity: int = 1024):
+        self._lock = threading.Lock()
+        self._columns = {name: np.zeros(initial_capacity, dtype=dtype) for name, dtype in COLUMNS.items()}
+        self._size = 0
+        self._max_bet_id = 0
+        self._recent_ids = set()
+        self._recent_order = deque()
+        self._pending = []
+        self._loading = False
+        self._loaded = threading.Event()
+        self._reload_needed = False
+        # Per-market YES/NO volume in hundredths, indexed by market id
+        self._market_yes = np.zeros(0, dtype=np.int64)
+        self._market_no = np.zeros(0, dtype=np.int64)
+        # Rows [0, _indexed) sorted by user; later rows are scanned directly
+        self._index_lock = threading.Lock()
+        self._user_order = np.zeros(0, dtype=np.int64)
+        self._user_sorted = np.zeros(0, dtype=np.int32)
+        self._indexed = 0
+        self._stats = {'loaded': 0, 'appended': 0, 'synced': 0, 'reloads': 0, 'load_seconds': 0.0}
+
+    @property
+    def ready(self) -> bool:
+        return self._loaded.is_set()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def load(self, connection) -> int:
+        """
+        Read the whole bets table. Bets appended while loading are kept aside
+        and merged afterwards, so none is lost or stored twice.
+        """
+        start_time = time.perf_counter()
+        with self._lock:
+            # Start from empty, so a load retried after a failure does not store bets twice
+            self._size = 0
+            self._max_bet_id = 0
+            self._recent_ids.clear()
+            self._recent_order.clear()
+            self._loading = True
+        with self._index_lock:
+            self._user_order = np.zeros(0, dtype=np.int64)
+            self._user_sorted = np.zeros(0, dtype=np.int32)
+            self._indexed = 0
+        try:
+            count = self._read_from(connection, 0)
+        finally:
+            with self._lock:
+                self._loading = False
+                # The load read each bet once; remember the newest so later appends and syncs are deduplicated
+                recent = self._columns['bet_id'][max(0, self._size - RECENT_IDS):self._size]
+                for bet_id in recent[recent > self._max_bet_id - RECENT_IDS]:
+                    self._remember(int(bet_id))
+                pending, self._pending = self._pending, []
+                for row in pending:
+                    self._add(row)
+                self._rebuild_market_totals()
+        self._stats['loaded'] = count
+        self._stats['load_seconds'] = time.perf_counter() - start_time
+        self._loaded.set()
+        return count
+
+    def sync(self, connection) -> int:
+        """
+        Pull bets committed by other writers since the last load/sync, or reload
+        everything if the table was reset. Returns the number of bets added.
+        """
+        if not self.ready and not self._reload_needed:
+            return 0
+        if self._reload_needed or self._table_reset(connection):
+            # Readers fall back to SQL until the reload is done; a failed reload is retried by the next sync
+            self._reload_needed = True
+            self._loaded.clear()
+            added = self.load(connection)
+            self._reload_needed = False
+            self._stats['reloads'] += 1
+            return added
+        added = self._read_from(connection, max(0, self._max_bet_id - SYNC_OVERLAP))
+        self._stats['synced'] += added
+        return added
+
+    def _table_reset(self, connection) -> bool:
+        """Whether the table now has fewer bets, or a lower highest id, than the store"""
+        # Read before the query: every stored bet had committed by then, so a healthy table cannot be behind
+        with self._lock:
+            size, max_bet_id = self._size, self._max_bet_id
+        cursor = connection.cursor()
+        try:
+            cursor.execute(TABLE_EXTENT_SQL)
+            table_max_bet_id, table_count = cursor.fetchone()
+        finally:
+            cursor.close()
+        return int(table_max_bet_id) < max_bet_id or int(table_count) < size
+
+    def _read_from(self, connection, after_bet_id: int) -> int:
+        cursor = connection.cursor()
+        try:
+            cursor.execute(LOAD_BET_SQL, (after_bet_id,))
+            added = 0
+            while True:
+                rows = cursor.fetchmany(FETCH_ROWS)
+                if not rows:
+                    break
+                batch = np.array(rows, dtype=np.int64)
+                with self._lock:
+                    added += self._add_batch(batch)
+            return added
+        finally:
+            cursor.close()
+
+    def append(self, bet_id: int, user_id: int, market_id: int, podd: Any, amount: Any, yes: bool,
+               created_at: Optional[int] = None):
+        """Add a bet this process just committed"""
+        row = (bet_id, user_id, market_id, to_hundredths(podd), to_hundredths(amount), bool(yes),
+               int(time.time()) if created_at is None else created_at)
+        with self._lock:
+            if self._loading:
+                self._pending.append(row)
+                return
+            self._add(row)
+            self._stats['appended'] += 1
+
+    def _remember(self, bet_id: int) -> bool:
+        """Record bet_id as stored; False if it already was"""
+        if bet_id in self._recent_ids:
+            return False
+        if bet_id <= self._max_bet_id - RECENT_IDS:
+            # Syncs never re-read this far back and new bets get new ids, so the
+            # table's ids restarted; the bet is picked up by the reload
+            self._reload_needed = True
+            return False
+        self._recent_ids.add(bet_id)
+        self._recent_order.append(bet_id)
+        if len(self._recent_order) > RECENT_IDS:
+            self._recent_ids.discard(self._recent_order.popleft())
+        return True
+
+    def _reserve(self, extra: int):
+        needed = self._size + extra
+        capacity = len(self._columns['bet_id'])
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        # New arrays, so views handed out by snapshot() stay valid
+        for name, column in self._columns.items():
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[:self._size] = column[:self._size]
+            self._columns[name] = grown
+
+    def _add(self, row: Sequence[Any]):
+        if not self._remember(row[0]):
+            return
+        self._reserve(1)
+        i = self._size
+        for name, value in zip(COLUMNS, row):
+            self._columns[name][i] = value
+        self._size += 1
+        self._max_bet_id = max(self._max_bet_id, row[0])
+        if not self._loading:
+            self._add_to_market_totals(np.array([row[2]]), np.array([row[4]]), np.array([row[5]], dtype=bool))
+
+    def _add_batch(self, batch: np.ndarray) -> int:
+        if not self._loading:
+            keep = np.array([self._remember(int(bet_id)) for bet_id in batch[:, 0]], dtype=bool)
+            batch = batch[keep]
+        if not len(batch):
+            return 0
+        self._reserve(len(batch))
+        start, end = self._size, self._size + len(batch)
+        for position, name in enumerate(COLUMNS):
+            self._columns[name][start:end] = batch[:, position]
+        self._size = end
+        self._max_bet_id = max(self._max_bet_id, int(batch[:, 0].max()))
+        if not self._loading:
+            self._add_to_market_totals(batch[:, 2], batch[:, 4], batch[:, 5].astype(bool))
+        return len(batch)
+
+    def _grow_market_totals(self, max_market_id: int):
+        if max_market_id < len(self._market_yes):
+            return
+        size = max(max_market_id + 1, 2 * len(self._market_yes))
+        self._market_yes = np.concatenate([self._market_yes, np.zeros(size - len(self._market_yes), dtype=np.int64)])
+        self._market_no = np.concatenate([self._market_no, np.zeros(size - len(self._market_no), dtype=np.int64)])
+
+    def _add_to_market_totals(self, market_ids: np.ndarray, amounts: np.ndarray, yes: np.ndarray):
+        self._grow_market_totals(int(market_ids.max()))
+        np.add.at(self._market_yes, market_ids[yes], amounts[yes])
+        np.add.at(self._market_no, market_ids[~yes], amounts[~yes])
+
+    def _rebuild_market_totals(self):
+        columns = {name: column[:self._size] for name, column in self._columns.items()}
+        size = int(columns['market_id'].max()) + 1 if self._size else 0
+        yes = columns['yes']
+        self._market_yes = np.bincount(columns['market_id'][yes], weights=columns['amount'][yes],
+                                       minlength=size).astype(np.int64)
+        self._market_no = np.bincount(columns['market_id'][~yes], weights=columns['amount'][~yes],
+                                      minlength=size).astype(np.int64)
+
+    def snapshot(self) -> Dict[str, np.ndarray]:
+        """Views of every column over the bets stored so far"""
+        with self._lock:
+            return {name: column[:self._size] for name, column in self._columns.items()}
+
+    def _user_rows(self, user_id: int, columns: Dict[str, np.ndarray]) -> np.ndarray:
+        """Row positions of one user's bets within the snapshot"""
+        size = len(columns['user_id'])
+        with self._index_lock:
+            # Re-sort once the unindexed tail gets long; the sort is amortised over many lookups
+            if size - self._indexed > max(10000, self._indexed // 10):
+                self._user_order = np.argsort(columns['user_id'], kind='stable')
+                self._user_sorted = columns['user_id'][self._user_order]
+                self._indexed = size
+            order, sorted_users, indexed = self._user_order, self._user_sorted, self._indexed
+        if indexed > size:
+            # The index was built over a newer snapshot, whose positions this one may not have; scan it
+            return np.nonzero(columns['user_id'] == user_id)[0]
+        lo, hi = np.searchsorted(sorted_users, [user_id, user_id + 1])
+        tail = np.nonzero(columns['user_id'][indexed:] == user_id)[0] + indexed
+        return np.concatenate([order[lo:hi], tail])
+
+    def side_volumes(self, market_id: int, exclude_user_id: Optional[int] = None) -> Tuple[int, int]:
+        """
+        YES and NO volume of a market in cents, optionally without one user's bets
+        (the store's answer to markets.get_market_volume_distribution[_excluding_user]).
+        """
+        return self.side_volumes_many([market_id], exclude_user_id)[market_id]
+
+    def side_volumes_many(self, market_ids: Sequence[int],
+                          exclude_user_id: Optional[int] = None) -> Dict[int, Tuple[int, int]]:
+        """side_volumes for several markets, looking the excluded user's bets up once"""
+        market_ids = np.asarray(market_ids, dtype=np.int64)
+        with self._lock:
+            in_range = (market_ids >= 0) & (market_ids < len(self._market_yes))
+            yes_volume = np.zeros(len(market_ids), dtype=np.int64)
+            no_volume = np.zeros(len(market_ids), dtype=np.int64)
+            yes_volume[in_range] = self._market_yes[market_ids[in_range]]
+            no_volume[in_range] = self._market_no[market_ids[in_range]]
+            columns = {name: column[:self._size] for name, column in self._columns.items()}
+        if exclude_user_id is not None:
+            rows = self._user_rows(exclude_user_id, columns)
+            user_markets = columns['market_id'][rows]
+            user_yes = columns['yes'][rows]
+            user_amount = columns['amount'][rows]
+            for i, market_id in enumerate(market_ids.tolist()):
+                in_market = user_markets == market_id
+                yes_volume[i] -= user_amount[in_market & user_yes].sum()
+                no_volume[i] -= user_amount[in_market & ~user_yes].sum()
+        return {market_id: (yes, no)
+                for market_id, yes, no in zip(market_ids.tolist(), yes_volume.tolist(), no_volume.tolist())}
+
+    def user_bets(self, user_id: int) -> Dict[str, np.ndarray]:
+        columns = self.snapshot()
+        rows = np.sort(self._user_rows(user_id, columns))
+        return {name: column[rows] for name, column in columns.items()}
+
+    def aggregate(self, by: Union[str, Sequence[str]], value: str = 'amount', where: Where = None,
+                  since: Optional[int] = None, until: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """
+        Group-by sum and count over the stored bets.
+
+        Args:
+            by: Column name(s) to group on; 'hour' and 'day' bucket created_at
+            value: Column to sum; amount and podd are returned in units, not hundredths
+            where: {column: value or list of values}, or a function of the columns returning a mask
+            since, until: created_at bounds (epoch seconds, until exclusive)
+
+        Returns:
+            One array per group-by column, plus 'sum' and 'count', ordered by the group keys
+        """
+        by = (by,) if isinstance(by, str) else tuple(by)
+        columns = self.snapshot()
+        mask = np.ones(len(columns['bet_id']), dtype=bool)
+        if since is not None:
+            mask &= columns['created_at'] >= since
+        if until is not None:
+            mask &= columns['created_at'] < until
+        if callable(where):
+            mask &= where(columns)
+        elif where:
+            for name, wanted in where.items():
+                if isinstance(wanted, (list, tuple, set, np.ndarray)):
+                    mask &= np.isin(columns[name], list(wanted))
+                else:
+                    mask &= columns[name] == wanted
+
+        keys = [(DERIVED_COLUMNS[name](columns) if name in DERIVED_COLUMNS else columns[name])[mask] for name in by]
+        values = columns[value][mask].astype(np.float64)
+        if value in ('amount', 'podd'):
+            values /= 100.0
+
+        if not keys:
+            return {'sum': np.array([values.sum()]), 'count': np.array([len(values)])}
+        # Group on the combined key columns
+        stacked = np.column_stack([key.astype(np.int64) for key in keys]) if len(keys) > 1 else keys[0].astype(np.int64)
+        unique, inverse = np.unique(stacked, axis=0 if len(keys) > 1 else None, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        result = {}
+        for position, name in enumerate(by):
+            result[name] = unique[:, position] if len(keys) > 1 else unique
+        result['sum'] = np.bincount(inverse, weights=values, minlength=len(unique))
+        result['count'] = np.bincount(inverse, minlength=len(unique))
+        return result
+
+    def start_sync(self, get_connection: Callable, interval: float):
+        """Call sync() every interval seconds in a background thread"""
+        def run():
+            while True:
+                time.sleep(interval)
+                connection = get_connection()
+                if connection is None:
+                    continue
+                try:
+                    self.sync(connection)
+                except Exception as e:
+                    print(f"Bet store sync failed: {e}")
+                finally:
+                    connection.close()
+
+        threading.Thread(target=run, name='bet-store-sync', daemon=True).start()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return dict(self._stats, ready=self.ready, reload_needed=self._reload_needed, bets=self._size, max_bet_id=self._max_bet_id,
+                    bytes=sum(column.nbytes for column in self._columns.values()))
+
+
+def user_profits(columns: Dict[str, np.ndarray], users: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    The /api/user-profits leaderboard computed from a snapshot instead of
+    bets.get_user_profits plus one holdings and odds query per user.
+
+    Args:
+        columns: BetStore.snapshot()
+        users: Rows with uid, uname and current_balance for every user
+
+    Returns:
+        The rows of bets.get_user_profits (rank columns by realized gains) with
+        unrealized_gains, total_profits and percent_change added, sorted by total_profits
+    """
+    positions = position_aggregates(columns)
+    user_ids = positions['user_id']
+    market_ids = positions['market_id']
+
+    # Market totals, and each user's own signed volume per market side, for odds excluding that user.
+    # Volumes are in cents; bincount sums them as floats, exact below 2**53 cents.
+    size = int(market_ids.max()) + 1 if len(market_ids) else 0
+    net_cents = np.rint((positions['bought_amount'] - positions['sold_amount']) * CENTS).astype(np.int64)
+    yes_side = positions['yes']
+    market_yes = np.bincount(market_ids[yes_side], weights=net_cents[yes_side], minlength=size).astype(np.int64)
+    market_no = np.bincount(market_ids[~yes_side], weights=net_cents[~yes_side], minlength=size).astype(np.int64)
+    pairs, pair_index = np.unique(user_ids * (size + 1) + market_ids, return_inverse=True)
+    own_yes = np.bincount(pair_index, weights=np.where(yes_side, net_cents, 0), minlength=len(pairs)).astype(np.int64)
+    own_no = np.bincount(pair_index, weights=np.where(yes_side, 0, net_cents), minlength=len(pairs)).astype(np.int64)
+
+    realized = {}
+    for user_id, gains in zip(user_ids.tolist(), positions['realized_gains'].tolist()):
+        realized[user_id] = realized.get(user_id, 0.0) + gains
+
+    # Holdings are positions with more than dust left, as in bets.get_user_holdings; valued in integer cents
+    held = np.nonzero(positions['net_units'] > 0.01)[0]
+    held_markets, held_pairs = market_ids[held], pair_index[held]
+    odds = odds_bps_array(market_yes[held_markets] - own_yes[held_pairs], market_no[held_markets] - own_no[held_pairs])
+    units = np.rint(positions['net_units'][held] * UNIT_SCALE).astype(np.int64)
+    invested_cents = np.rint(positions['total_invested'][held] * CENTS).astype(np.int64)
+    gains_cents = value_cents_array(units, yes_side[held], odds) - invested_cents
+    held_users, user_index = np.unique(user_ids[held], return_inverse=True)
+    unrealized = dict(zip(held_users.tolist(), (np.bincount(user_index, weights=gains_cents, minlength=len(held_users))
+                                                 / CENTS).tolist()))
+    invested = dict(zip(held_users.tolist(), (np.bincount(user_index, weights=invested_cents, minlength=len(held_users))
+                                               / CENTS).tolist()))
+
+    results = [{'uid': user['uid'], 'uname': user['uname'], 'current_balance': float(user['current_balance']),
+                'realized_gains': realized.get(user['uid'], 0.0)} for user in users]
+
+    # Window columns of bets.get_user_profits, ordered by realized gains
+    results.sort(key=lambda row: row['realized_gains'], reverse=True)
+    running_total = 0.0
+    for position, row in enumerate(results):
+        running_total += row['realized_gains']
+        tied = position > 0 and row['realized_gains'] == results[position - 1]['realized_gains']
+        row['row_number'] = position + 1
+        row['rank'] = results[position - 1]['rank'] if tied else position + 1
+        row['running_total'] = running_total
+
+    for row in results:
+        row['unrealized_gains'] = unrealized.get(row['uid'], 0.0)
+        row['total_profits'] = row['realized_gains'] + row['unrealized_gains']
+        total_investment = invested.get(row['uid'], 0.0)
+        row['percent_change'] = (row['total_profits'] / total_investment) * 100 if total_investment > 0 else 0.0
+
+    results.sort(key=lambda row: row['total_profits'], reverse=True)
+    return results
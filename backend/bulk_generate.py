@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Scalable synthetic data generator for Polymarket clone
+
+Generates users, markets, bets and threaded comments at a chosen scale factor
+and bulk loads them. Scale 1 is 10,000 users, 500 markets, 200,000 bets and
+50,000 comments; everything grows linearly, so --scale 25 gives 250,000 users
+and 5 million bets.
+
+- Rows are generated in fixed-size chunks by a pool of worker processes. Each
+  chunk is seeded from (--seed, table, chunk number), so the output is the same
+  whatever the number of workers.
+- Ids are assigned explicitly (continuing after the current MAX id), so there is
+  no need to read back auto-increment values.
+- Passwords come from a small pool of hashes computed once up front. User k has
+  password 'password<k mod pool size>'.
+- Market volumes and odds are computed from the generated bets, and each
+  user's balance is their starting deposit minus what their bets spent. The
+  bet trigger is suspended while loading so it does not apply them twice;
+  trending scores and odds candles, whose triggers are suspended too, are
+  rebuilt afterwards.
+- Files are loaded with LOAD DATA LOCAL INFILE, or with multi-row INSERTs if the
+  server does not allow local files.
+
+Usage:
+    python3 bulk_generate.py --scale 1
+    python3 bulk_generate.py --scale 25 --workers 8 --seed 7 --reference-date 2025-06-01
+"""
+
+import os
+import time
+import shutil
+import tempfile
+import argparse
+from datetime import datetime, timedelta
+from multiprocessing import Pool
+from typing import Any, Dict, List
+
+import bcrypt
+import numpy as np
+import mysql.connector
+from mysql.connector import Error
+from dotenv import load_dotenv
+from bulk_load import BulkLoader, bulk_session, triggers_suspended, indexes_deferred, write_rows
+from market_math import odds_from_volumes
+from trending import rebuild as rebuild_trending
+from odds_rollups import rebuild as rebuild_odds_rollups
+
+load_dotenv()
+
+DB_CONFIG = {
+    'host': os.getenv('DB_HOST', '127.0.0.1'),
+    'user': os.getenv('DB_USER', 'polymarket'),
+    'password': os.getenv('DB_PASSWORD'),
+    'database': os.getenv('DB_DATABASE', 'polymarket')
+}
+
+# Rows per table at scale 1.0
+BASE_ROWS = {'users': 10000, 'markets': 500, 'bets': 200000, 'comments': 50000}
+
+# Rows generated (and written to one file) per task
+CHUNK_ROWS = 100000
+
+PASSWORD_POOL_SIZE = 8
+
+# Bets and comments fall within this many days before the reference date
+HISTORY_DAYS = 90
+
+TABLE_CODES = {'users': 1, 'markets': 2, 'bets': 3, 'comments': 4}
+
+COLUMNS = {
+    'users': ('uid', 'uname', 'passwordHash', 'email', 'phoneNumber', 'balance'),
+    'markets': ('mid', 'name', 'description', 'podd', 'volume', 'end_date'),
+    'bets': ('bId', 'uId', 'mId', 'podd', 'amt', 'yes', 'createdAt'),
+    'comments': ('cId', 'uId', 'mId', 'created_at', 'content'),
+    'isParentOf': ('pCId', 'cCId'),
+}
+
+TOPICS = ['election', 'inflation', 'championship', 'launch', 'merger', 'box office', 'rate cut', 'summit']
+COMMENT_WORDS = ['odds', 'volume', 'yes', 'no', 'undervalued', 'overpriced', 'news', 'momentum',
+                 'resolution', 'whales', 'sentiment', 'bullish', 'bearish', 'hedge']
+
+def get_db_connection():
+    try:
+        connection = mysql.connector.connect(allow_local_infile=True, **DB_CONFIG)
+        connection.autocommit = False
+        return connection
+    except Error as e:
+        print(f"Error connecting to MySQL: {e}")
+        return None
+
+def chunk_rng(seed: int, table: str, chunk: int) -> np.random.Generator:
+    return np.random.default_rng([seed, TABLE_CODES[table], chunk])
+
+def format_timestamps(reference: np.datetime64, seconds_before: np.ndarray) -> np.ndarray:
+    stamps = reference - seconds_before.astype('timedelta64[s]')
+    return np.char.replace(np.datetime_as_string(stamps, unit='s'), 'T', ' ')
+
+def market_base_odds(seed: int, num_markets: int) -> np.ndarray:
+    """Underlying YES probability of each market, which bettors lean towards"""
+    return chunk_rng(seed, 'markets', 0).uniform(0.05, 0.95, num_markets)
+
+def generate_bets(task: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Write one chunk of bets and return per-market YES/NO volume and per-user
+    spend so the parent can derive market volume, odds and balances without
+    re-reading the file.
+    """
+    rng = chunk_rng(task['seed'], 'bets', task['chunk'])
+    count = task['count']
+    num_users = task['num_users']
+    num_markets = task['num_markets']
+
+    # Skewed activity: low ids are the heavy bettors and the popular markets
+    user_index = (num_users * rng.random(count) ** 2).astype(np.int64)
+    market_index = (num_markets * rng.random(count) ** 3).astype(np.int64)
+    base_odds = market_base_odds(task['seed'], num_markets)[market_index]
+    odds = np.clip(np.round(base_odds + rng.uniform(-0.05, 0.05, count), 2), 0.01, 0.99)
+    amounts = np.round(np.clip(rng.lognormal(3.5, 1.0, count), 1, 5000), 2)
+    is_yes = rng.random(count) < odds
+    created = format_timestamps(task['reference'], rng.integers(0, HISTORY_DAYS * 86400, count))
+
+    bet_ids = np.arange(task['first_id'], task['first_id'] + count)
+    rows = zip(bet_ids.tolist(), (user_index + task['first_user_id']).tolist(),
+               (market_index + task['first_market_id']).tolist(),
+               [f"{value:.2f}" for value in odds], [f"{value:.2f}" for value in amounts],
+               is_yes.astype(np.int8).tolist(), created.tolist())
+    path = os.path.join(task['out_dir'], f"bets_{task['chunk']:05d}.tsv")
+    write_rows(path, rows)
+
+    return {
+        'path': path,
+        'rows': count,
+        'yes_volume': np.bincount(market_index, weights=amounts * is_yes, minlength=num_markets),
+        'no_volume': np.bincount(market_index, weights=amounts * ~is_yes, minlength=num_markets),
+        'spent_cents': np.bincount(user_index, weights=np.round(amounts * 100), minlength=num_users).astype(np.int64),
+    }
+
+def generate_comments(task: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Write one chunk of comments and their reply links. Replies point at an
+    earlier comment of the same chunk on the same market.
+    """
+    rng = chunk_rng(task['seed'], 'comments', task['chunk'])
+    count = task['count']
+    first_id = task['first_id']
+    num_markets = task['num_markets']
+
+    user_ids = (task['num_users'] * rng.random(count) ** 2).astype(np.int64) + task['first_user_id']
+    is_reply = rng.random(count) < 0.4
+    root_markets = (num_markets * rng.random(count) ** 3).astype(np.int64) + task['first_market_id']
+    offsets = np.sort(rng.integers(0, HISTORY_DAYS * 86400, count))[::-1]
+    created = format_timestamps(task['reference'], offsets)
+    word_picks = rng.integers(0, len(COMMENT_WORDS), (count, 6))
+
+    comment_rows = []
+    links = []
+    market_of = {}
+    roots: List[int] = []
+    for i in range(count):
+        comment_id = first_id + i
+        if is_reply[i] and roots:
+            parent_id = roots[int(rng.integers(0, len(roots)))]
+            market_id = market_of[parent_id]
+            links.append((parent_id, comment_id))
+        else:
+            market_id = int(root_markets[i])
+            roots.append(comment_id)
+        market_of[comment_id] = market_id
+        content = ' '.join(COMMENT_WORDS[j] for j in word_picks[i])
+        comment_rows.append((comment_id, int(user_ids[i]), market_id, created[i], content.capitalize() + '.'))
+
+    comments_path = os.path.join(task['out_dir'], f"comments_{task['chunk']:05d}.tsv")
+    links_path = os.path.join(task['out_dir'], f"isParentOf_{task['chunk']:05d}.tsv")
+    write_rows(comments_path, comment_rows)
+    write_rows(links_path, links)
+    return {'path': comments_path, 'links_path': links_path, 'rows': count, 'links': len(links)}
+
+def generate_users(seed: int, count: int, first_id: int, spent_cents: np.ndarray, password_hashes: List[str],
+                   out_dir: str) -> str:
+    rng = chunk_rng(seed, 'users', 0)
+    # Starting deposits; the low ids are the heavy bettors and deposit more
+    deposit_cents = np.round(np.where(np.arange(count) < count * 0.05,
+                                      rng.uniform(50000, 200000, count), rng.uniform(100, 10000, count)) * 100)
+    phones = rng.integers(1000000000, 9999999999, count)
+    # A user whose bets spent more than that deposited enough to cover them with some left over
+    reserve_cents = np.round(rng.uniform(10, 500, count) * 100)
+    deposit_cents = np.maximum(deposit_cents, spent_cents + reserve_cents).astype(np.int64)
+    # Balances are what is left after the generated bets
+    balances = (deposit_cents - spent_cents) / 100
+    path = os.path.join(out_dir, 'users.tsv')
+    write_rows(path, ((first_id + i, f"bulk{seed}_{first_id + i}", password_hashes[(first_id + i) % len(password_hashes)],
+                       f"bulk{seed}_{first_id + i}@example.com", f"+1{phones[i]}", f"{balances[i]:.2f}")
+                      for i in range(count)))
+    return path
+
+def generate_markets(seed: int, count: int, first_id: int, yes_volume: np.ndarray, no_volume: np.ndarray,
+                     reference: datetime, out_dir: str) -> str:
+    rng = chunk_rng(seed, 'markets', 1)
+    end_offsets = rng.integers(-30, 180, count)
+    topics = rng.integers(0, len(TOPICS), count)
+    rows = []
+    for i in range(count):
+        market_id = first_id + i
+        topic = TOPICS[topics[i]]
+        odds = odds_from_volumes(float(yes_volume[i]), float(no_volume[i]))
+        end_date = (reference + timedelta(days=int(end_offsets[i]))).strftime('%Y-%m-%d %H:%M:%S')
+        rows.append((market_id, f"Will the {topic} #{market_id} resolve YES?",
+                     f"Synthetic market {market_id} about the {topic}.", f"{odds:.2f}",
+                     f"{yes_volume[i] + no_volume[i]:.2f}", end_date))
+    path = os.path.join(out_dir, 'markets.tsv')
+    write_rows(path, rows)
+    return path
+
+def next_ids(cursor) -> Dict[str, int]:
+    ids = {}
+    for table, column in (('users', 'uid'), ('markets', 'mid'), ('bets', 'bId'), ('comments', 'cId')):
+        cursor.execute(f"SELECT COALESCE(MAX({column}), 0) + 1 FROM {table}")
+        ids[table] = cursor.fetchone()[0]
+    return ids
+
+def chunk_tasks(table: str, total: int, first_id: int, common: Dict[str, Any]) -> List[Dict[str, Any]]:
+    tasks = []
+    for chunk, start in enumerate(range(0, total, CHUNK_ROWS)):
+        tasks.append(dict(common, chunk=chunk, count=min(CHUNK_ROWS, total - start), first_id=first_id + start))
+    return tasks
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate and bulk load synthetic data at scale")
+    parser.add_argument('--scale', type=float, default=1.0, help="Multiplier on the scale-1 row counts")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 4, help="Generator processes")
+    parser.add_argument('--seed', type=int, default=348)
+    parser.add_argument('--reference-date', default=datetime.now().strftime('%Y-%m-%d'),
+                        help="Timestamps are generated relative to this date (YYYY-MM-DD)")
+    parser.add_argument('--out-dir', help="Keep the generated files here instead of a temporary directory")
+    parser.add_argument('--no-load-data', action='store_true', help="Use multi-row INSERTs instead of LOAD DATA")
+    args = parser.parse_args()
+
+    counts = {table: max(1, int(rows * args.scale)) for table, rows in BASE_ROWS.items()}
+    reference = datetime.strptime(args.reference_date, '%Y-%m-%d')
+    out_dir = args.out_dir or tempfile.mkdtemp(prefix='polymarket_bulk_')
+    os.makedirs(out_dir, exist_ok=True)
+
+    connection = get_db_connection()
+    if not connection:
+        return
+
+    start_time = time.time()
+    try:
+        cursor = connection.cursor()
+        ids = next_ids(cursor)
+        print(f"Generating {counts['users']} users, {counts['markets']} markets, {counts['bets']} bets, "
+              f"{counts['comments']} comments with {args.workers} workers (seed {args.seed})...")
+
+        common = {
+            'seed': args.seed,
+            'reference': np.datetime64(reference, 's'),
+            'out_dir': out_dir,
+            'num_users': counts['users'],
+            'num_markets': counts['markets'],
+            'first_user_id': ids['users'],
+            'first_market_id': ids['markets'],
+        }
+        generation_start = time.perf_counter()
+        with Pool(args.workers) as pool:
+            bet_results = pool.map(generate_bets, chunk_tasks('bets', counts['bets'], ids['bets'], common))
+            comment_results = pool.map(generate_comments, chunk_tasks('comments', counts['comments'], ids['comments'], common))
+
+        password_hashes = [bcrypt.hashpw(f"password{k}".encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+                           for k in range(PASSWORD_POOL_SIZE)]
+        yes_volume = sum(result['yes_volume'] for result in bet_results)
+        no_volume = sum(result['no_volume'] for result in bet_results)
+        spent_cents = sum(result['spent_cents'] for result in bet_results)
+        users_path = generate_users(args.seed, counts['users'], ids['users'], spent_cents, password_hashes, out_dir)
+        markets_path = generate_markets(args.seed, counts['markets'], ids['markets'], yes_volume, no_volume,
+                                        reference, out_dir)
+
+        generated = (counts['users'] + counts['markets'] + counts['bets'] + counts['comments']
+                     + sum(result['links'] for result in comment_results))
+        generation_time = time.perf_counter() - generation_start
+        print(f"Generated {generated} rows in {generation_time:.2f}s ({generated / generation_time:.0f} rows/sec)")
+
+        loader = BulkLoader(connection, use_load_data=not args.no_load_data)
+        load_start = time.perf_counter()
+        with bulk_session(cursor), triggers_suspended(cursor, ['bets', 'comments']), \
+                indexes_deferred(cursor, ['bets', 'comments', 'markets']):
+            loader.load_file('users', COLUMNS['users'], users_path)
+            loader.load_file('markets', COLUMNS['markets'], markets_path)
+            for result in bet_results:
+                loader.load_file('bets', COLUMNS['bets'], result['path'])
+            for result in comment_results:
+                loader.load_file('comments', COLUMNS['comments'], result['path'])
+                loader.load_file('isParentOf', COLUMNS['isParentOf'], result['links_path'])
+        connection.commit()
+        load_time = time.perf_counter() - load_start
+
+        # The trending and candle triggers were suspended with the rest, so recompute both once
+        print(f"Rebuilt trending scores for {rebuild_trending(connection)} markets")
+        print(f"Rebuilt {rebuild_odds_rollups(connection)} odds candles")
+
+        cursor.execute("ANALYZE TABLE users, markets, bets, comments, isParentOf")
+        cursor.fetchall()
+        cursor.close()
+
+        loader.report()
+        loaded = sum(int(totals['rows']) for totals in loader.stats.values())
+        print(f"\nLoaded {loaded} rows in {load_time:.2f}s including index rebuilds ({loaded / load_time:.0f} rows/sec)")
+        print(f"Total time: {time.time() - start_time:.2f}s")
+        print(f"Synthetic users log in as bulk{args.seed}_<uid> with password 'password<uid mod {PASSWORD_POOL_SIZE}>'")
+
+    except Exception as e:
+        print(f"Error generating data: {e}")
+        connection.rollback()
+        import traceback
+        traceback.print_exc()
+    finally:
+        connection.close()
+        if not args.out_dir:
+            shutil.rmtree(out_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""
+Helpers for loading large row sets into MySQL quickly.
+
+Used by the bulk data generator and the fixture snapshot/restore tool. Rows are
+written as tab-separated files in the default LOAD DATA format (backslash
+escapes, \\N for NULL) and go in through LOAD DATA LOCAL INFILE when the server
+allows it, or batched multi-row INSERTs otherwise. Triggers and secondary
+indexes can be taken out of the way while loading and put back afterwards.
+"""
+
+import re
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from mysql.connector import Error
+
+# ER_FK_COLUMN_CANNOT_DROP / ER_DROP_INDEX_FK: the index backs a foreign key and must stay
+INDEX_NEEDED_BY_FK = (1553, 1829)
+
+# Errors meaning LOAD DATA LOCAL is disabled on the client or the server
+LOCAL_INFILE_DISABLED = (1148, 2068, 3948)
+
+# Rows per INSERT statement in the fallback path
+INSERT_BATCH_ROWS = 5000
+
+NULL = '\\N'
+
+_ESCAPES = {'0': '\0', 'b': '\b', 'n': '\n', 'r': '\r', 't': '\t', 'Z': '\x1a', '\\': '\\'}
+_ESCAPE_SEQUENCE = re.compile(r'\\(.)')
+
+def format_value(value: Any) -> str:
+    """Render one field in LOAD DATA's default escaping"""
+    if value is None:
+        return NULL
+    if value is True or value is False:
+        return '1' if value else '0'
+    text = str(value)
+    if '\\' in text or '\t' in text or '\n' in text or '\r' in text or '\0' in text:
+        text = (text.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n')
+                .replace('\r', '\\r').replace('\0', '\\0'))
+    return text
+
+def parse_value(field: str) -> Optional[str]:
+    if field == NULL:
+        return None
+    if '\\' not in field:
+        return field
+    return _ESCAPE_SEQUENCE.sub(lambda match: _ESCAPES.get(match.group(1), match.group(1)), field)
+
+def write_rows(path: str, rows: Iterable[Sequence[Any]]) -> int:
+    """Write rows in the format load_file() reads. Returns the row count."""
+    count = 0
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        for row in rows:
+            f.write('\t'.join(format_value(value) for value in row))
+            f.write('\n')
+            count += 1
+    return count
+
+def read_rows(path: str) -> Iterator[List[Optional[str]]]:
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        for line in f:
+            yield [parse_value(field) for field in line.rstrip('\n').split('\t')]
+
+def count_rows(path: str) -> int:
+    with open(path, 'rb') as f:
+        return sum(chunk.count(b'\n') for chunk in iter(lambda: f.read(1 << 20), b''))
+
+def _load_data(cursor, table: str, columns: Sequence[str], path: str) -> int:
+    # The defaults (tab-separated, backslash escapes, newline-terminated) match write_rows
+    cursor.execute(f"""
+        LOAD DATA LOCAL INFILE %s INTO TABLE `{table}`
+        CHARACTER SET utf8mb4
+        ({', '.join(f'`{column}`' for column in columns)})
+    """, (path,))
+    return cursor.rowcount
+
+def _insert_batches(cursor, table: str, columns: Sequence[str], path: str) -> int:
+    # executemany rewrites a plain INSERT into one multi-row statement per batch
+    insert_sql = (f"INSERT INTO `{table}` ({', '.join(f'`{column}`' for column in columns)}) "
+                  f"VALUES ({', '.join(['%s'] * len(columns))})")
+    count = 0
+    batch = []
+    for row in read_rows(path):
+        batch.append(row)
+        if len(batch) >= INSERT_BATCH_ROWS:
+            cursor.executemany(insert_sql, batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        cursor.executemany(insert_sql, batch)
+        count += len(batch)
+    return count
+
+class BulkLoader:
+    """
+    Loads row files into tables, falling back from LOAD DATA LOCAL INFILE to
+    multi-row INSERTs the first time the server refuses local files.
+
+    The connection must be opened with allow_local_infile=True for LOAD DATA.
+    """
+
+    def __init__(self, connection, use_load_data: bool = True):
+        self.connection = connection
+        self.use_load_data = use_load_data
+        self.stats: Dict[str, Dict[str, float]] = {}
+
+    def load_file(self, table: str, columns: Sequence[str], path: str) -> int:
+        cursor = self.connection.cursor()
+        start_time = time.perf_counter()
+        try:
+            if self.use_load_data:
+                try:
+                    rows = _load_data(cursor, table, columns, path)
+                except Error as e:
+                    if e.errno not in LOCAL_INFILE_DISABLED:
+                        raise
+                    print(f"LOAD DATA LOCAL INFILE unavailable ({e}); using multi-row INSERTs")
+                    self.use_load_data = False
+                    rows = _insert_batches(cursor, table, columns, path)
+            else:
+                rows = _insert_batches(cursor, table, columns, path)
+            self.connection.commit()
+        finally:
+            cursor.close()
+
+        elapsed = time.perf_counter() - start_time
+        totals = self.stats.setdefault(table, {'rows': 0, 'seconds': 0.0})
+        totals['rows'] += rows
+        totals['seconds'] += elapsed
+        return rows
+
+    def report(self):
+        print(f"\n{'Table':<12} {'rows':>12} {'seconds':>9} {'rows/sec':>12}")
+        print('-' * 48)
+        for table, totals in self.stats.items():
+            rate = totals['rows'] / totals['seconds'] if totals['seconds'] else 0.0
+            print(f"{table:<12} {int(totals['rows']):>12} {totals['seconds']:>9.2f} {rate:>12.0f}")
+
+@contextmanager
+def bulk_session(cursor):
+    """Skip foreign key and unique checks for the session while loading trusted data"""
+    cursor.execute("SET SESSION foreign_key_checks = 0, unique_checks = 0")
+    try:
+        yield
+    finally:
+        cursor.execute("SET SESSION foreign_key_checks = 1, unique_checks = 1")
+
+@contextmanager
+def triggers_suspended(cursor, tables: Iterable[str]):
+    """
+    Drop the triggers on `tables` and recreate them afterwards.
+
+    Loaded rows already carry their derived values (balances, volumes), so
+    e.g. handleBetOnInsert must not fire for them.
+    """
+    tables = list(tables)
+    cursor.execute(f"""
+        SELECT TRIGGER_NAME, ACTION_TIMING, EVENT_MANIPULATION, EVENT_OBJECT_TABLE, ACTION_STATEMENT
+        FROM information_schema.TRIGGERS
+        WHERE TRIGGER_SCHEMA = DATABASE() AND EVENT_OBJECT_TABLE IN ({', '.join(['%s'] * len(tables))})
+        ORDER BY ACTION_ORDER
+    """, tables)
+    triggers = cursor.fetchall()
+    for name, _, _, _, _ in triggers:
+        cursor.execute(f"DROP TRIGGER `{name}`")
+    try:
+        yield [trigger[0] for trigger in triggers]
+    finally:
+        for name, timing, event, table, statement in triggers:
+            cursor.execute(f"CREATE TRIGGER `{name}` {timing} {event} ON `{table}` FOR EACH ROW {statement}")
+
+def secondary_indexes(cursor, table: str) -> Dict[str, Dict[str, Any]]:
+    """Non-primary indexes of a table as {name: {'columns': [...], 'unique': bool}}"""
+    cursor.execute("""
+        SELECT INDEX_NAME, COLUMN_NAME, NON_UNIQUE, SUB_PART
+        FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME <> 'PRIMARY'
+        ORDER BY INDEX_NAME, SEQ_IN_INDEX
+    """, (table,))
+    indexes = {}
+    for name, column, non_unique, sub_part in cursor.fetchall():
+        index = indexes.setdefault(name, {'columns': [], 'unique': not non_unique})
+        index['columns'].append(f"`{column}`({sub_part})" if sub_part else f"`{column}`")
+    return indexes
+
+@contextmanager
+def indexes_deferred(cursor, tables: Iterable[str]):
+    """
+    Drop the non-unique secondary indexes of `tables` and rebuild them after
+    loading, each table's indexes in a single ALTER TABLE.
+
+    Indexes that back a foreign key cannot be dropped and are left in place;
+    unique indexes stay too so constraints are never lost.
+    """
+    dropped: Dict[str, List[str]] = {}
+    for table in tables:
+        for name, index in secondary_indexes(cursor, table).items():
+            if index['unique']:
+                continue
+            try:
+                cursor.execute(f"ALTER TABLE `{table}` DROP INDEX `{name}`")
+            except Error as e:
+                if e.errno in INDEX_NEEDED_BY_FK:
+                    continue
+                raise
+            dropped.setdefault(table, []).append(f"ADD INDEX `{name}` ({', '.join(index['columns'])})")
+    try:
+        yield dropped
+    finally:
+        for table, clauses in dropped.items():
+            start_time = time.perf_counter()
+            cursor.execute(f"ALTER TABLE `{table}` {', '.join(clauses)}")
+            print(f"Rebuilt {len(clauses)} index(es) on {table} in {time.perf_counter() - start_time:.2f}s")
@@ -0,0 +1,114 @@
+import re
+import math
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Tuple
+
+# Bucket widths (seconds) stored in market_odds_rollups, finest first
+RESOLUTIONS = (60, 3600, 86400)
+
+INTERVAL_UNITS = {'m': 60, 'h': 3600, 'd': 86400, 'w': 7 * 86400}
+
+# Intervals a long range is widened to, so a response never exceeds the point limit
+DOWNSAMPLE_STEPS = (60, 300, 900, 1800, 3600, 2 * 3600, 4 * 3600, 6 * 3600, 12 * 3600,
+                    86400, 2 * 86400, 7 * 86400, 14 * 86400, 30 * 86400)
+
+_INTERVAL_PATTERN = re.compile(r'^(\d+)([mhdw])$')
+
+# Latest time a response can format (datetime's last second)
+MAX_TIME = int(datetime(9999, 12, 31, 23, 59, 59, tzinfo=timezone.utc).timestamp())
+
+def parse_interval(text: str) -> int:
+    """'15m', '1h', '1d', '1w' to seconds. Raises ValueError for anything else."""
+    match = _INTERVAL_PATTERN.match(text.strip().lower())
+    if not match or int(match.group(1)) == 0:
+        raise ValueError("interval must be a positive number of minutes, hours, days or weeks, e.g. 15m, 1h, 1d")
+    return int(match.group(1)) * INTERVAL_UNITS[match.group(2)]
+
+def format_interval(seconds: int) -> str:
+    for unit in ('w', 'd', 'h', 'm'):
+        if seconds % INTERVAL_UNITS[unit] == 0:
+            return f"{seconds // INTERVAL_UNITS[unit]}{unit}"
+    return f"{seconds}s"
+
+def parse_time(value: str) -> int:
+    """
+    Epoch seconds or an ISO-8601 timestamp (UTC unless it has an offset) to epoch
+    seconds. Raises ValueError for anything else or a time outside 1970..9999.
+    """
+    value = value.strip()
+    if value.isdigit():
+        seconds = int(value)
+    else:
+        try:
+            parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            raise ValueError(f"'{value}' is not epoch seconds or an ISO-8601 time")
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        seconds = int(parsed.timestamp())
+    if not 0 <= seconds <= MAX_TIME:
+        raise ValueError(f"'{value}' is outside the supported range (1970 to 9999)")
+    return seconds
+
+def plan_query(interval: int, start: int, end: int, max_points: int) -> Tuple[int, int]:
+    """
+    Pick the interval to return and the stored resolution to build it from.
+
+    The requested interval is kept while [start, end) spans at most max_points
+    of it; otherwise it is widened to the first multiple of it in
+    DOWNSAMPLE_STEPS that fits, or failing that to a multiple of both it and a
+    day. The resolution is the coarsest stored one that divides the interval,
+    so at most interval / resolution rows are read per point.
+
+    Returns:
+        (interval, resolution) in seconds
+    """
+    needed = -(-(end - start) // max_points)
+    if needed > interval:
+        wider = [step for step in DOWNSAMPLE_STEPS if step >= needed and step % interval == 0]
+        if wider:
+            interval = wider[0]
+        else:
+            step = math.lcm(interval, 86400)
+            interval = -(-needed // step) * step
+    resolution = max(r for r in RESOLUTIONS if interval % r == 0)
+    return interval, resolution
+
+def merge_candles(rows: Iterable[Dict[str, Any]], interval: int) -> List[Dict[str, Any]]:
+    """
+    Combine rollup rows (ordered by bucket_start) into candles `interval` seconds wide.
+
+    open and close come from the rows whose bets were earliest and latest, high
+    and low are the extremes, volumes and counts add up. Intervals without bets
+    are left out.
+    """
+    candles: List[Dict[str, Any]] = []
+    current = None
+    for row in rows:
+        bucket = row['bucket_start'] - row['bucket_start'] % interval
+        if current is None or current['bucket'] != bucket:
+            current = {'bucket': bucket, 'open': row['open'], 'high': row['high'], 'low': row['low'],
+                       'close': row['close'], 'open_ts': row['open_ts'], 'close_ts': row['close_ts'],
+                       'yes_volume': row['yes_volume'], 'no_volume': row['no_volume'], 'bet_count': row['bet_count']}
+            candles.append(current)
+            continue
+        if row['open_ts'] < current['open_ts']:
+            current['open'], current['open_ts'] = row['open'], row['open_ts']
+        if row['close_ts'] >= current['close_ts']:
+            current['close'], current['close_ts'] = row['close'], row['close_ts']
+        current['high'] = max(current['high'], row['high'])
+        current['low'] = min(current['low'], row['low'])
+        current['yes_volume'] += row['yes_volume']
+        current['no_volume'] += row['no_volume']
+        current['bet_count'] += row['bet_count']
+
+    return [{
+        'time': datetime.fromtimestamp(candle['bucket'], timezone.utc).isoformat(),
+        'open': float(candle['open']),
+        'high': float(candle['high']),
+        'low': float(candle['low']),
+        'close': float(candle['close']),
+        'yes_volume': float(candle['yes_volume']),
+        'no_volume': float(candle['no_volume']),
+        'bet_count': int(candle['bet_count']),
+    } for candle in candles]
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Polymarket Gamma /markets endpoint
+
+Serves a recorded or generated catalogue fixture with the same paging
+parameters (limit, offset) and conditional-request behaviour (ETag,
+Last-Modified, 304 Not Modified) as the real API, so catalogue_sync.py can be
+tested and benchmarked offline. The fixture file is re-read whenever it
+changes, so editing it between syncs simulates upstream updates.
+
+Usage:
+    python3 catalogue_stub.py generate fixtures/catalogue.json --markets 50000
+    python3 catalogue_stub.py record fixtures/catalogue.json --pages 20
+    python3 catalogue_stub.py serve fixtures/catalogue.json --port 8765
+    python3 catalogue_sync.py --base-url http://127.0.0.1:8765
+"""
+
+import os
+import json
+import random
+import hashlib
+import argparse
+import threading
+from datetime import datetime, timedelta, timezone
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+GAMMA_API_BASE = "https://gamma-api.polymarket.com"
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+TOPICS = ['election', 'inflation', 'championship', 'launch', 'merger', 'box office', 'rate cut', 'summit']
+
+class Catalogue:
+    """The fixture file, reloaded when its modification time changes"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._mtime = None
+        self.markets: List[Dict[str, Any]] = []
+
+    def current(self):
+        mtime = os.path.getmtime(self.path)
+        with self._lock:
+            if mtime != self._mtime:
+                with open(self.path) as f:
+                    self.markets = json.load(f)
+                self._mtime = mtime
+            return self.markets, self._mtime
+
+def make_handler(catalogue: Catalogue):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path != '/markets':
+                self.send_error(404)
+                return
+            query = parse_qs(url.query)
+            try:
+                limit = min(int(query.get('limit', [DEFAULT_LIMIT])[0]), MAX_LIMIT)
+                offset = int(query.get('offset', [0])[0])
+            except ValueError:
+                self.send_error(400, "limit and offset must be integers")
+                return
+
+            markets, mtime = catalogue.current()
+            body = json.dumps(markets[offset:offset + limit]).encode('utf-8')
+            etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+            last_modified = formatdate(mtime, usegmt=True)
+
+            if self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.send_header('Last-Modified', last_modified)
+                self.end_headers()
+                return
+
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('ETag', etag)
+            self.send_header('Last-Modified', last_modified)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+def generate_markets(count: int, seed: int) -> List[Dict[str, Any]]:
+    """Synthetic markets in the Gamma response format"""
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    markets = []
+    for market_id in range(1, count + 1):
+        price = round(rng.uniform(0.02, 0.98), 3)
+        topic = rng.choice(TOPICS)
+        markets.append({
+            'id': str(market_id),
+            'question': f"Will the {topic} #{market_id} resolve YES?",
+            'description': f"Recorded stand-in market {market_id} about the {topic}.",
+            'outcomePrices': json.dumps([str(price), str(round(1 - price, 3))]),
+            'endDate': (now + timedelta(days=rng.randint(-30, 365))).isoformat().replace('+00:00', 'Z'),
+            'updatedAt': now.isoformat().replace('+00:00', 'Z'),
+            'active': True,
+            'closed': False,
+        })
+    return markets
+
+def record_markets(pages: int, limit: int) -> List[Dict[str, Any]]:
+    """Page through the real Gamma API and return its markets"""
+    markets = []
+    for page in range(pages):
+        response = requests.get(f"{GAMMA_API_BASE}/markets",
+                                params={'limit': limit, 'offset': page * limit, 'order': 'id', 'ascending': 'true'},
+                                timeout=30)
+        response.raise_for_status()
+        batch = response.json()
+        markets.extend(batch)
+        print(f"Recorded page {page + 1}: {len(batch)} markets")
+        if len(batch) < limit:
+            break
+    return markets
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve, generate or record a Gamma /markets fixture")
+    parser.add_argument('command', choices=['serve', 'generate', 'record'])
+    parser.add_argument('fixture', help="Fixture JSON file")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--markets', type=int, default=50000, help="Markets to generate")
+    parser.add_argument('--seed', type=int, default=348)
+    parser.add_argument('--pages', type=int, default=10, help="Pages to record")
+    parser.add_argument('--limit', type=int, default=500, help="Page size when recording")
+    args = parser.parse_args()
+
+    if args.command == 'generate':
+        markets = generate_markets(args.markets, args.seed)
+    elif args.command == 'record':
+        markets = record_markets(args.pages, args.limit)
+    else:
+        server = ThreadingHTTPServer((args.host, args.port), make_handler(Catalogue(args.fixture)))
+        print(f"Serving {args.fixture} at http://{args.host}:{args.port}/markets")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        return
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.fixture)), exist_ok=True)
+    with open(args.fixture, 'w') as f:
+        json.dump(markets, f)
+    print(f"Wrote {len(markets)} markets to {args.fixture}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Incremental Polymarket catalogue sync
+
+Pages through the Gamma /markets listing and upserts markets keyed by their
+Polymarket id (markets.external_id), replacing the one-shot fetch in
+seed_database.py.
+
+- Each page is requested with the ETag / Last-Modified validators stored from
+  the previous sync (catalogue_sync_state), so unchanged pages come back as
+  304 Not Modified and are skipped without parsing.
+- For pages that did change, each market's content hash is compared with the
+  stored markets.external_hash and only new or changed markets are written,
+  one multi-row INSERT ... ON DUPLICATE KEY UPDATE per page.
+- A page's rows and its new validators are committed together, so an
+  interrupted sync resumes where it stopped.
+
+Local odds and volume are driven by bets on this site, so they are only taken
+from upstream when a market is first imported.
+
+Usage:
+    python3 catalogue_sync.py
+    python3 catalogue_sync.py --base-url http://127.0.0.1:8765 --page-size 1000
+    python3 catalogue_sync.py --full    # ignore stored validators and re-check every market
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+import mysql.connector
+from mysql.connector import Error
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DB_CONFIG = {
+    'host': os.getenv('DB_HOST', '127.0.0.1'),
+    'user': os.getenv('DB_USER', 'polymarket'),
+    'password': os.getenv('DB_PASSWORD'),
+    'database': os.getenv('DB_DATABASE', 'polymarket')
+}
+
+GAMMA_API_BASE = "https://gamma-api.polymarket.com"
+SOURCE = 'polymarket'
+DEFAULT_PAGE_SIZE = 500
+REQUEST_TIMEOUT = 30
+
+UPSERT_MARKETS_SQL = """
+    INSERT INTO markets (external_id, external_hash, name, description, podd, volume, end_date)
+    VALUES (%s, %s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        external_hash = VALUES(external_hash),
+        name = VALUES(name),
+        description = VALUES(description),
+        end_date = VALUES(end_date)
+"""
+
+SAVE_PAGE_STATE_SQL = """
+    INSERT INTO catalogue_sync_state (source, page_offset, etag, last_modified, row_count)
+    VALUES (%s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        etag = VALUES(etag),
+        last_modified = VALUES(last_modified),
+        row_count = VALUES(row_count)
+"""
+
+def get_db_connection():
+    try:
+        connection = mysql.connector.connect(**DB_CONFIG)
+        connection.autocommit = False
+        return connection
+    except Error as e:
+        print(f"Error connecting to MySQL: {e}")
+        return None
+
+def ensure_schema(cursor):
+    """Add the sync columns and state table to databases created before they existed"""
+    cursor.execute("""
+        SELECT COLUMN_NAME FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'markets'
+    """)
+    columns = {row[0].lower() for row in cursor.fetchall()}
+    if 'external_id' not in columns:
+        cursor.execute("""
+            ALTER TABLE markets
+                ADD COLUMN external_id VARCHAR(64) NULL,
+                ADD COLUMN external_hash CHAR(40) NULL,
+                ADD UNIQUE INDEX idx_markets_external_id (external_id)
+        """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS catalogue_sync_state (
+            source VARCHAR(32) NOT NULL,
+            page_offset INT NOT NULL,
+            etag VARCHAR(255),
+            last_modified VARCHAR(64),
+            row_count INT NOT NULL,
+            synced_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            PRIMARY KEY (source, page_offset)
+        )
+    """)
+
+def parse_odds(market: Dict[str, Any]) -> float:
+    """YES price from outcomePrices, clamped like the rest of the app; 0.50 if absent"""
+    prices = market.get('outcomePrices')
+    try:
+        if isinstance(prices, str):
+            prices = json.loads(prices)
+        if prices and len(prices) >= 2:
+            return round(min(0.99, max(0.01, float(prices[0]))), 2)
+    except (json.JSONDecodeError, ValueError, TypeError):
+        pass
+    return 0.50
+
+def parse_end_date(market: Dict[str, Any]) -> Optional[datetime]:
+    for field in ('endDate', 'end_date_iso', 'endDateIso'):
+        value = market.get(field)
+        if not value:
+            continue
+        try:
+            parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except (ValueError, AttributeError):
+            continue
+        return parsed.replace(tzinfo=None, microsecond=0)
+    return None
+
+def market_row(market: Dict[str, Any]) -> Optional[Tuple]:
+    """
+    Convert an upstream market to an upsert row, or None if it cannot be stored.
+
+    Returns:
+        (external_id, external_hash, name, description, podd, volume, end_date)
+    """
+    external_id = market.get('id')
+    name = market.get('question') or market.get('title')
+    end_date = parse_end_date(market)
+    if external_id is None or not name or end_date is None:
+        return None
+    name = name[:255]
+    description = market.get('description') or 'Market data from Polymarket'
+    content = json.dumps([name, description, end_date.isoformat()], ensure_ascii=False)
+    content_hash = hashlib.sha1(content.encode('utf-8')).hexdigest()
+    return (str(external_id), content_hash, name, description, parse_odds(market), 0.00, end_date)
+
+class CatalogueClient:
+    """Fetches catalogue pages with conditional requests"""
+
+    def __init__(self, base_url: str, page_size: int):
+        self.base_url = base_url.rstrip('/')
+        self.page_size = page_size
+        self.session = requests.Session()
+        self.requests = 0
+        self.not_modified = 0
+        self.bytes = 0
+
+    def fetch_page(self, offset: int, validators: Optional[Dict[str, Any]]) -> Tuple[Optional[List[Dict[str, Any]]], Dict[str, Any]]:
+        """
+        Returns:
+            (markets, validators): markets is None when the page is unchanged
+        """
+        headers = {}
+        if validators:
+            if validators.get('etag'):
+                headers['If-None-Match'] = validators['etag']
+            if validators.get('last_modified'):
+                headers['If-Modified-Since'] = validators['last_modified']
+        response = self.session.get(f"{self.base_url}/markets", headers=headers, timeout=REQUEST_TIMEOUT,
+                                    params={'limit': self.page_size, 'offset': offset,
+                                            'order': 'id', 'ascending': 'true'})
+        self.requests += 1
+        if response.status_code == 304:
+            self.not_modified += 1
+            return None, validators
+        response.raise_for_status()
+        self.bytes += len(response.content)
+        return response.json(), {'etag': response.headers.get('ETag'),
+                                 'last_modified': response.headers.get('Last-Modified')}
+
+def load_page_state(cursor, page_size: int) -> Dict[int, Dict[str, Any]]:
+    cursor.execute("""
+        SELECT page_offset, etag, last_modified, row_count FROM catalogue_sync_state WHERE source = %s
+    """, (SOURCE,))
+    state = {}
+    for offset, etag, last_modified, row_count in cursor.fetchall():
+        state[offset] = {'etag': etag, 'last_modified': last_modified, 'row_count': row_count}
+    # Validators from a sync with a different page size describe different pages
+    if state and any(offset % page_size for offset in state):
+        return {}
+    return state
+
+def changed_rows(cursor, rows: List[Tuple]) -> Tuple[List[Tuple], int]:
+    """
+    Drop rows whose stored content hash already matches.
+
+    Returns:
+        (rows to write, number of those that are new markets)
+    """
+    if not rows:
+        return [], 0
+    cursor.execute(f"""
+        SELECT external_id, external_hash FROM markets
+        WHERE external_id IN ({', '.join(['%s'] * len(rows))})
+    """, [row[0] for row in rows])
+    stored = dict(cursor.fetchall())
+    changed = [row for row in rows if stored.get(row[0]) != row[1]]
+    return changed, sum(1 for row in changed if row[0] not in stored)
+
+def sync(connection, client: CatalogueClient, full: bool = False) -> Dict[str, int]:
+    cursor = connection.cursor()
+    ensure_schema(cursor)
+    connection.commit()
+    page_state = {} if full else load_page_state(cursor, client.page_size)
+    if full:
+        cursor.execute("DELETE FROM catalogue_sync_state WHERE source = %s", (SOURCE,))
+        connection.commit()
+
+    totals = {'pages': 0, 'seen': 0, 'inserted': 0, 'updated': 0, 'unchanged': 0, 'skipped': 0}
+    offset = 0
+    try:
+        while True:
+            previous = page_state.get(offset)
+            markets, validators = client.fetch_page(offset, previous)
+            totals['pages'] += 1
+
+            if markets is None:
+                row_count = previous['row_count']
+                totals['seen'] += row_count
+                totals['unchanged'] += row_count
+            else:
+                row_count = len(markets)
+                rows = [market_row(market) for market in markets]
+                valid = [row for row in rows if row is not None]
+                changed, inserted = changed_rows(cursor, valid)
+                if changed:
+                    cursor.executemany(UPSERT_MARKETS_SQL, changed)
+                cursor.execute(SAVE_PAGE_STATE_SQL, (SOURCE, offset, validators.get('etag'),
+                                                     validators.get('last_modified'), row_count))
+                connection.commit()
+
+                totals['seen'] += row_count
+                totals['skipped'] += row_count - len(valid)
+                totals['inserted'] += inserted
+                totals['updated'] += len(changed) - inserted
+                totals['unchanged'] += len(valid) - len(changed)
+
+            if row_count < client.page_size:
+                break
+            offset += client.page_size
+
+        # The catalogue may have shrunk since the last sync
+        cursor.execute("DELETE FROM catalogue_sync_state WHERE source = %s AND page_offset > %s", (SOURCE, offset))
+        connection.commit()
+    except (Error, requests.exceptions.RequestException, ValueError):
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
+    return totals
+
+def main():
+    parser = argparse.ArgumentParser(description="Incrementally sync the Polymarket market catalogue")
+    parser.add_argument('--base-url', default=os.getenv('CATALOGUE_BASE_URL', GAMMA_API_BASE),
+                        help="Catalogue API base URL (e.g. a catalogue_stub.py server)")
+    parser.add_argument('--page-size', type=int, default=DEFAULT_PAGE_SIZE)
+    parser.add_argument('--full', action='store_true', help="Ignore stored page validators")
+    args = parser.parse_args()
+
+    connection = get_db_connection()
+    if not connection:
+        sys.exit(1)
+
+    client = CatalogueClient(args.base_url, args.page_size)
+    start_time = time.time()
+    try:
+        totals = sync(connection, client, full=args.full)
+    except (Error, requests.exceptions.RequestException, ValueError) as e:
+        print(f"Catalogue sync failed: {e}")
+        sys.exit(1)
+    finally:
+        connection.close()
+
+    elapsed = time.time() - start_time
+    print(f"Synced {totals['seen']} markets from {args.base_url} in {elapsed:.2f}s")
+    print(f"  pages: {totals['pages']} ({client.not_modified} not modified, {client.bytes / 1024:.0f} KiB downloaded)")
+    print(f"  inserted: {totals['inserted']}, updated: {totals['updated']}, "
+          f"unchanged: {totals['unchanged']}, skipped: {totals['skipped']}")
+
+if __name__ == "__main__":
+    main()
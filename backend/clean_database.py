@@ -2,6 +2,7 @@
 """
 Database Cleaner Script
 Removes all rows from all tables while preserving the table structure.
+Tables are emptied with TRUNCATE TABLE, which does not slow down as tables grow.
 """
 
 import mysql.connector
@@ -30,17 +31,44 @@ def get_db_connection():
         print(f"Error connecting to MySQL: {e}")
         return None
 
+# Tables in order of deletion (child tables first, then parent tables)
+TABLES = [
+    'catalogue_sync_state',  # Must be emptied with markets or the next sync skips every page
+    'market_trending',  # Child table for markets
+    'market_odds_rollups',  # Child table for markets
+    'isParentOf',    # Child table for comment relationships
+    'comments',      # Child table for markets and users
+    'bets',         # Child table for markets and users
+    'markets',      # Parent table
+    'users'         # Parent table
+]
+
+def truncate_tables(cursor, tables):
+    """
+    Empty the given tables with TRUNCATE TABLE and return their previous row counts.
+
+    TRUNCATE drops and recreates the table instead of deleting row by row, so it
+    takes the same time whatever the table size. It also resets AUTO_INCREMENT
+    and commits implicitly, so it cannot be rolled back.
+    """
+    row_counts = {}
+    # Tables added by later schema versions may not exist in older databases yet
+    cursor.execute("SELECT TABLE_NAME FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE()")
+    existing = {row[0].lower() for row in cursor.fetchall()}
+    cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+    try:
+        for table in tables:
+            if table.lower() not in existing:
+                continue
+            cursor.execute(f"SELECT COUNT(*) FROM {table}")
+            row_counts[table] = cursor.fetchone()[0]
+            cursor.execute(f"TRUNCATE TABLE {table}")
+    finally:
+        cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+    return row_counts
+
 def clean_database():
-    """Remove all rows from all tables in the correct order to respect foreign key constraints"""
-    
-    # Tables in order of deletion (child tables first, then parent tables)
-    tables = [
-        'isParentOf',    # Child table for comment relationships
-        'comments',      # Child table for markets and users
-        'bets',         # Child table for markets and users
-        'markets',      # Parent table
-        'users'         # Parent table
-    ]
+    """Remove all rows from all tables while preserving the table structure"""
     
     connection = get_db_connection()
     if not connection:
@@ -52,41 +80,22 @@ def clean_database():
     try:
         print("Starting database cleanup...")
         
-        # Disable foreign key checks temporarily to avoid constraint issues
-        cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
-        
-        total_rows_deleted = 0
+        try:
+            row_counts = truncate_tables(cursor, TABLES)
+        except Error as e:
+            print(f"✗ Error truncating tables: {e}")
+            return False
         
-        for table in tables:
-            try:
-                # Count rows before deletion
-                cursor.execute(f"SELECT COUNT(*) FROM {table}")
-                row_count = cursor.fetchone()[0]
-                
-                # Delete all rows from the table
-                cursor.execute(f"DELETE FROM {table}")
-                deleted_rows = cursor.rowcount
-                
-                print(f"✓ {table}: Deleted {deleted_rows} rows (was {row_count})")
-                total_rows_deleted += deleted_rows
-                
-            except Error as e:
-                print(f"✗ Error cleaning table {table}: {e}")
-                connection.rollback()
-                return False
-        
-        # Re-enable foreign key checks
-        cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
-        
-        # Commit all changes
-        connection.commit()
+        for table, row_count in row_counts.items():
+            print(f"✓ {table}: Truncated {row_count} rows")
+        total_rows_deleted = sum(row_counts.values())
         
         print(f"\n✅ Database cleanup completed successfully!")
         print(f"Total rows deleted: {total_rows_deleted}")
         
         # Verify all tables are empty
         print("\nVerifying cleanup...")
-        for table in tables:
+        for table in row_counts:
             cursor.execute(f"SELECT COUNT(*) FROM {table}")
             remaining_rows = cursor.fetchone()[0]
             if remaining_rows == 0:
@@ -98,7 +107,6 @@ def clean_database():
         
     except Error as e:
         print(f"Error during database cleanup: {e}")
-        connection.rollback()
         return False
     
     finally:
@@ -0,0 +1,220 @@
+import gzip
+import zlib
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Content-Encoding token -> compression level used for dynamic responses (fast settings, not maximum)
+DEFAULT_LEVELS = {'zstd': 3, 'br': 4, 'gzip': 6}
+
+# Server preference when the client accepts several encodings with the same q-value
+PREFERENCE = ('zstd', 'br', 'gzip')
+
+COMPRESSIBLE_MIMETYPES = ('application/json', 'application/javascript', 'image/svg+xml')
+
+def available_encodings() -> List[str]:
+    """Encodings whose library is installed, in preference order"""
+    installed = {'gzip': True, 'br': brotli is not None, 'zstd': zstandard is not None}
+    return [encoding for encoding in PREFERENCE if installed[encoding]]
+
+def parse_accept_encoding(header: Optional[str]) -> Dict[str, float]:
+    """Accept-Encoding to {token: q}; tokens with q=0 are kept so they can refuse a '*' match"""
+    accepted = {}
+    for part in (header or '').split(','):
+        token, _, params = part.strip().partition(';')
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[token] = q
+    return accepted
+
+def negotiate(header: Optional[str], encodings: Iterable[str]) -> Optional[str]:
+    """
+    Pick an encoding from `encodings` (in server preference order) for an
+    Accept-Encoding header, or None to send the body uncompressed.
+    """
+    accepted = parse_accept_encoding(header)
+    best, best_q = None, 0.0
+    for encoding in encodings:
+        q = accepted.get(encoding, accepted.get('x-gzip') if encoding == 'gzip' else None)
+        if q is None:
+            q = accepted.get('*', 0.0)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+def compress(data: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+    level = DEFAULT_LEVELS[encoding] if level is None else level
+    if encoding == 'gzip':
+        return gzip.compress(data, compresslevel=level, mtime=0)
+    if encoding == 'br':
+        return brotli.compress(data, quality=level)
+    if encoding == 'zstd':
+        return zstandard.ZstdCompressor(level=level).compress(data)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+def compress_stream(chunks: Iterable[bytes], encoding: str, level: Optional[int] = None) -> Iterator[bytes]:
+    """
+    Compress a streamed body chunk by chunk. Each chunk is flushed, so the
+    client can decode what has been sent so far.
+    """
+    level = DEFAULT_LEVELS[encoding] if level is None else level
+    if encoding == 'gzip':
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        process = lambda chunk: compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        finish = compressor.flush
+    elif encoding == 'br':
+        compressor = brotli.Compressor(quality=level)
+        process = lambda chunk: compressor.process(chunk) + compressor.flush()
+        finish = compressor.finish
+    elif encoding == 'zstd':
+        compressor = zstandard.ZstdCompressor(level=level).compressobj()
+        process = lambda chunk: compressor.compress(chunk) + compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+        finish = compressor.flush
+    else:
+        raise ValueError(f"Unsupported encoding: {encoding}")
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+        if chunk:
+            yield process(chunk)
+    yield finish()
+
+class CompressedCache:
+    """
+    LRU of compressed bodies keyed by a digest of the uncompressed body and the
+    encoding, bounded by total compressed bytes. Responses that repeat (a cached
+    or unchanged listing) are compressed once.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[Tuple[bytes, str], bytes]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple[bytes, str]) -> Optional[bytes]:
+        with self._lock:
+            body = self._entries.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def put(self, key: Tuple[bytes, str], body: bytes):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = body
+            self._bytes += len(body)
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self._bytes, 'hits': self.hits, 'misses': self.misses}
+
+class ResponseCompressor:
+    """
+    Compress Flask responses negotiated through Accept-Encoding.
+
+    JSON and text bodies of at least min_size bytes are compressed with the
+    best encoding the client accepts (zstd, br, gzip; the first two only when
+    their library is installed). Buffered bodies go through a CompressedCache;
+    streamed bodies are compressed as they are sent. Responses that already
+    have a Content-Encoding, or are file passthroughs, are left alone.
+
+    observer, if given, is called as observer(encoding, raw_bytes, sent_bytes)
+    for every buffered response that was compressed.
+    """
+
+    def __init__(self, min_size: int = 1024, encodings: Optional[Iterable[str]] = None,
+                 levels: Optional[Dict[str, int]] = None, cache_bytes: int = 16 * 1024 * 1024,
+                 observer: Optional[Callable[[str, int, int], None]] = None):
+        installed = available_encodings()
+        self.encodings = [encoding for encoding in (encodings or installed) if encoding in installed]
+        self.min_size = min_size
+        self.levels = dict(DEFAULT_LEVELS, **(levels or {}))
+        self.cache = CompressedCache(cache_bytes) if cache_bytes > 0 else None
+        self.observer = observer
+
+    def init_app(self, app):
+        app.after_request(self.compress_response)
+
+    def _compressible(self, response) -> bool:
+        if response.status_code < 200 or response.status_code in (204, 206, 304):
+            return False
+        if response.direct_passthrough or 'Content-Encoding' in response.headers:
+            return False
+        mimetype = response.mimetype or ''
+        return mimetype.startswith('text/') or mimetype in COMPRESSIBLE_MIMETYPES
+
+    def compress_response(self, response):
+        if not self.encodings or not self._compressible(response):
+            return response
+        response.vary.add('Accept-Encoding')
+        encoding = negotiate(request.headers.get('Accept-Encoding'), self.encodings)
+        if encoding is None:
+            return response
+
+        # Streamed bodies are compressed unless their declared length is already under the threshold
+        if response.is_streamed:
+            if response.content_length is not None and response.content_length < self.min_size:
+                return response
+            response.response = compress_stream(response.response, encoding, self.levels[encoding])
+            response.headers.pop('Content-Length', None)
+            response.headers['Content-Encoding'] = encoding
+            return response
+
+        body = response.get_data()
+        if len(body) < self.min_size:
+            return response
+        key = (hashlib.blake2b(body, digest_size=16).digest(), encoding)
+        compressed = self.cache.get(key) if self.cache else None
+        if compressed is None:
+            compressed = compress(body, encoding, self.levels[encoding])
+            if self.cache:
+                self.cache.put(key, compressed)
+        if len(compressed) >= len(body):
+            return response
+
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = encoding
+        if response.headers.get('ETag'):
+            # A different representation of the same resource needs a different strong validator
+            response.set_etag(f"{response.get_etag()[0]}-{encoding}")
+        if self.observer:
+            self.observer(encoding, len(body), len(compressed))
+        return response
+
+    def get_stats(self) -> Dict[str, object]:
+        return {'encodings': self.encodings, 'min_size': self.min_size,
+                'cache': self.cache.get_stats() if self.cache else None}
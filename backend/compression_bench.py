@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Bytes-on-wire and CPU cost of response compression per route.
+
+Builds fixed-seed payloads shaped like the largest responses (a market's bets,
+a user's bet history, the profits leaderboard and a comment thread), encodes
+them with the app's JSON provider and compresses each with every installed
+encoding at a fast, the default and a high level. Reports the compressed size,
+ratio and best-of-N compression time, so the level can be picked per
+deployment (CPU-bound server or slow client links).
+
+No database is needed.
+
+Usage:
+    python3 compression_bench.py
+    python3 compression_bench.py --scale 4 --repeats 10     # payloads 4x larger
+"""
+
+import time
+import random
+import argparse
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Any, Callable, Dict
+
+from flask import Flask
+from serializer import FastJSONProvider
+from compression import DEFAULT_LEVELS, available_encodings, compress
+
+SEED = 348
+
+# Levels tried per encoding: fast, the default used by ResponseCompressor, high
+LEVELS = {'gzip': (1, DEFAULT_LEVELS['gzip'], 9), 'br': (1, DEFAULT_LEVELS['br'], 11),
+          'zstd': (1, DEFAULT_LEVELS['zstd'], 19)}
+
+MARKET_NAMES = ["Will the Fed cut rates in December?", "Bitcoin above $100k by year end?",
+                "Will it snow in Toronto on Christmas?", "Who wins the next election?"]
+
+def _created(rng: random.Random) -> datetime:
+    return datetime(2025, 1, 1) + timedelta(seconds=rng.randrange(365 * 24 * 3600))
+
+def market_bets(rng: random.Random, count: int) -> Dict[str, Any]:
+    """GET /markets/<id>/bets"""
+    bets = [{'bId': i, 'uId': rng.randrange(500), 'mId': 7, 'podd': Decimal(f"{rng.uniform(0.01, 0.99):.2f}"),
+             'amt': Decimal(f"{rng.uniform(-50, 500):.2f}"), 'yes': rng.randrange(2), 'createdAt': _created(rng),
+             'uname': f"trader_{rng.randrange(500)}"} for i in range(count)]
+    return {'success': True, 'market_id': 7, 'bets': bets, 'count': count}
+
+def user_bets(rng: random.Random, count: int) -> Dict[str, Any]:
+    """GET /api/user-bets"""
+    bets = []
+    for i in range(count):
+        market_id = rng.randrange(len(MARKET_NAMES))
+        bets.append({'bId': i, 'mId': market_id, 'market_name': MARKET_NAMES[market_id],
+                     'podd': Decimal(f"{rng.uniform(0.01, 0.99):.2f}"), 'amt': Decimal(f"{rng.uniform(-50, 500):.2f}"),
+                     'yes': rng.randrange(2), 'createdAt': _created(rng)})
+    return {'success': True, 'bets': bets, 'count': count}
+
+def leaderboard(rng: random.Random, count: int) -> Dict[str, Any]:
+    """GET /api/user-profits"""
+    users = []
+    for i in range(count):
+        realized, unrealized = rng.uniform(-500, 500), rng.uniform(-500, 500)
+        users.append({'uid': i, 'uname': f"trader_{i}", 'current_balance': round(rng.uniform(0, 10000), 2),
+                      'realized_gains': realized, 'unrealized_gains': unrealized, 'total_profits': realized + unrealized,
+                      'percent_change': rng.uniform(-100, 100)})
+    return {'success': True, 'users': users}
+
+def comment_thread(rng: random.Random, count: int) -> Dict[str, Any]:
+    """GET /markets/<id>/comments"""
+    comments = [{'cId': i, 'content': rng.choice(["Agreed, the odds look too low.", "Selling my YES position here.",
+                                                  "Source? This seems unlikely to resolve YES."]),
+                 'created_at': _created(rng), 'uId': rng.randrange(200), 'uname': f"trader_{rng.randrange(200)}",
+                 'parent_id': rng.randrange(i) if i and rng.random() < 0.6 else None, 'level': rng.randrange(4)}
+                for i in range(count)]
+    return {'success': True, 'market_id': 7, 'comments': comments, 'count': count}
+
+ROUTES: Dict[str, tuple] = {
+    '/markets/<id>/bets': (market_bets, 5000),
+    '/api/user-bets': (user_bets, 2000),
+    '/api/user-profits': (leaderboard, 2000),
+    '/markets/<id>/comments': (comment_thread, 1000),
+}
+
+def best_time(fn: Callable[[], Any], repeats: int) -> float:
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure compressed size and CPU time per route payload")
+    parser.add_argument('--scale', type=float, default=1.0, help="Multiply every payload's row count")
+    parser.add_argument('--repeats', type=int, default=5, help="Timed repeats per encoding and level")
+    args = parser.parse_args()
+
+    provider = FastJSONProvider(Flask(__name__))
+    encodings = available_encodings()
+    print(f"JSON encoder: {provider.encoder}; encodings: {', '.join(encodings)} "
+          f"(install brotli / zstandard for br / zstd)")
+
+    for route, (build, rows) in ROUTES.items():
+        count = max(1, int(rows * args.scale))
+        payload = build(random.Random(SEED), count)
+        body = provider.dumps(payload).encode('utf-8')
+        encode_time = best_time(lambda: provider.dumps(payload), args.repeats)
+        print(f"\n{route}: {count} rows, {len(body) / 1024:.1f} KiB uncompressed")
+        # 'vs JSON' is compression time as a share of the time taken to encode the payload as JSON
+        print(f"  {'encoding':<10} {'level':>5} {'sent KiB':>10} {'ratio':>7} {'ms':>8} {'MiB/s':>8} {'vs JSON':>9}")
+        for encoding in encodings:
+            for level in LEVELS[encoding]:
+                seconds = best_time(lambda: compress(body, encoding, level), args.repeats)
+                sent = len(compress(body, encoding, level))
+                print(f"  {encoding:<10} {level:>5} {sent / 1024:>10.1f} {len(body) / sent:>6.1f}x "
+                      f"{seconds * 1000:>8.2f} {len(body) / seconds / 2 ** 20:>8.1f} "
+                      f"{seconds / encode_time * 100:>8.0f}%")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+import math
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from typing import Any, List, Sequence
+
+import numpy as np
+
+# Integer scales: money in cents (DECIMAL(15, 2)), odds in basis points, position units
+# (amount / price) in millionths, the scale MySQL gives amt / podd
+CENTS = 100
+BASIS_POINTS = 10000
+UNIT_SCALE = 1000000
+
+# Odds move in whole percent (markets.podd and bets.podd are DECIMAL(3, 2)) and stay within 1..99%
+ODDS_STEP_BPS = 100
+MIN_ODDS_BPS = 100
+MAX_ODDS_BPS = 9900
+EVEN_ODDS_BPS = 5000
+
+# Added to both sides (1.00) so a market with little volume does not swing to extreme odds
+SMOOTHING_CENTS = 100
+
+# units * price must stay within int64 in the array kernels
+MAX_ARRAY_UNITS = np.iinfo(np.int64).max // BASIS_POINTS
+
+# A float n / scale compares equal to exactly one decimal with that many places below this
+_EXACT_FLOAT_LIMIT = 2 ** 50
+
+def to_fixed(value: Any, scale: int) -> int:
+    """
+    Scale a Decimal, int, float or numeric string to an integer, rounding half
+    away from zero as a DECIMAL column does.
+
+    Floats are taken as the decimal they print as (0.1 is 1/10, not the binary
+    fraction just above it), the way the connector sends them to MySQL.
+    """
+    if isinstance(value, int):
+        return value * scale
+    if isinstance(value, float):
+        if not math.isfinite(value):
+            raise ValueError(f"'{value}' is not a finite number")
+        scaled = round(value * scale)
+        # Most floats are a short decimal already; only ties and long fractions need Decimal
+        if abs(scaled) < _EXACT_FLOAT_LIMIT and scaled / scale == value:
+            return scaled
+        value = Decimal(repr(value))
+    elif not isinstance(value, Decimal):
+        try:
+            value = Decimal(str(value).strip())
+        except InvalidOperation:
+            raise ValueError(f"'{value}' is not a number")
+    if not value.is_finite():
+        raise ValueError(f"'{value}' is not a finite number")
+    return int((value * scale).to_integral_value(rounding=ROUND_HALF_UP))
+
+def to_cents(value: Any) -> int:
+    return to_fixed(value, CENTS)
+
+def to_bps(value: Any) -> int:
+    return to_fixed(value, BASIS_POINTS)
+
+def to_units(value: Any) -> int:
+    return to_fixed(value, UNIT_SCALE)
+
+def from_fixed(value: int, scale: int) -> Decimal:
+    """The exact Decimal of a scaled integer, e.g. from_fixed(1234, CENTS) == Decimal('12.34')"""
+    return Decimal(value) / scale
+
+def div_round(numerator: int, denominator: int) -> int:
+    """numerator / denominator rounded half away from zero, without going through a float"""
+    quotient, remainder = divmod(abs(numerator), abs(denominator))
+    if 2 * remainder >= abs(denominator):
+        quotient += 1
+    return -quotient if (numerator < 0) != (denominator < 0) else quotient
+
+def div_round_array(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    """div_round over int64 arrays; zero denominators give 0"""
+    numerator = np.asarray(numerator, dtype=np.int64)
+    denominator = np.asarray(denominator, dtype=np.int64)
+    divisor = np.abs(denominator)
+    safe = np.where(divisor == 0, 1, divisor)
+    quotient, remainder = np.divmod(np.abs(numerator), safe)
+    quotient += 2 * remainder >= safe
+    quotient = np.where((numerator < 0) != (denominator < 0), -quotient, quotient)
+    return np.where(divisor == 0, 0, quotient)
+
+def odds_bps(yes_cents: int, no_cents: int) -> int:
+    """
+    Probability of YES implied by the volume on each side, in basis points.
+
+    A market with no volume sits at 50%; otherwise the smoothed share of YES
+    volume is rounded to a whole percent and clamped to [MIN_ODDS_BPS, MAX_ODDS_BPS].
+    """
+    total_cents = yes_cents + no_cents
+    if total_cents == 0:
+        return EVEN_ODDS_BPS
+    percent = div_round((yes_cents + SMOOTHING_CENTS) * (BASIS_POINTS // ODDS_STEP_BPS),
+                        total_cents + 2 * SMOOTHING_CENTS)
+    return max(MIN_ODDS_BPS, min(MAX_ODDS_BPS, percent * ODDS_STEP_BPS))
+
+def odds_bps_array(yes_cents: np.ndarray, no_cents: np.ndarray) -> np.ndarray:
+    """odds_bps for arrays of market volumes"""
+    yes_cents = np.asarray(yes_cents, dtype=np.int64)
+    total_cents = yes_cents + np.asarray(no_cents, dtype=np.int64)
+    percent = div_round_array((yes_cents + SMOOTHING_CENTS) * (BASIS_POINTS // ODDS_STEP_BPS),
+                              total_cents + 2 * SMOOTHING_CENTS)
+    odds = np.clip(percent * ODDS_STEP_BPS, MIN_ODDS_BPS, MAX_ODDS_BPS)
+    return np.where(total_cents == 0, EVEN_ODDS_BPS, odds)
+
+def units_from_amount(amount_cents: int, price_bps: int) -> int:
+    """Units (in millionths) an amount buys at a price, amount / price"""
+    return div_round(amount_cents * UNIT_SCALE * BASIS_POINTS, price_bps * CENTS)
+
+def value_cents(units: int, is_yes: bool, odds: int) -> int:
+    """Market value in cents of units (millionths) at odds (bps): YES units pay at the odds, NO units at 1 - odds"""
+    price = odds if is_yes else BASIS_POINTS - odds
+    return div_round(units * price, UNIT_SCALE * BASIS_POINTS // CENTS)
+
+def value_cents_array(units: np.ndarray, is_yes: np.ndarray, odds: np.ndarray) -> np.ndarray:
+    """
+    value_cents over int64 arrays of positions.
+
+    Raises:
+        OverflowError: if a position is too large for int64 arithmetic (over ~922 million units)
+    """
+    units = np.asarray(units, dtype=np.int64)
+    if len(units) and int(np.abs(units).max()) > MAX_ARRAY_UNITS:
+        raise OverflowError("Position too large for int64 valuation; use value_cents")
+    odds = np.asarray(odds, dtype=np.int64)
+    price = np.where(np.asarray(is_yes, dtype=bool), odds, BASIS_POINTS - odds)
+    return div_round_array(units * price, UNIT_SCALE * BASIS_POINTS // CENTS)
+
+def allocate_cents(pool_cents: int, weights: Sequence[int]) -> List[int]:
+    """
+    Split pool_cents in proportion to non-negative integer weights so the parts
+    add up to exactly pool_cents.
+
+    Each weight gets floor(weight * pool / total weight); the cents left over
+    go one each to the largest remainders, ties to the earlier weight. The
+    same rule is used by the resolve_markets procedure.
+    """
+    weights = [int(weight) for weight in weights]
+    total = sum(weights)
+    if total <= 0 or pool_cents <= 0:
+        return [0] * len(weights)
+    shares = [divmod(weight * pool_cents, total) for weight in weights]
+    parts = [share for share, _ in shares]
+    leftover = pool_cents - sum(parts)
+    for i in sorted(range(len(weights)), key=lambda i: -shares[i][1])[:leftover]:
+        parts[i] += 1
+    return parts
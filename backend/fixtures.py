@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Database fixture snapshot and restore
+
+Snapshot a populated database once and reset to it between benchmark runs in
+seconds, instead of cleaning it and re-running the populate scripts.
+
+A snapshot is a directory with one gzip-compressed tab-separated file per table
+and a manifest.json recording columns and row counts. Restore truncates the
+tables, bulk loads the files with triggers suspended and secondary indexes
+dropped, rebuilds the indexes and checks every table's row count against the
+manifest.
+
+Usage:
+    python3 fixtures.py snapshot fixtures/scale25
+    python3 fixtures.py restore fixtures/scale25
+    python3 fixtures.py verify fixtures/scale25
+"""
+
+import os
+import sys
+import gzip
+import json
+import time
+import shutil
+import tempfile
+import argparse
+from datetime import datetime
+from typing import Any, Dict, List
+
+import mysql.connector
+from mysql.connector import Error
+from dotenv import load_dotenv
+from bulk_load import BulkLoader, bulk_session, triggers_suspended, indexes_deferred, write_rows, count_rows
+from clean_database import TABLES, truncate_tables
+
+load_dotenv()
+
+DB_CONFIG = {
+    'host': os.getenv('DB_HOST', '127.0.0.1'),
+    'user': os.getenv('DB_USER', 'polymarket'),
+    'password': os.getenv('DB_PASSWORD'),
+    'database': os.getenv('DB_DATABASE', 'polymarket')
+}
+
+MANIFEST_FILE = 'manifest.json'
+MANIFEST_VERSION = 1
+
+# Rows fetched per round trip while dumping
+FETCH_ROWS = 10000
+
+def get_db_connection():
+    try:
+        connection = mysql.connector.connect(allow_local_infile=True, **DB_CONFIG)
+        connection.autocommit = False
+        return connection
+    except Error as e:
+        print(f"Error connecting to MySQL: {e}")
+        return None
+
+def load_order() -> List[str]:
+    """Parent tables first, i.e. the reverse of the clean_database deletion order"""
+    return list(reversed(TABLES))
+
+def table_columns(cursor, table: str) -> List[str]:
+    # Generated columns cannot be loaded, they are recomputed
+    cursor.execute("""
+        SELECT COLUMN_NAME FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND EXTRA NOT LIKE '%%GENERATED%%'
+        ORDER BY ORDINAL_POSITION
+    """, (table,))
+    return [row[0] for row in cursor.fetchall()]
+
+def _stream_rows(cursor):
+    while True:
+        rows = cursor.fetchmany(FETCH_ROWS)
+        if not rows:
+            return
+        yield from rows
+
+def snapshot(connection, out_dir: str) -> Dict[str, Any]:
+    """Dump every table to out_dir and write the manifest. Returns the manifest."""
+    os.makedirs(out_dir, exist_ok=True)
+    cursor = connection.cursor()
+    # One consistent read view across all tables
+    connection.start_transaction(consistent_snapshot=True, readonly=True)
+    manifest = {'version': MANIFEST_VERSION, 'created_at': datetime.now().isoformat(timespec='seconds'),
+                'database': DB_CONFIG['database'], 'tables': []}
+    try:
+        for table in load_order():
+            start_time = time.perf_counter()
+            columns = table_columns(cursor, table)
+            if not columns:
+                continue
+            path = os.path.join(out_dir, f"{table}.tsv")
+            # Unbuffered, so rows stream to the file; a full scan returns them in primary key
+            # order, which is also the fastest order to load them back in
+            stream = connection.cursor()
+            stream.execute(f"SELECT {', '.join(f'`{column}`' for column in columns)} FROM `{table}`")
+            rows = write_rows(path, _stream_rows(stream))
+            stream.close()
+
+            with open(path, 'rb') as source, gzip.open(path + '.gz', 'wb', compresslevel=1) as target:
+                shutil.copyfileobj(source, target, 1 << 20)
+            os.remove(path)
+
+            manifest['tables'].append({'name': table, 'columns': columns, 'rows': rows, 'file': f"{table}.tsv.gz"})
+            print(f"✓ {table}: {rows} rows in {time.perf_counter() - start_time:.2f}s")
+        connection.commit()
+    finally:
+        cursor.close()
+
+    with open(os.path.join(out_dir, MANIFEST_FILE), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+def read_manifest(snapshot_dir: str) -> Dict[str, Any]:
+    with open(os.path.join(snapshot_dir, MANIFEST_FILE)) as f:
+        manifest = json.load(f)
+    if manifest.get('version') != MANIFEST_VERSION:
+        raise ValueError(f"Unsupported snapshot version {manifest.get('version')}")
+    return manifest
+
+def verify_counts(connection, manifest: Dict[str, Any]) -> List[str]:
+    """Compare live row counts with the manifest. Returns one message per mismatch."""
+    cursor = connection.cursor()
+    mismatches = []
+    for entry in manifest['tables']:
+        cursor.execute(f"SELECT COUNT(*) FROM `{entry['name']}`")
+        actual = cursor.fetchone()[0]
+        if actual != entry['rows']:
+            mismatches.append(f"{entry['name']}: expected {entry['rows']} rows, found {actual}")
+    cursor.close()
+    return mismatches
+
+def restore(connection, snapshot_dir: str, use_load_data: bool = True) -> List[str]:
+    """
+    Replace the contents of the snapshot's tables with the snapshot.
+
+    Returns the row count mismatches found afterwards (empty on success).
+    """
+    manifest = read_manifest(snapshot_dir)
+    tables = [entry['name'] for entry in manifest['tables']]
+    work_dir = tempfile.mkdtemp(prefix='polymarket_restore_')
+    cursor = connection.cursor()
+    loader = BulkLoader(connection, use_load_data=use_load_data)
+    try:
+        # Decompress first so a corrupt or truncated snapshot fails before anything is deleted
+        files = {}
+        for entry in manifest['tables']:
+            path = os.path.join(work_dir, f"{entry['name']}.tsv")
+            with gzip.open(os.path.join(snapshot_dir, entry['file']), 'rb') as source, open(path, 'wb') as target:
+                shutil.copyfileobj(source, target, 1 << 20)
+            rows = count_rows(path)
+            if rows != entry['rows']:
+                raise ValueError(f"{entry['file']} has {rows} rows, manifest says {entry['rows']}")
+            files[entry['name']] = path
+
+        start_time = time.perf_counter()
+        truncate_tables(cursor, list(reversed(tables)))
+        print(f"Truncated {len(tables)} tables in {time.perf_counter() - start_time:.2f}s")
+
+        with bulk_session(cursor), triggers_suspended(cursor, tables), indexes_deferred(cursor, tables):
+            for entry in manifest['tables']:
+                loader.load_file(entry['name'], entry['columns'], files[entry['name']])
+        connection.commit()
+        loader.report()
+    finally:
+        cursor.close()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return verify_counts(connection, manifest)
+
+def main():
+    parser = argparse.ArgumentParser(description="Snapshot the database to a fixture or restore one")
+    parser.add_argument('command', choices=['snapshot', 'restore', 'verify'])
+    parser.add_argument('path', help="Snapshot directory")
+    parser.add_argument('--no-load-data', action='store_true', help="Restore with multi-row INSERTs instead of LOAD DATA")
+    args = parser.parse_args()
+
+    connection = get_db_connection()
+    if not connection:
+        sys.exit(1)
+
+    start_time = time.time()
+    try:
+        if args.command == 'snapshot':
+            manifest = snapshot(connection, args.path)
+            total = sum(entry['rows'] for entry in manifest['tables'])
+            print(f"\n✅ Snapshot of {total} rows written to {args.path} in {time.time() - start_time:.2f}s")
+            return
+
+        if args.command == 'restore':
+            mismatches = restore(connection, args.path, use_load_data=not args.no_load_data)
+        else:
+            mismatches = verify_counts(connection, read_manifest(args.path))
+
+        if mismatches:
+            for mismatch in mismatches:
+                print(f"✗ {mismatch}")
+            print(f"\n❌ Database does not match snapshot {args.path}")
+            sys.exit(1)
+        print(f"\n✅ Database matches snapshot {args.path} ({time.time() - start_time:.2f}s)")
+
+    except (Error, ValueError, OSError) as e:
+        print(f"Error: {e}")
+        connection.rollback()
+        sys.exit(1)
+    finally:
+        connection.close()
+
+if __name__ == "__main__":
+    main()
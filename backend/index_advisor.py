@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+"""
+Index advisor driven by the recorded query workload.
+
+Runs EXPLAIN FORMAT=JSON for every read query in sql/, weights each plan by
+how often and how long that query ran according to QueryTimer
+(/api/query-stats), and proposes ranked index additions for the tables those
+plans scan or sort. It also flags indexes made redundant by a unique
+constraint or a longer index with the same leading columns.
+
+Usage:
+    python3 index_advisor.py --workload query_stats.json
+    python3 index_advisor.py --url http://localhost:5000/api/query-stats
+    python3 index_advisor.py --workload query_stats.json --apply-scratch polymarket_scratch
+"""
+
+import re
+import json
+import time
+import argparse
+import statistics
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+import mysql.connector
+from mysql.connector import Error
+import os
+from dotenv import load_dotenv
+from sql_loader import SQLLoader
+from query_samples import collect_sample_ids, sample_params, is_read_only, explain, plan_table_accesses
+
+load_dotenv()
+
+DB_CONFIG = {
+    'host': os.getenv('DB_HOST', '127.0.0.1'),
+    'user': os.getenv('DB_USER', 'polymarket'),
+    'password': os.getenv('DB_PASSWORD'),
+    'database': os.getenv('DB_DATABASE', 'polymarket')
+}
+
+# Index columns beyond this rarely pay for their write cost here
+MAX_INDEX_COLUMNS = 3
+
+SQL_KEYWORDS = {'where', 'on', 'join', 'left', 'right', 'inner', 'outer', 'group', 'order', 'limit',
+                'union', 'select', 'as', 'using', 'for', 'having', 'set', 'values'}
+
+def get_db_connection(database: Optional[str] = None):
+    try:
+        config = dict(DB_CONFIG)
+        if database:
+            config['database'] = database
+        connection = mysql.connector.connect(**config)
+        connection.autocommit = True
+        return connection
+    except Error as e:
+        print(f"Error connecting to MySQL: {e}")
+        return None
+
+def load_workload(path: Optional[str] = None, url: Optional[str] = None) -> Dict[str, Dict[str, float]]:
+    """
+    Load per-key counts and times recorded by QueryTimer.
+
+    Accepts the /api/query-stats response body or the bare get_all_stats() dict.
+
+    Returns:
+        {query_key: {'count': int, 'total_time': float}}, without *_ERROR keys
+    """
+    if url:
+        import requests
+        data = requests.get(url, timeout=15).json()
+    elif path:
+        with open(path, 'r') as f:
+            data = json.load(f)
+    else:
+        return {}
+
+    stats = data.get('stats', data)
+    workload = {}
+    for query_key, entry in stats.get('queries', {}).items():
+        if query_key.endswith('_ERROR') or not entry.get('count'):
+            continue
+        workload[query_key] = {'count': entry['count'], 'total_time': entry['total_time']}
+    return workload
+
+def load_schema(cursor, database: str) -> Tuple[Dict[str, set], Dict[str, Dict[str, Dict[str, Any]]], Dict[str, int]]:
+    """
+    Returns:
+        (columns per table, indexes per table as {name: {'columns': [...], 'unique': bool}},
+         estimated rows per table)
+    """
+    cursor.execute("""
+        SELECT TABLE_NAME, COLUMN_NAME FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = %s
+    """, (database,))
+    columns = defaultdict(set)
+    for table, column in cursor.fetchall():
+        columns[table.lower()].add(column.lower())
+
+    cursor.execute("""
+        SELECT TABLE_NAME, INDEX_NAME, COLUMN_NAME, NON_UNIQUE
+        FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = %s
+        ORDER BY TABLE_NAME, INDEX_NAME, SEQ_IN_INDEX
+    """, (database,))
+    indexes = defaultdict(dict)
+    for table, index_name, column, non_unique in cursor.fetchall():
+        index = indexes[table.lower()].setdefault(index_name, {'columns': [], 'unique': not non_unique})
+        index['columns'].append(column.lower())
+
+    cursor.execute("""
+        SELECT TABLE_NAME, TABLE_ROWS FROM information_schema.TABLES
+        WHERE TABLE_SCHEMA = %s
+    """, (database,))
+    table_rows = {table.lower(): rows or 0 for table, rows in cursor.fetchall()}
+
+    return columns, indexes, table_rows
+
+def statement_tables(sql_query: str, columns: Dict[str, set]) -> Dict[str, str]:
+    """Map aliases (and bare table names) used in a statement to real table names."""
+    aliases = {}
+    for table, alias in re.findall(r'(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?', sql_query, re.IGNORECASE):
+        if table.lower() not in columns:
+            continue
+        aliases[table.lower()] = table.lower()
+        if alias and alias.lower() not in SQL_KEYWORDS:
+            aliases[alias.lower()] = table.lower()
+    return aliases
+
+def resolve_column(alias: Optional[str], column: str, aliases: Dict[str, str], columns: Dict[str, set]) -> Optional[str]:
+    column = column.lower()
+    if alias:
+        table = aliases.get(alias.lower())
+        return table if table and column in columns[table] else None
+    owners = {table for table in aliases.values() if column in columns[table]}
+    return owners.pop() if len(owners) == 1 else None
+
+def candidate_columns(sql_query: str, columns: Dict[str, set]) -> Dict[str, List[str]]:
+    """
+    Derive the index each table in a statement would want: columns compared
+    to a parameter or joined on first, then grouping/ordering columns.
+    """
+    aliases = statement_tables(sql_query, columns)
+    wanted = defaultdict(list)
+
+    def add(table, column):
+        if table and column not in wanted[table]:
+            wanted[table].append(column)
+
+    # Equality with a parameter: col = %s
+    for alias, column in re.findall(r'(?:(\w+)\.)?(\w+)\s*=\s*%s', sql_query):
+        add(resolve_column(alias, column, aliases, columns), column.lower())
+    # Join predicates: a.x = b.y; both sides are lookup candidates
+    for left_alias, left_col, right_alias, right_col in re.findall(r'(\w+)\.(\w+)\s*=\s*(\w+)\.(\w+)', sql_query):
+        add(resolve_column(left_alias, left_col, aliases, columns), left_col.lower())
+        add(resolve_column(right_alias, right_col, aliases, columns), right_col.lower())
+    # Semi/anti-join subqueries: x [NOT] IN (SELECT col FROM table)
+    for column, table in re.findall(r'IN\s*\(\s*SELECT\s+(\w+)\s+FROM\s+(\w+)', sql_query, re.IGNORECASE):
+        if table.lower() in columns and column.lower() in columns[table.lower()]:
+            add(table.lower(), column.lower())
+    # Ordering and grouping columns, appended after the lookup columns
+    for clause in re.findall(r'(?:ORDER|GROUP)\s+BY\s+(.+?)(?:\bLIMIT\b|\)|;|$)', sql_query, re.IGNORECASE | re.DOTALL):
+        for alias, column in re.findall(r'(?:(\w+)\.)?(\w+)', clause):
+            if column.upper() in ('DESC', 'ASC'):
+                continue
+            add(resolve_column(alias, column, aliases, columns), column.lower())
+    # Activity timestamps feeding aggregate expressions (e.g. trending decay)
+    for alias, column in re.findall(r'(?:(\w+)\.)?(\w+)\s+AS\s+activity_date', sql_query, re.IGNORECASE):
+        add(resolve_column(alias, column, aliases, columns), column.lower())
+
+    return {table: cols[:MAX_INDEX_COLUMNS] for table, cols in wanted.items()}
+
+def is_covered(candidate: List[str], indexes: Dict[str, Dict[str, Any]]) -> bool:
+    """True if an existing index already starts with the candidate's columns."""
+    return any(index['columns'][:len(candidate)] == candidate for index in indexes.values())
+
+def index_name(table: str, cols: List[str]) -> str:
+    return f"idx_{table}_{'_'.join(cols)}"[:64]
+
+def analyze(connection, loader: SQLLoader, workload: Dict[str, Dict[str, float]]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Returns:
+        (ranked index proposals, per-query plan findings)
+    """
+    cursor = connection.cursor()
+    database = connection.database
+    columns, indexes, table_rows = load_schema(cursor, database)
+    samples = collect_sample_ids(cursor)
+
+    proposals: Dict[Tuple[str, Tuple[str, ...]], Dict[str, Any]] = {}
+    findings = []
+
+    for query_key in sorted(loader.list_queries()):
+        sql_query = loader.get_query(query_key)
+        if not is_read_only(sql_query):
+            continue
+        params = sample_params(query_key, sql_query, samples)
+        if params is None:
+            print(f"Skipping {query_key}: no sample parameters")
+            continue
+
+        plan = explain(cursor, sql_query, params)
+        if plan is None:
+            continue
+        accesses = plan_table_accesses(plan)
+        total_rows = sum(access['rows'] for access in accesses) or 1
+
+        recorded = workload.get(query_key)
+        # Without a recorded workload every query gets equal weight
+        weight = recorded['total_time'] if recorded else 1.0
+        wanted = candidate_columns(sql_query, columns)
+
+        problems = [a for a in accesses if a['access_type'] in ('ALL', 'index') or a['filesort']]
+        findings.append({
+            'query_key': query_key,
+            'count': recorded['count'] if recorded else 0,
+            'total_time': recorded['total_time'] if recorded else 0.0,
+            'accesses': accesses,
+        })
+
+        for access in problems:
+            cols = wanted.get(access['table'])
+            if not cols or is_covered(cols, indexes[access['table']]):
+                continue
+            # Attribute the query's time to tables by their share of examined rows
+            share = access['rows'] / total_rows
+            key = (access['table'], tuple(cols))
+            proposal = proposals.setdefault(key, {
+                'table': access['table'],
+                'columns': cols,
+                'name': index_name(access['table'], cols),
+                'benefit': 0.0,
+                'queries': [],
+                'table_rows': table_rows.get(access['table'], 0),
+            })
+            proposal['benefit'] += weight * share
+            proposal['queries'].append(query_key)
+
+    cursor.close()
+
+    # A longer index serves every query a prefix of it would, so fold those in
+    merged = list(proposals.values())
+    for shorter in merged:
+        for longer in merged:
+            if shorter is longer or shorter.get('merged_into') or shorter['table'] != longer['table']:
+                continue
+            if len(longer['columns']) > len(shorter['columns']) and longer['columns'][:len(shorter['columns'])] == shorter['columns']:
+                longer['benefit'] += shorter['benefit']
+                longer['queries'] = sorted(set(longer['queries']) | set(shorter['queries']))
+                shorter['merged_into'] = longer['name']
+    ranked = [p for p in merged if not p.get('merged_into')]
+    ranked.sort(key=lambda p: p['benefit'], reverse=True)
+    return ranked, findings
+
+def find_redundant_indexes(indexes: Dict[str, Dict[str, Dict[str, Any]]], proposals: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Flag non-unique indexes whose columns are a prefix of another index,
+    including indexes the proposals would add.
+    """
+    redundant = []
+    for table, table_indexes in indexes.items():
+        others = [(name, index['columns'], 'existing') for name, index in table_indexes.items()]
+        others += [(p['name'], p['columns'], 'proposed') for p in proposals if p['table'] == table]
+        for name, index in table_indexes.items():
+            if index['unique']:
+                continue
+            for other_name, other_cols, origin in others:
+                if other_name == name:
+                    continue
+                if other_cols[:len(index['columns'])] == index['columns']:
+                    other = table_indexes.get(other_name)
+                    reason = 'duplicates UNIQUE constraint' if other and other['unique'] and other_cols == index['columns'] \
+                        else f"prefix of {origin} index {other_name}({', '.join(other_cols)})"
+                    redundant.append({'table': table, 'name': name, 'columns': index['columns'],
+                                      'covered_by': other_name, 'reason': reason})
+                    break
+    return redundant
+
+def benchmark_queries(connection, loader: SQLLoader, query_keys: List[str], runs: int) -> Dict[str, float]:
+    """Median wall time (execute + fetch) of each query key over `runs` executions."""
+    cursor = connection.cursor()
+    samples = collect_sample_ids(cursor)
+    medians = {}
+    for query_key in query_keys:
+        sql_query = loader.get_query(query_key)
+        params = sample_params(query_key, sql_query, samples)
+        if params is None:
+            continue
+        times = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            cursor.execute(sql_query, params or None)
+            cursor.fetchall()
+            times.append(time.perf_counter() - start)
+        medians[query_key] = statistics.median(times)
+    cursor.close()
+    return medians
+
+def build_scratch_database(connection, scratch_db: str, tables: List[str]):
+    """Copy the current database's tables and rows into scratch_db."""
+    source_db = connection.database
+    cursor = connection.cursor()
+    print(f"Building scratch database {scratch_db} from {source_db}...")
+    cursor.execute(f"DROP DATABASE IF EXISTS `{scratch_db}`")
+    cursor.execute(f"CREATE DATABASE `{scratch_db}`")
+    cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+    for table in tables:
+        cursor.execute(f"CREATE TABLE `{scratch_db}`.`{table}` LIKE `{source_db}`.`{table}`")
+        cursor.execute(f"INSERT INTO `{scratch_db}`.`{table}` SELECT * FROM `{source_db}`.`{table}`")
+        print(f"  copied {table}")
+    cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+    cursor.close()
+
+def apply_and_benchmark(connection, loader: SQLLoader, proposals: List[Dict[str, Any]], scratch_db: str, runs: int):
+    cursor = connection.cursor()
+    cursor.execute("SELECT TABLE_NAME FROM information_schema.TABLES WHERE TABLE_SCHEMA = %s AND TABLE_TYPE = 'BASE TABLE'",
+                   (connection.database,))
+    tables = [row[0] for row in cursor.fetchall()]
+    cursor.close()
+    build_scratch_database(connection, scratch_db, tables)
+
+    scratch = get_db_connection(scratch_db)
+    if not scratch:
+        return
+    affected = sorted({key for p in proposals for key in p['queries']})
+
+    print(f"\nBenchmarking {len(affected)} queries before applying indexes ({runs} runs each)...")
+    before = benchmark_queries(scratch, loader, affected, runs)
+
+    cursor = scratch.cursor()
+    for proposal in proposals:
+        ddl = f"CREATE INDEX {proposal['name']} ON {proposal['table']}({', '.join(proposal['columns'])})"
+        print(f"  {ddl}")
+        cursor.execute(ddl)
+    cursor.execute("ANALYZE TABLE " + ", ".join(sorted({p['table'] for p in proposals})))
+    cursor.fetchall()
+    cursor.close()
+
+    print("Benchmarking after applying indexes...")
+    after = benchmark_queries(scratch, loader, affected, runs)
+    scratch.close()
+
+    print(f"\n{'Query':<55} {'before (ms)':>12} {'after (ms)':>12} {'speedup':>8}")
+    print('-' * 90)
+    for query_key in affected:
+        if query_key not in before or query_key not in after:
+            continue
+        speedup = before[query_key] / after[query_key] if after[query_key] > 0 else float('inf')
+        print(f"{query_key:<55} {before[query_key] * 1000:>12.2f} {after[query_key] * 1000:>12.2f} {speedup:>7.1f}x")
+    return {'before': before, 'after': after}
+
+def print_report(proposals: List[Dict[str, Any]], redundant: List[Dict[str, Any]], weighted: bool):
+    unit = 's of recorded query time' if weighted else ' (relative, no workload given)'
+    print(f"\nPROPOSED INDEXES (ranked by estimated benefit{'' if weighted else ', unweighted'})")
+    print('=' * 80)
+    if not proposals:
+        print("No index additions proposed.")
+    for rank, proposal in enumerate(proposals, 1):
+        print(f"{rank}. CREATE INDEX {proposal['name']} ON {proposal['table']}({', '.join(proposal['columns'])});")
+        print(f"   estimated benefit: {proposal['benefit']:.4f}{unit}")
+        print(f"   table rows: ~{proposal['table_rows']}, serves: {', '.join(proposal['queries'])}")
+
+    print("\nREDUNDANT INDEXES")
+    print('=' * 80)
+    if not redundant:
+        print("None found.")
+    for index in redundant:
+        print(f"- {index['table']}.{index['name']}({', '.join(index['columns'])}): {index['reason']}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Propose indexes from the recorded query workload")
+    parser.add_argument('--workload', help="JSON saved from /api/query-stats")
+    parser.add_argument('--url', help="Fetch the workload from a running app's /api/query-stats")
+    parser.add_argument('--top', type=int, default=5, help="Number of proposals to apply with --apply-scratch")
+    parser.add_argument('--apply-scratch', metavar='DATABASE', help="Copy the data into DATABASE, apply the top proposals and re-benchmark")
+    parser.add_argument('--runs', type=int, default=20, help="Benchmark runs per query")
+    parser.add_argument('--json', metavar='FILE', help="Also write the report as JSON")
+    args = parser.parse_args()
+
+    workload = load_workload(args.workload, args.url)
+    loader = SQLLoader()
+
+    connection = get_db_connection()
+    if not connection:
+        return
+
+    try:
+        proposals, findings = analyze(connection, loader, workload)
+        cursor = connection.cursor()
+        _, indexes, _ = load_schema(cursor, connection.database)
+        cursor.close()
+        redundant = find_redundant_indexes(indexes, proposals)
+        print_report(proposals, redundant, bool(workload))
+
+        benchmark = None
+        if args.apply_scratch and proposals:
+            if args.apply_scratch == connection.database:
+                print("Refusing to use the live database as the scratch database.")
+                return
+            benchmark = apply_and_benchmark(connection, loader, proposals[:args.top], args.apply_scratch, args.runs)
+
+        if args.json:
+            with open(args.json, 'w') as f:
+                json.dump({'proposals': proposals, 'redundant': redundant, 'findings': findings,
+                           'benchmark': benchmark}, f, indent=2)
+            print(f"\nReport saved to {args.json}")
+    finally:
+        connection.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Bet journal replay and verification
+
+Rebuilds aggregates (market volume and odds, per-user positions and realized
+gains) from the append-only bet journal written by create_bet, checks the
+journal against the bets table, and backfills bets that are missing from it.
+
+Usage:
+    python3 journal_replay.py replay --compare-sql          # also time the equivalent SQL
+    python3 journal_replay.py replay --apply-markets        # write volume/podd back to markets
+    python3 journal_replay.py verify
+    python3 journal_replay.py backfill                      # journal bets committed before it existed
+"""
+
+import os
+import sys
+import time
+import argparse
+from typing import Any, Dict
+
+import numpy as np
+import mysql.connector
+from mysql.connector import Error
+from dotenv import load_dotenv
+from bet_journal import (BetJournal, read_journal, corrupt_records, market_aggregates, position_aggregates,
+                         user_realized_gains)
+from sql_loader import SQLLoader
+
+load_dotenv()
+
+DB_CONFIG = {
+    'host': os.getenv('DB_HOST', '127.0.0.1'),
+    'user': os.getenv('DB_USER', 'polymarket'),
+    'password': os.getenv('DB_PASSWORD'),
+    'database': os.getenv('DB_DATABASE', 'polymarket')
+}
+
+DEFAULT_JOURNAL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'journal')
+
+# Rows fetched per round trip when reading the bets table
+FETCH_ROWS = 50000
+
+def get_db_connection():
+    try:
+        return mysql.connector.connect(**DB_CONFIG)
+    except Error as e:
+        print(f"Error connecting to MySQL: {e}")
+        return None
+
+def table_bets(connection) -> np.ndarray:
+    """bets as an (n, 6) int64 array of bId, uId, mId, podd and amt in hundredths, yes; ordered by bId"""
+    cursor = connection.cursor()
+    cursor.execute("""
+        SELECT bId, uId, mId, CAST(ROUND(podd * 100) AS SIGNED), CAST(ROUND(amt * 100) AS SIGNED), yes
+        FROM bets ORDER BY bId
+    """)
+    chunks = []
+    while True:
+        rows = cursor.fetchmany(FETCH_ROWS)
+        if not rows:
+            break
+        chunks.append(np.array(rows, dtype=np.int64))
+    cursor.close()
+    return np.concatenate(chunks) if chunks else np.zeros((0, 6), dtype=np.int64)
+
+def replay(args) -> int:
+    start_time = time.perf_counter()
+    records = read_journal(args.journal_dir)
+    read_time = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    markets = market_aggregates(records)
+    positions = position_aggregates(records)
+    users = user_realized_gains(positions)
+    aggregate_time = time.perf_counter() - start_time
+
+    print(f"Replayed {len(records)} bets: read {read_time:.3f}s, aggregated {aggregate_time:.3f}s "
+          f"({len(records) / max(read_time + aggregate_time, 1e-9):.0f} bets/sec)")
+    print(f"  {len(markets['market_id'])} markets, {len(positions['user_id'])} positions, "
+          f"{len(users['user_id'])} users")
+
+    print("\nTop markets by volume:")
+    for i in np.argsort(-markets['volume'])[:args.top]:
+        print(f"  market {markets['market_id'][i]:>8}  volume {markets['volume'][i]:>14.2f}  "
+              f"podd {markets['podd'][i]:.2f}")
+    print("\nTop users by realized gains:")
+    for i in np.argsort(-users['realized_gains'])[:args.top]:
+        print(f"  user {users['user_id'][i]:>8}  realized {users['realized_gains'][i]:>12.2f}")
+
+    if args.output:
+        np.savez_compressed(args.output, **{f"market_{key}": value for key, value in markets.items()},
+                            **{f"position_{key}": value for key, value in positions.items()},
+                            **{f"user_{key}": value for key, value in users.items()})
+        print(f"\nAggregates written to {args.output}")
+
+    if not (args.compare_sql or args.apply_markets):
+        return 0
+
+    connection = get_db_connection()
+    if not connection:
+        return 1
+    try:
+        cursor = connection.cursor()
+        if args.compare_sql:
+            sql = SQLLoader()
+            start_time = time.perf_counter()
+            cursor.execute("SELECT mId, SUM(amt), SUM(CASE WHEN yes THEN amt ELSE 0 END) FROM bets GROUP BY mId")
+            cursor.fetchall()
+            market_time = time.perf_counter() - start_time
+            start_time = time.perf_counter()
+            cursor.execute(sql.get_query('bets.get_user_profits'))
+            cursor.fetchall()
+            profits_time = time.perf_counter() - start_time
+            print(f"\nSQL: market rollup {market_time:.3f}s, bets.get_user_profits {profits_time:.3f}s "
+                  f"(journal replay {read_time + aggregate_time:.3f}s for both)")
+
+        if args.apply_markets:
+            # Same rule as create_bet: podd is the YES share of volume, left alone while volume is zero
+            rows = [(round(float(volume), 2), round(float(podd), 2), int(market_id))
+                    for market_id, volume, podd in zip(markets['market_id'], markets['volume'], markets['podd'])
+                    if not np.isnan(podd)]
+            cursor.executemany("UPDATE markets SET volume = %s, podd = %s WHERE mid = %s", rows)
+            connection.commit()
+            print(f"\nUpdated volume and podd of {len(rows)} markets from the journal")
+        cursor.close()
+    finally:
+        connection.close()
+    return 0
+
+def verify(args) -> int:
+    """Compare journal and table record by record. Returns 1 on any difference."""
+    records = read_journal(args.journal_dir)
+    connection = get_db_connection()
+    if not connection:
+        return 1
+    try:
+        table = table_bets(connection)
+    finally:
+        connection.close()
+
+    problems: Dict[str, Any] = {}
+    bad = corrupt_records(records)
+    if len(bad):
+        problems['corrupt records'] = bad.tolist()
+
+    journal_ids, first_index, counts = np.unique(records['bet_id'].astype(np.int64), return_index=True,
+                                                 return_counts=True)
+    if (counts > 1).any():
+        problems['bet ids journaled more than once'] = journal_ids[counts > 1].tolist()
+
+    table_ids = table[:, 0]
+    problems['missing from journal'] = np.setdiff1d(table_ids, journal_ids).tolist()
+    problems['missing from table'] = np.setdiff1d(journal_ids, table_ids).tolist()
+
+    common, journal_pos, table_pos = np.intersect1d(journal_ids, table_ids, assume_unique=True, return_indices=True)
+    journal_rows = records[first_index[journal_pos]]
+    journal_fields = np.column_stack([journal_rows['bet_id'].astype(np.int64), journal_rows['user_id'],
+                                      journal_rows['market_id'], journal_rows['podd'], journal_rows['amount'],
+                                      journal_rows['yes']]).astype(np.int64)
+    mismatched = (journal_fields != table[table_pos]).any(axis=1)
+    problems['field mismatches'] = common[mismatched].tolist()
+
+    print(f"Journal: {len(records)} records ({len(journal_ids)} bets), table: {len(table)} bets, "
+          f"matched: {int((~mismatched).sum())}")
+    failed = False
+    for name, ids in problems.items():
+        if ids:
+            failed = True
+            shown = ', '.join(str(i) for i in ids[:args.top])
+            more = f" (+{len(ids) - args.top} more)" if len(ids) > args.top else ''
+            print(f"✗ {len(ids)} {name}: {shown}{more}")
+    if not failed:
+        print("✅ Journal and bets table match")
+    return 1 if failed else 0
+
+def backfill(args) -> int:
+    """Append bets from the table that the journal does not have yet, in bId order"""
+    journal_ids = np.unique(read_journal(args.journal_dir)['bet_id'].astype(np.int64))
+    connection = get_db_connection()
+    if not connection:
+        return 1
+    journal = BetJournal(args.journal_dir, fsync='never')
+    appended = 0
+    try:
+        cursor = connection.cursor()
+        cursor.execute("SELECT bId, uId, mId, podd, amt, yes, UNIX_TIMESTAMP(createdAt) FROM bets ORDER BY bId")
+        while True:
+            rows = cursor.fetchmany(FETCH_ROWS)
+            if not rows:
+                break
+            ids = np.array([row[0] for row in rows], dtype=np.int64)
+            missing = ~np.isin(ids, journal_ids, assume_unique=True)
+            for row, is_missing in zip(rows, missing):
+                if is_missing:
+                    bet_id, user_id, market_id, podd, amount, yes, created_at = row
+                    journal.append(bet_id, user_id, market_id, podd, amount, bool(yes), int(created_at or 0))
+                    appended += 1
+        cursor.close()
+    finally:
+        journal.close()
+        connection.close()
+    print(f"Appended {appended} bets to {args.journal_dir}")
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay, verify or backfill the bet journal")
+    parser.add_argument('command', choices=['replay', 'verify', 'backfill'])
+    parser.add_argument('--journal-dir', default=os.getenv('BET_JOURNAL_DIR') or DEFAULT_JOURNAL_DIR)
+    parser.add_argument('--top', type=int, default=10, help="Rows (or differing ids) to print")
+    parser.add_argument('--output', help="replay: save all aggregates to this .npz file")
+    parser.add_argument('--compare-sql', action='store_true', help="replay: time the equivalent SQL aggregates")
+    parser.add_argument('--apply-markets', action='store_true',
+                        help="replay: overwrite markets.volume and podd with the replayed values")
+    args = parser.parse_args()
+
+    commands = {'replay': replay, 'verify': verify, 'backfill': backfill}
+    try:
+        sys.exit(commands[args.command](args))
+    except (Error, ValueError, OSError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,441 @@
+#!/usr/bin/env python3
+"""
+Endpoint-level load test for the Flask API.
+
+Drives the routes in app.py from concurrent workers according to a workload
+profile and reports per-route throughput and latency percentiles. Results are
+written as JSON so runs can be compared across commits (--compare).
+
+Requests go either to a running server (--url) or through the Flask test
+client in-process (--test-client); both hit the MySQL configured in .env.
+Setup registers synthetic users and funds them directly in the database, so
+run this against a local or scratch database, not production.
+
+Usage:
+    python3 load_test.py --profile browse --concurrency 16 --duration 60 --url http://localhost:5000
+    python3 load_test.py --profile bet --test-client --output results/bet.json
+    python3 load_test.py --profile all --compare results/baseline.json
+"""
+
+import json
+import math
+import time
+import random
+import argparse
+import statistics
+import threading
+import subprocess
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import mysql.connector
+from mysql.connector import Error
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DB_CONFIG = {
+    'host': os.getenv('DB_HOST', '127.0.0.1'),
+    'user': os.getenv('DB_USER', 'polymarket'),
+    'password': os.getenv('DB_PASSWORD'),
+    'database': os.getenv('DB_DATABASE', 'polymarket')
+}
+
+LOADTEST_PASSWORD = 'loadtest-password'
+
+# Relative weight of each operation per profile; 'all' covers every route evenly
+PROFILES = {
+    'browse': {
+        'list_markets': 30, 'trending_markets': 20, 'get_market': 20, 'market_page': 15, 'get_market_bets': 10,
+        'get_comments': 15, 'markets_by_ids': 5, 'batch': 5, 'post_comment': 2, 'post_reply': 1, 'login': 1, 'ready': 1,
+    },
+    'bet': {
+        'post_bet': 40, 'user_balance': 15, 'user_holdings': 15, 'user_bets': 10,
+        'get_market': 10, 'list_markets': 10,
+    },
+    'leaderboard': {
+        'user_profits': 50, 'user_holdings': 25, 'trending_markets': 15, 'list_markets': 10,
+    },
+}
+
+PERCENTILES = (50, 90, 95, 99)
+
+def get_db_connection():
+    try:
+        connection = mysql.connector.connect(**DB_CONFIG)
+        connection.autocommit = True
+        return connection
+    except Error as e:
+        print(f"Error connecting to MySQL: {e}")
+        return None
+
+class HttpTransport:
+    """Sends requests to a running server; one keep-alive session per worker."""
+
+    def __init__(self, base_url: str):
+        import requests
+        self.base_url = base_url.rstrip('/')
+        self._local = threading.local()
+        self._requests = requests
+
+    def request(self, method: str, path: str, body: Any = None, headers: Optional[Dict[str, str]] = None) -> Tuple[int, Any]:
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._requests.Session()
+            self._local.session = session
+        response = session.request(method, self.base_url + path, json=body, headers=headers, timeout=60)
+        try:
+            return response.status_code, response.json()
+        except ValueError:
+            return response.status_code, None
+
+class TestClientTransport:
+    """Sends requests through the Flask test client without a network hop."""
+
+    def __init__(self):
+        from app import app
+        self.app = app
+
+    def request(self, method: str, path: str, body: Any = None, headers: Optional[Dict[str, str]] = None) -> Tuple[int, Any]:
+        with self.app.test_client() as client:
+            response = client.open(path, method=method, json=body, headers=headers)
+            return response.status_code, response.get_json(silent=True)
+
+class Workload:
+    """Synthetic users, markets and comments the operations pick from."""
+
+    def __init__(self, transport, users: int, funding: float, admin_token: Optional[str]):
+        self.transport = transport
+        self.admin_headers = {'X-Admin-Token': admin_token} if admin_token else {}
+        self.users: List[Dict[str, Any]] = []
+        self.market_ids: List[int] = []
+        self.comment_ids: Dict[int, List[int]] = defaultdict(list)
+        self._lock = threading.Lock()
+        self._setup(users, funding)
+
+    def _setup(self, users: int, funding: float):
+        # Usernames carry the run id so repeated runs with the same seed never collide
+        self.run_id = datetime.now().strftime('%Y%m%d%H%M%S')
+        print(f"Registering {users} load test users...")
+        for i in range(users):
+            username = f"loadtest_{self.run_id}_{i}"
+            status, body = self.transport.request('POST', '/auth/register', {
+                'username': username, 'email': f"{username}@loadtest.local", 'password': LOADTEST_PASSWORD
+            })
+            if status != 201:
+                raise RuntimeError(f"Could not register {username}: {status} {body}")
+            status, body = self.transport.request('POST', '/auth/login', {'username': username, 'password': LOADTEST_PASSWORD})
+            if status != 200:
+                raise RuntimeError(f"Could not log in {username}: {status} {body}")
+            self.users.append({'id': body['user']['id'], 'username': username,
+                               'headers': {'Authorization': f"Bearer {body['token']}"}})
+
+        # New accounts start at zero balance; fund them so bets are accepted
+        connection = get_db_connection()
+        if not connection:
+            raise RuntimeError("Could not connect to MySQL to fund load test users")
+        cursor = connection.cursor()
+        cursor.execute(f"UPDATE users SET balance = %s WHERE uid IN ({', '.join(['%s'] * len(self.users))})",
+                       [funding] + [user['id'] for user in self.users])
+        cursor.close()
+        connection.close()
+
+        status, body = self.transport.request('GET', '/markets')
+        if status != 200 or not body['markets']:
+            raise RuntimeError("No active markets to load test against; seed the database first")
+        self.market_ids = [market['mid'] for market in body['markets']]
+
+        for market_id in self.market_ids[:50]:
+            status, body = self.transport.request('GET', f"/markets/{market_id}/comments")
+            if status == 200:
+                self.comment_ids[market_id] = [comment['cId'] for comment in body['comments']]
+        print(f"Workload ready: {len(self.users)} users, {len(self.market_ids)} markets")
+
+    def add_comment(self, market_id: int, comment_id: int):
+        with self._lock:
+            self.comment_ids[market_id].append(comment_id)
+
+    def pick_comment(self, rng: random.Random) -> Optional[Tuple[int, int]]:
+        with self._lock:
+            markets = [market_id for market_id, ids in self.comment_ids.items() if ids]
+            if not markets:
+                return None
+            market_id = rng.choice(markets)
+            return market_id, rng.choice(self.comment_ids[market_id])
+
+# Each operation returns (route label, method, path, body, headers); labels match the Flask rules
+def op_register(w: Workload, rng: random.Random):
+    username = f"loadtest_{w.run_id}_{rng.getrandbits(32):x}"
+    return ('POST /auth/register', 'POST', '/auth/register',
+            {'username': username, 'email': f"{username}@loadtest.local", 'password': LOADTEST_PASSWORD}, None)
+
+def op_login(w: Workload, rng: random.Random):
+    user = rng.choice(w.users)
+    return 'POST /auth/login', 'POST', '/auth/login', {'username': user['username'], 'password': LOADTEST_PASSWORD}, None
+
+def op_list_markets(w: Workload, rng: random.Random):
+    # Half the traffic is logged in, which switches odds to the per-user query
+    headers = rng.choice(w.users)['headers'] if rng.random() < 0.5 else None
+    return 'GET /markets', 'GET', '/markets', None, headers
+
+def op_markets_by_ids(w: Workload, rng: random.Random):
+    # The watchlist / portfolio lookup; labelled apart from the full list it shares a rule with
+    headers = rng.choice(w.users)['headers'] if rng.random() < 0.5 else None
+    ids = rng.sample(w.market_ids, min(len(w.market_ids), rng.randint(2, 20)))
+    return 'GET /markets?ids=', 'GET', f"/markets?ids={','.join(map(str, ids))}", None, headers
+
+def op_batch(w: Workload, rng: random.Random):
+    # What a client batches on first load: a market with its bets and comments, and the trending list
+    headers = rng.choice(w.users)['headers'] if rng.random() < 0.5 else None
+    market_id = rng.choice(w.market_ids)
+    paths = [f"/markets/{market_id}", f"/markets/{market_id}/bets", f"/markets/{market_id}/comments", '/markets/trending']
+    return 'POST /batch', 'POST', '/batch', {'requests': [{'path': path} for path in paths]}, headers
+
+def op_trending_markets(w: Workload, rng: random.Random):
+    headers = rng.choice(w.users)['headers'] if rng.random() < 0.5 else None
+    return 'GET /markets/trending', 'GET', '/markets/trending', None, headers
+
+def op_get_market(w: Workload, rng: random.Random):
+    headers = rng.choice(w.users)['headers'] if rng.random() < 0.5 else None
+    return 'GET /markets/<int:market_id>', 'GET', f"/markets/{rng.choice(w.market_ids)}", None, headers
+
+def op_market_page(w: Workload, rng: random.Random):
+    # Logged-in callers also get their holdings and balance sections
+    headers = rng.choice(w.users)['headers'] if rng.random() < 0.5 else None
+    return ('GET /markets/<int:market_id>/page', 'GET', f"/markets/{rng.choice(w.market_ids)}/page", None, headers)
+
+def op_get_market_bets(w: Workload, rng: random.Random):
+    return 'GET /markets/<int:market_id>/bets', 'GET', f"/markets/{rng.choice(w.market_ids)}/bets", None, None
+
+def op_market_stats(w: Workload, rng: random.Random):
+    return ('GET /markets/<int:market_id>/stats', 'GET',
+            f"/markets/{rng.choice(w.market_ids)}/stats?hours={rng.choice((1, 24, 168))}", None, None)
+
+def op_market_history(w: Workload, rng: random.Random):
+    # The default 200 candles at the chart's intervals, plus a long range that gets downsampled
+    query = rng.choice(('interval=15m', 'interval=1h', 'interval=1d', 'interval=1m&from=2020-01-01T00:00:00Z'))
+    return ('GET /markets/<int:market_id>/history', 'GET',
+            f"/markets/{rng.choice(w.market_ids)}/history?{query}", None, None)
+
+def op_post_bet(w: Workload, rng: random.Random):
+    user = rng.choice(w.users)
+    body = {'amount': round(rng.uniform(1, 20), 2), 'prediction': rng.random() < 0.5}
+    return 'POST /markets/<int:market_id>/bets', 'POST', f"/markets/{rng.choice(w.market_ids)}/bets", body, user['headers']
+
+def op_get_comments(w: Workload, rng: random.Random):
+    return 'GET /markets/<int:market_id>/comments', 'GET', f"/markets/{rng.choice(w.market_ids)}/comments", None, None
+
+def op_post_comment(w: Workload, rng: random.Random):
+    user = rng.choice(w.users)
+    market_id = rng.choice(w.market_ids)
+    return ('POST /markets/<int:market_id>/comments', 'POST', f"/markets/{market_id}/comments",
+            {'user_id': user['id'], 'content': f"load test comment {rng.getrandbits(32):x}"}, None)
+
+def op_post_reply(w: Workload, rng: random.Random):
+    target = w.pick_comment(rng)
+    if target is None:
+        return op_post_comment(w, rng)
+    market_id, parent_id = target
+    user = rng.choice(w.users)
+    return ('POST /markets/<int:market_id>/comments/<int:parent_id>/replies', 'POST',
+            f"/markets/{market_id}/comments/{parent_id}/replies",
+            {'user_id': user['id'], 'content': f"load test reply {rng.getrandbits(32):x}"}, None)
+
+def op_user_profits(w: Workload, rng: random.Random):
+    return 'GET /api/user-profits', 'GET', '/api/user-profits', None, None
+
+def op_user_holdings(w: Workload, rng: random.Random):
+    return 'GET /api/user-holdings', 'GET', '/api/user-holdings', None, rng.choice(w.users)['headers']
+
+def op_user_bets(w: Workload, rng: random.Random):
+    return 'GET /api/user-bets', 'GET', '/api/user-bets', None, rng.choice(w.users)['headers']
+
+def op_user_balance(w: Workload, rng: random.Random):
+    return 'GET /api/user-balance', 'GET', '/api/user-balance', None, rng.choice(w.users)['headers']
+
+def op_query_stats(w: Workload, rng: random.Random):
+    return 'GET /api/query-stats', 'GET', '/api/query-stats', None, None
+
+def op_traces(w: Workload, rng: random.Random):
+    return 'GET /api/traces', 'GET', '/api/traces', None, w.admin_headers
+
+def op_metrics(w: Workload, rng: random.Random):
+    return 'GET /metrics', 'GET', '/metrics', None, None
+
+def op_ready(w: Workload, rng: random.Random):
+    return 'GET /ready', 'GET', '/ready', None, None
+
+OPERATIONS: Dict[str, Callable[[Workload, random.Random], Tuple]] = {
+    'register': op_register,
+    'login': op_login,
+    'list_markets': op_list_markets,
+    'markets_by_ids': op_markets_by_ids,
+    'batch': op_batch,
+    'trending_markets': op_trending_markets,
+    'get_market': op_get_market,
+    'market_page': op_market_page,
+    'get_market_bets': op_get_market_bets,
+    'market_stats': op_market_stats,
+    'market_history': op_market_history,
+    'post_bet': op_post_bet,
+    'get_comments': op_get_comments,
+    'post_comment': op_post_comment,
+    'post_reply': op_post_reply,
+    'user_profits': op_user_profits,
+    'user_holdings': op_user_holdings,
+    'user_bets': op_user_bets,
+    'user_balance': op_user_balance,
+    'query_stats': op_query_stats,
+    'traces': op_traces,
+    'metrics': op_metrics,
+    'ready': op_ready,
+}
+PROFILES['all'] = {name: 1 for name in OPERATIONS}
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+def run_worker(worker_id: int, workload: Workload, weights: Dict[str, int], seed: int,
+               deadline: float, results: Dict[str, Dict[str, Any]], lock: threading.Lock):
+    rng = random.Random(seed + worker_id)
+    names = list(weights.keys())
+    weight_values = list(weights.values())
+    local = defaultdict(lambda: {'latencies': [], 'statuses': defaultdict(int), 'exceptions': 0})
+
+    while time.monotonic() < deadline:
+        name = rng.choices(names, weights=weight_values)[0]
+        route, method, path, body, headers = OPERATIONS[name](workload, rng)
+        entry = local[route]
+        start = time.perf_counter()
+        try:
+            status, response = workload.transport.request(method, path, body, headers)
+        except Exception as e:
+            entry['exceptions'] += 1
+            print(f"Worker {worker_id}: {method} {path} failed: {e}")
+            continue
+        entry['latencies'].append(time.perf_counter() - start)
+        entry['statuses'][status] += 1
+        if name in ('post_comment', 'post_reply') and status == 201 and response:
+            comment_id = response.get('comment_id')
+            if comment_id:
+                workload.add_comment(int(path.split('/')[2]), comment_id)
+
+    with lock:
+        for route, entry in local.items():
+            merged = results.setdefault(route, {'latencies': [], 'statuses': defaultdict(int), 'exceptions': 0})
+            merged['latencies'].extend(entry['latencies'])
+            merged['exceptions'] += entry['exceptions']
+            for status, count in entry['statuses'].items():
+                merged['statuses'][status] += count
+
+def summarize(results: Dict[str, Dict[str, Any]], elapsed: float) -> Dict[str, Dict[str, Any]]:
+    routes = {}
+    for route, entry in sorted(results.items()):
+        latencies = sorted(entry['latencies'])
+        errors = sum(count for status, count in entry['statuses'].items() if status >= 500) + entry['exceptions']
+        summary = {
+            'requests': len(latencies),
+            'errors': errors,
+            'statuses': {str(status): count for status, count in sorted(entry['statuses'].items())},
+            'throughput_rps': len(latencies) / elapsed if elapsed else 0.0,
+            'mean_ms': statistics.mean(latencies) * 1000 if latencies else 0.0,
+            'max_ms': latencies[-1] * 1000 if latencies else 0.0,
+        }
+        for pct in PERCENTILES:
+            summary[f"p{pct}_ms"] = percentile(latencies, pct) * 1000
+        routes[route] = summary
+    return routes
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL,
+                                       cwd=os.path.dirname(os.path.abspath(__file__))).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def print_report(report: Dict[str, Any]):
+    print(f"\nProfile {report['profile']}: {report['concurrency']} workers for {report['elapsed']:.1f}s, "
+          f"{report['total_requests']} requests ({report['total_throughput_rps']:.1f} req/s)")
+    print(f"{'Route':<62} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'errors':>7}")
+    print('-' * 106)
+    for route, summary in report['routes'].items():
+        print(f"{route:<62} {summary['throughput_rps']:>8.1f} {summary['p50_ms']:>8.1f} "
+              f"{summary['p95_ms']:>8.1f} {summary['p99_ms']:>8.1f} {summary['errors']:>7}")
+
+def print_comparison(report: Dict[str, Any], baseline: Dict[str, Any]):
+    print(f"\nCompared with {baseline.get('commit') or 'baseline'} ({baseline['profile']} profile)")
+    print(f"{'Route':<62} {'req/s':>14} {'p95 ms':>16}")
+    print('-' * 94)
+    for route, summary in report['routes'].items():
+        base = baseline['routes'].get(route)
+        if not base:
+            continue
+        rps_change = (summary['throughput_rps'] / base['throughput_rps'] - 1) * 100 if base['throughput_rps'] else 0.0
+        p95_change = (summary['p95_ms'] / base['p95_ms'] - 1) * 100 if base['p95_ms'] else 0.0
+        print(f"{route:<62} {rps_change:>+13.1f}% {p95_change:>+15.1f}%")
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the API with a synthetic workload profile")
+    parser.add_argument('--profile', choices=sorted(PROFILES), default='browse')
+    parser.add_argument('--concurrency', type=int, default=8, help="Concurrent workers")
+    parser.add_argument('--duration', type=float, default=30, help="Seconds to run")
+    parser.add_argument('--url', default='http://localhost:5000', help="Base URL of a running server")
+    parser.add_argument('--test-client', action='store_true', help="Use the Flask test client instead of HTTP")
+    parser.add_argument('--users', type=int, default=20, help="Synthetic users to register")
+    parser.add_argument('--funding', type=float, default=100000.0, help="Balance given to each synthetic user")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="JSON results file (default: load_test_<profile>.json)")
+    parser.add_argument('--compare', metavar='FILE', help="Previous results JSON to compare against")
+    args = parser.parse_args()
+
+    transport = TestClientTransport() if args.test_client else HttpTransport(args.url)
+    workload = Workload(transport, args.users, args.funding, os.getenv('ADMIN_TOKEN'))
+    weights = PROFILES[args.profile]
+
+    results: Dict[str, Dict[str, Any]] = {}
+    lock = threading.Lock()
+    print(f"Running {args.profile} profile: {args.concurrency} workers for {args.duration}s...")
+    start = time.monotonic()
+    deadline = start + args.duration
+    workers = [threading.Thread(target=run_worker, args=(i, workload, weights, args.seed, deadline, results, lock))
+               for i in range(args.concurrency)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.monotonic() - start
+
+    routes = summarize(results, elapsed)
+    total_requests = sum(summary['requests'] for summary in routes.values())
+    report = {
+        'profile': args.profile,
+        'transport': 'test-client' if args.test_client else args.url,
+        'concurrency': args.concurrency,
+        'duration': args.duration,
+        'elapsed': elapsed,
+        'seed': args.seed,
+        'commit': git_commit(),
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'total_requests': total_requests,
+        'total_throughput_rps': total_requests / elapsed if elapsed else 0.0,
+        'routes': routes,
+    }
+    print_report(report)
+
+    output = args.output or f"load_test_{args.profile}.json"
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults saved to {output}")
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            print_comparison(report, json.load(f))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+from typing import Any, Dict, List, Tuple
+
+from fixed_point import (BASIS_POINTS, CENTS, MAX_ODDS_BPS, MIN_ODDS_BPS, SMOOTHING_CENTS, odds_bps, to_bps,
+                         to_cents, to_units, value_cents)
+
+# Added to both sides so a market with little volume does not swing to extreme odds
+SMOOTHING_FACTOR = SMOOTHING_CENTS / CENTS
+
+# Odds never leave this range
+MIN_ODDS = MIN_ODDS_BPS / BASIS_POINTS
+MAX_ODDS = MAX_ODDS_BPS / BASIS_POINTS
+
+def odds_from_volumes(yes_volume: Any, no_volume: Any) -> float:
+    """
+    Probability of YES implied by the volume on each side.
+    
+    More volume on YES means higher odds for YES. A market with no volume
+    sits at 0.50; otherwise the smoothed share of YES volume is clamped to
+    [MIN_ODDS, MAX_ODDS] and rounded to two decimals. Volumes (Decimal or
+    float) are taken to the cent and the share is computed exactly in integers.
+    """
+    return odds_bps(to_cents(yes_volume), to_cents(no_volume)) / BASIS_POINTS
+
+def odds_from_cents(yes_cents: int, no_cents: int) -> float:
+    """odds_from_volumes for volumes already in integer cents"""
+    return odds_bps(yes_cents, no_cents) / BASIS_POINTS
+
+def holding_value(net_units: Any, is_yes: bool, current_odds: Any) -> float:
+    """Current market value of a position, to the cent: YES units pay at the odds, NO units at 1 - odds"""
+    return value_cents(to_units(net_units), is_yes, to_bps(current_odds)) / CENTS
+
+def apply_holding_gains(holding: Dict[str, Any], current_odds: float):
+    """
+    Add unrealized gains, current value, percent change and odds to one row of
+    bets.get_user_holdings, and convert its numeric columns to float.
+
+    Value and gains are computed in integer cents, so the value a client sends
+    back to sell the whole holding is exactly what create_bet checks against.
+    """
+    invested_cents = to_cents(holding['total_invested'])
+    current_cents = value_cents(to_units(holding['net_units']), bool(holding['yes']), to_bps(current_odds))
+    
+    if invested_cents > 0:
+        percent_change = ((current_cents - invested_cents) / invested_cents) * 100
+    else:
+        percent_change = 0.0
+    
+    holding['unrealized_gains'] = (current_cents - invested_cents) / CENTS
+    holding['current_value'] = current_cents / CENTS
+    holding['percent_change'] = float(percent_change)
+    holding['current_odds'] = float(current_odds)
+    
+    holding['bought_units'] = float(holding['bought_units'])
+    holding['sold_units'] = float(holding['sold_units'])
+    holding['net_units'] = float(holding['net_units'])
+    holding['total_invested'] = float(holding['total_invested'])
+    holding['avg_buy_price_per_unit'] = float(holding['avg_buy_price_per_unit'])
+
+def unrealized_gains_total(holdings: List[Dict[str, Any]], holding_odds: List[float]) -> Tuple[float, float]:
+    """
+    Sum the unrealized gains of a user's holdings at the given odds, in cents.
+    
+    Returns:
+        (unrealized gains, total invested across the holdings)
+    """
+    gains_cents = 0
+    invested_total_cents = 0
+    for holding, current_odds in zip(holdings, holding_odds):
+        invested_cents = to_cents(holding['total_invested'])
+        gains_cents += value_cents(to_units(holding['net_units']), bool(holding['yes']), to_bps(current_odds)) \
+            - invested_cents
+        invested_total_cents += invested_cents
+    return gains_cents / CENTS, invested_total_cents / CENTS
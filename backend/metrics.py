@@ -0,0 +1,226 @@
+import time
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Tuple
+
+# Upper bounds (seconds) shared by every latency histogram we export
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def bucket_index(buckets: Tuple[float, ...], value: float) -> int:
+    """Return the index of the first bucket whose upper bound is >= value."""
+    return bisect_left(buckets, value)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = '') -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def render_histogram_samples(name: str, label_names: Tuple[str, ...], label_values: Tuple[str, ...],
+                             buckets: Tuple[float, ...], counts: List[int], total: float) -> List[str]:
+    """
+    Render one histogram series in text exposition format.
+
+    Args:
+        counts: Non-cumulative per-bucket counts, with one trailing slot for +Inf
+    """
+    lines = []
+    cumulative = 0
+    for bound, count in zip(buckets, counts):
+        cumulative += count
+        le = 'le="%s"' % bound
+        lines.append(f'{name}_bucket{_format_labels(label_names, label_values, le)} {cumulative}')
+    cumulative += counts[-1]
+    le = 'le="+Inf"'
+    lines.append(f'{name}_bucket{_format_labels(label_names, label_values, le)} {cumulative}')
+    lines.append(f'{name}_sum{_format_labels(label_names, label_values)} {total}')
+    lines.append(f'{name}_count{_format_labels(label_names, label_values)} {cumulative}')
+    return lines
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, label_names: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], float] = {}
+        if not self.label_names:
+            self._values[()] = 0.0
+
+    def inc(self, *label_values, amount: float = 1.0):
+        key = tuple(str(v) for v in label_values)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        for label_values, value in values:
+            lines.append(f'{self.name}{_format_labels(self.label_names, label_values)} {value}')
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, label_names: Iterable[str] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        # label values -> [per-bucket counts (+Inf last), sum]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *label_values):
+        key = tuple(str(v) for v in label_values)
+        index = bucket_index(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = [[0] * (len(self.buckets) + 1), 0.0]
+                self._series[key] = series
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            snapshot = [(key, list(counts), total) for key, (counts, total) in self._series.items()]
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        for label_values, counts, total in snapshot:
+            lines.extend(render_histogram_samples(self.name, self.label_names, label_values,
+                                                  self.buckets, counts, total))
+        return lines
+
+
+class Gauge:
+    """A gauge whose value is produced by a callback at scrape time."""
+
+    def __init__(self, name: str, documentation: str, callback: Callable[[], float]):
+        self.name = name
+        self.documentation = documentation
+        self.callback = callback
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} gauge']
+        try:
+            value = self.callback()
+        except Exception as e:
+            print(f"Error collecting gauge {self.name}: {e}")
+            return lines
+        if value is not None:
+            lines.append(f'{self.name} {value}')
+        return lines
+
+
+class EventRate:
+    """
+    Per-second event rate over a sliding window, kept as a ring of one-second
+    slots so recording is O(1) and reading is O(window).
+    """
+
+    def __init__(self, window_seconds: int = 60):
+        self.window = window_seconds
+        self._lock = threading.Lock()
+        self._counts = [0] * window_seconds
+        self._seconds = [0] * window_seconds
+
+    def record(self, count: int = 1):
+        second = int(time.time())
+        slot = second % self.window
+        with self._lock:
+            if self._seconds[slot] != second:
+                self._seconds[slot] = second
+                self._counts[slot] = 0
+            self._counts[slot] += count
+
+    def rate(self) -> float:
+        now = int(time.time())
+        with self._lock:
+            total = sum(count for count, second in zip(self._counts, self._seconds)
+                        if now - second < self.window)
+        return total / self.window
+
+
+class QueryTimerCollector:
+    """Exports QueryTimer latency histograms, *_ERROR counts, phase times and row volume."""
+
+    def __init__(self, timer, prefix: str = 'polymarket_query'):
+        self.timer = timer
+        self.prefix = prefix
+
+    def render(self) -> List[str]:
+        buckets, histograms = self.timer.get_histograms()
+        duration_name = f'{self.prefix}_duration_seconds'
+        errors_name = f'{self.prefix}_errors_total'
+        lines = [f'# HELP {duration_name} SQL execution time by query key',
+                 f'# TYPE {duration_name} histogram']
+        errors = []
+        for query_key, (counts, total) in histograms.items():
+            if query_key.endswith('_ERROR'):
+                errors.append((query_key[:-len('_ERROR')], sum(counts)))
+                continue
+            lines.extend(render_histogram_samples(duration_name, ('query_key',), (query_key,),
+                                                  buckets, counts, total))
+        lines.append(f'# HELP {errors_name} Failed SQL executions by query key')
+        lines.append(f'# TYPE {errors_name} counter')
+        for query_key, count in errors:
+            lines.append(f'{errors_name}{_format_labels(("query_key",), (query_key,))} {count}')
+        
+        phase_name = f'{self.prefix}_phase_seconds_total'
+        rows_name = f'{self.prefix}_rows_total'
+        bytes_name = f'{self.prefix}_bytes_total'
+        totals = self.timer.get_phase_totals()
+        lines.append(f'# HELP {phase_name} Time spent fetching and transforming rows by query key')
+        lines.append(f'# TYPE {phase_name} counter')
+        for query_key, entry in totals.items():
+            for phase, (_, total) in entry['phases'].items():
+                lines.append(f'{phase_name}{_format_labels(("query_key", "phase"), (query_key, phase))} {total}')
+        lines.append(f'# HELP {rows_name} Rows fetched by query key')
+        lines.append(f'# TYPE {rows_name} counter')
+        for query_key, entry in totals.items():
+            lines.append(f'{rows_name}{_format_labels(("query_key",), (query_key,))} {entry["rows"]}')
+        lines.append(f'# HELP {bytes_name} Approximate bytes fetched by query key')
+        lines.append(f'# TYPE {bytes_name} counter')
+        for query_key, entry in totals.items():
+            lines.append(f'{bytes_name}{_format_labels(("query_key",), (query_key,))} {entry["bytes"]}')
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def register(self, collector):
+        """Register a metric or any object with a render() -> List[str] method."""
+        with self._lock:
+            self._collectors.append(collector)
+        return collector
+
+    def counter(self, name: str, documentation: str, label_names: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, label_names))
+
+    def histogram(self, name: str, documentation: str, label_names: Iterable[str] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, label_names, buckets))
+
+    def gauge(self, name: str, documentation: str, callback: Callable[[], float]) -> Gauge:
+        return self.register(Gauge(name, documentation, callback))
+
+    def render(self) -> str:
+        """Render every registered collector in Prometheus text exposition format."""
+        with self._lock:
+            collectors = list(self._collectors)
+        lines = []
+        for collector in collectors:
+            lines.extend(collector.render())
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the pure-Python code that runs per row or per request.
+
+Covers the odds post-processing in calculate_market_odds, the unrealized-gains
+kernels behind /api/user-holdings and /api/user-profits (per holding, and the
+int64 batch valuation of the bet store's leaderboard), building fetched rows
+into record types (and the per-row dicts of a dictionary cursor), JSON serialization of
+the bet-history and leaderboard payloads (the configured encoder, the stdlib
+fallback, and the old convert-then-encode path for reference), JWT decoding
+(and its token cache hit) and QueryTimer.time_query overhead. Inputs come
+from fixed seeds and sizes, so runs are comparable. Results are compared with
+a baseline recorded on the same machine and the script exits non-zero when a
+benchmark regresses. Timings do not carry over between machines, so the
+baseline is not committed: the first run on a machine must --save-baseline.
+
+No database is needed: the kernels run on synthetic rows shaped like the
+MySQL results.
+
+Usage:
+    python3 micro_bench.py --save-baseline       # record this machine's baseline (first run)
+    python3 micro_bench.py                       # run and compare with the baseline
+    python3 micro_bench.py --only holdings --repeats 50
+"""
+
+import gc
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import statistics
+import platform
+from decimal import Decimal
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Sequence
+
+# Importing app must not start the warm-up thread or need MySQL
+os.environ.setdefault('WARMUP_ENABLED', 'false')
+os.environ.setdefault('SLOW_QUERY_THRESHOLD_MS', '0')
+
+import jwt
+import numpy as np
+from mysql.connector.constants import FieldType
+import app as polymarket_app
+from query_timer import QueryTimer
+from market_math import odds_from_volumes, apply_holding_gains, unrealized_gains_total
+from fixed_point import odds_bps_array, value_cents_array
+from flask.json.provider import DefaultJSONProvider
+from serializer import FastJSONProvider
+from row_types import RowTypes
+
+BENCHMARK_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks')
+DEFAULT_BASELINE = os.path.join(BENCHMARK_DIR, 'micro_baseline.json')
+
+SEED = 348
+
+class StaticCursor:
+    """Cursor stand-in that returns the same rows (tuples, as a plain cursor does) for every query"""
+
+    def __init__(self, rows: List[Any], column_names: Sequence[str] = (), decimal_columns: Sequence[str] = ()):
+        self.rows = rows
+        self.rowcount = len(rows)
+        self.column_names = tuple(column_names)
+        self.description = [(name, FieldType.NEWDECIMAL if name in decimal_columns else FieldType.VAR_STRING)
+                            for name in column_names]
+
+    def execute(self, sql_query, params=None):
+        return None
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def fetchall(self):
+        return list(self.rows)
+
+class Benchmark:
+    """
+    A kernel timed over `size` items.
+
+    setup(rng) builds fresh input before every repeat (kernels mutate rows in
+    place), and only run(state) is timed.
+    """
+
+    def __init__(self, name: str, size: int, setup: Callable[[random.Random], Any], run: Callable[[Any], Any]):
+        self.name = name
+        self.size = size
+        self.setup = setup
+        self.run = run
+
+    def measure(self, repeats: int) -> Dict[str, float]:
+        rng = random.Random(SEED)
+        times = []
+        for _ in range(repeats):
+            state = self.setup(rng)
+            gc.collect()
+            gc.disable()
+            try:
+                start = time.perf_counter()
+                self.run(state)
+                times.append(time.perf_counter() - start)
+            finally:
+                gc.enable()
+        # The fastest repeat is the least disturbed by other load, so it is what gets compared
+        return {
+            'size': self.size,
+            'repeats': repeats,
+            'median_s': statistics.median(times),
+            'min_s': min(times),
+            'per_item_us': min(times) / self.size * 1e6,
+        }
+
+def _decimal(rng: random.Random, low: float, high: float, places: int = 2) -> Decimal:
+    return Decimal(f"{rng.uniform(low, high):.{places}f}")
+
+def _datetime(rng: random.Random) -> datetime:
+    return datetime(2025, 1, 1) + timedelta(seconds=rng.randrange(365 * 24 * 3600))
+
+# Columns of markets.get_market_bets
+MARKET_BET_COLUMNS = ('bId', 'uId', 'mId', 'podd', 'amt', 'yes', 'createdAt', 'uname')
+
+def make_bet_rows(rng: random.Random, count: int) -> List[Dict[str, Any]]:
+    return [{'bId': i, 'uId': rng.randrange(1000), 'mId': rng.randrange(200), 'podd': _decimal(rng, 0.01, 0.99),
+             'amt': _decimal(rng, -50, 500), 'yes': rng.random() < 0.5, 'createdAt': _datetime(rng)}
+            for i in range(count)]
+
+def make_holding_rows(rng: random.Random, count: int) -> List[Dict[str, Any]]:
+    rows = []
+    for i in range(count):
+        bought = _decimal(rng, 1, 2000, 6)
+        sold = _decimal(rng, 0, float(bought), 6)
+        rows.append({'uId': 1, 'mId': i, 'yes': rng.randrange(2), 'market_name': f"Market {i}",
+                     'bought_units': bought, 'sold_units': sold, 'net_units': bought - sold,
+                     'total_invested': _decimal(rng, 0, 1000), 'avg_buy_price_per_unit': _decimal(rng, 0.01, 0.99, 6)})
+    return rows
+
+def bench_odds_from_volumes(size: int) -> Benchmark:
+    def setup(rng):
+        return [(round(rng.uniform(0, 5000), 2), round(rng.uniform(0, 5000), 2)) for _ in range(size)]
+    def run(volumes):
+        for yes_volume, no_volume in volumes:
+            odds_from_volumes(yes_volume, no_volume)
+    return Benchmark('odds_from_volumes', size, setup, run)
+
+def bench_calculate_market_odds(size: int) -> Benchmark:
+    """Full per-market odds path minus MySQL: timed execute, timed fetch, Decimal conversion"""
+    def setup(rng):
+        # Keep the shared timer's sample lists from growing across repeats
+        polymarket_app.query_timer.reset_stats()
+        columns = ('yes_volume', 'no_volume')
+        return [StaticCursor([(_decimal(rng, 0, 5000), _decimal(rng, 0, 5000))], columns, columns)
+                for _ in range(size)]
+    def run(cursors):
+        for market_id, cursor in enumerate(cursors):
+            polymarket_app.calculate_market_odds(market_id, cursor)
+    return Benchmark('calculate_market_odds', size, setup, run)
+
+def bench_holdings(size: int) -> Benchmark:
+    def setup(rng):
+        return make_holding_rows(rng, size), [round(rng.uniform(0.01, 0.99), 2) for _ in range(size)]
+    def run(state):
+        holdings, holding_odds = state
+        for holding, current_odds in zip(holdings, holding_odds):
+            apply_holding_gains(holding, current_odds)
+    return Benchmark('holdings_unrealized_gains', size, setup, run)
+
+def bench_profits(users: int, holdings_per_user: int) -> Benchmark:
+    def setup(rng):
+        return [(make_holding_rows(rng, holdings_per_user), [round(rng.uniform(0.01, 0.99), 2) for _ in range(holdings_per_user)])
+                for _ in range(users)]
+    def run(per_user):
+        for holdings, holding_odds in per_user:
+            unrealized_gains_total(holdings, holding_odds)
+    return Benchmark('profits_unrealized_gains', users * holdings_per_user, setup, run)
+
+def bench_batch_valuation(size: int) -> Benchmark:
+    """Odds and value in cents of every held position at once, as bet_store.user_profits does"""
+    def setup(rng):
+        generator = np.random.default_rng(rng.randrange(2 ** 32))
+        return (generator.integers(0, 500000, size), generator.integers(0, 500000, size),
+                generator.integers(1, 2000 * 10 ** 6, size), generator.random(size) < 0.5)
+    def run(state):
+        yes_cents, no_cents, units, is_yes = state
+        value_cents_array(units, is_yes, odds_bps_array(yes_cents, no_cents))
+    return Benchmark('batch_position_valuation', size, setup, run)
+
+def make_market_bet_tuples(rng: random.Random, count: int) -> List[tuple]:
+    """markets.get_market_bets rows as a plain cursor returns them"""
+    return [(i, rng.randrange(1000), 7, _decimal(rng, 0.01, 0.99), _decimal(rng, -50, 500), rng.randrange(2),
+             _datetime(rng), f"user{rng.randrange(1000)}") for i in range(count)]
+
+def bench_build_rows(size: int) -> List[Benchmark]:
+    """Turning fetched tuples into rows: generated record types, and the per-row dicts of a dictionary cursor"""
+    row_types = RowTypes()
+    setup = lambda rng: StaticCursor(make_market_bet_tuples(rng, size), MARKET_BET_COLUMNS, ('podd', 'amt'))
+    def run_dicts(cursor):
+        columns = cursor.column_names
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+    return [
+        Benchmark('build_rows_records', size, setup,
+                  lambda cursor: row_types.wrap('markets.get_market_bets', cursor, cursor.fetchall())),
+        Benchmark('build_rows_dicts', size, setup, run_dicts),
+    ]
+
+def make_leaderboard_rows(rng: random.Random, count: int) -> List[Dict[str, Any]]:
+    """Rows shaped like user_profits() results for /api/user-profits"""
+    rows = []
+    for i in range(count):
+        realized, unrealized = rng.uniform(-500, 500), rng.uniform(-500, 500)
+        rows.append({'uid': i, 'uname': f"user{i}", 'current_balance': float(_decimal(rng, 0, 10000)),
+                     'realized_gains': realized, 'unrealized_gains': unrealized,
+                     'total_profits': realized + unrealized, 'percent_change': rng.uniform(-100, 100)})
+    return rows
+
+def _bet_history(rng: random.Random, size: int) -> Dict[str, Any]:
+    """/api/user-bets payload with rows as fetched (Decimal and datetime columns)"""
+    bets = make_bet_rows(rng, size)
+    for bet in bets:
+        bet['market_name'] = f"Market {bet['mId']}"
+    return {'success': True, 'bets': bets, 'count': size}
+
+def _bet_history_records(rng: random.Random, size: int) -> Dict[str, Any]:
+    """_bet_history with the record rows the handlers now return"""
+    payload = _bet_history(rng, size)
+    columns = ('bId', 'mId', 'market_name', 'podd', 'amt', 'yes', 'createdAt')
+    cursor = StaticCursor([tuple(bet[column] for column in columns) for bet in payload['bets']], columns,
+                          ('podd', 'amt'))
+    payload['bets'] = RowTypes().wrap('bets.get_user_bets', cursor, cursor.fetchall())
+    return payload
+
+def _legacy_bet_history(payload: Dict[str, Any]) -> str:
+    """The path the serializer replaced: convert every row in Python, then Flask's stdlib encoder"""
+    for bet in payload['bets']:
+        bet['podd'] = float(bet['podd'])
+        bet['amt'] = float(bet['amt'])
+        bet['createdAt'] = bet['createdAt'].isoformat()
+    return DefaultJSONProvider(polymarket_app.app).dumps(payload)
+
+def bench_serialize_bet_history(size: int) -> List[Benchmark]:
+    stdlib = FastJSONProvider(polymarket_app.app, 'stdlib')
+    setup = lambda rng: _bet_history(rng, size)
+    return [
+        Benchmark('serialize_bet_history', size, setup, polymarket_app.app.json.dumps),
+        Benchmark('serialize_bet_history_records', size, lambda rng: _bet_history_records(rng, size),
+                  polymarket_app.app.json.dumps),
+        Benchmark('serialize_bet_history_stdlib', size, setup, stdlib.dumps),
+        Benchmark('serialize_bet_history_legacy', size, setup, _legacy_bet_history),
+    ]
+
+def bench_serialize_leaderboard(size: int) -> List[Benchmark]:
+    stdlib = FastJSONProvider(polymarket_app.app, 'stdlib')
+    setup = lambda rng: {'success': True, 'users': make_leaderboard_rows(rng, size)}
+    return [
+        Benchmark('serialize_leaderboard', size, setup, polymarket_app.app.json.dumps),
+        Benchmark('serialize_leaderboard_stdlib', size, setup, stdlib.dumps),
+    ]
+
+def _make_tokens(rng: random.Random, size: int) -> List[str]:
+    expires = datetime.now(timezone.utc) + timedelta(days=1)
+    return [jwt.encode({'user_id': rng.randrange(1, 10000), 'username': f"user{i}", 'exp': expires},
+                       polymarket_app.app.config['SECRET_KEY'], algorithm='HS256') for i in range(size)]
+
+def bench_jwt_decode(size: int) -> Benchmark:
+    def run(tokens):
+        for token in tokens:
+            jwt.decode(token, polymarket_app.app.config['SECRET_KEY'], algorithms=['HS256'])
+    return Benchmark('jwt_decode', size, lambda rng: _make_tokens(rng, size), run)
+
+def bench_decode_token(size: int) -> Benchmark:
+    """decode_token for tokens already verified once: a token cache hit instead of jwt_decode"""
+    def setup(rng):
+        polymarket_app.token_cache.clear()
+        tokens = _make_tokens(rng, size)
+        for token in tokens:
+            polymarket_app.decode_token(token)
+        return tokens
+    def run(tokens):
+        for token in tokens:
+            polymarket_app.decode_token(token)
+    return Benchmark('decode_token_cached', size, setup, run)
+
+def bench_get_user_from_token(size: int) -> Benchmark:
+    """
+    Header parsing and decode as done for optional auth, inside a request
+    context. Repeats after the first are answered from the token cache, as a
+    client's later requests are.
+    """
+    def setup(rng):
+        polymarket_app.token_cache.clear()
+        contexts = [polymarket_app.app.test_request_context(headers={'Authorization': f"Bearer {token}"})
+                    for token in _make_tokens(rng, size)]
+        return contexts
+    def run(contexts):
+        for context in contexts:
+            context.push()
+            try:
+                polymarket_app.get_user_from_token()
+            finally:
+                context.pop()
+    return Benchmark('get_user_from_token', size, setup, run)
+
+def bench_time_query(size: int) -> Benchmark:
+    """QueryTimer.time_query around a cursor whose execute does nothing"""
+    def setup(rng):
+        return QueryTimer(), StaticCursor([])
+    def run(state):
+        timer, cursor = state
+        for _ in range(size):
+            timer.time_query(cursor, 'bench.noop', 'SELECT 1', (1,))
+    return Benchmark('query_timer_time_query', size, setup, run)
+
+def bench_bare_execute(size: int) -> Benchmark:
+    """Reference for bench_time_query: the same cursor called directly"""
+    def setup(rng):
+        return StaticCursor([])
+    def run(cursor):
+        for _ in range(size):
+            cursor.execute('SELECT 1', (1,))
+    return Benchmark('bare_cursor_execute', size, setup, run)
+
+def all_benchmarks() -> List[Benchmark]:
+    return [
+        bench_odds_from_volumes(10000),
+        bench_calculate_market_odds(2000),
+        bench_holdings(2000),
+        bench_profits(200, 20),
+        bench_batch_valuation(100000),
+        *bench_build_rows(5000),
+        *bench_serialize_bet_history(5000),
+        *bench_serialize_leaderboard(2000),
+        bench_jwt_decode(1000),
+        bench_decode_token(1000),
+        bench_get_user_from_token(1000),
+        bench_time_query(10000),
+        bench_bare_execute(10000),
+    ]
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Print per-benchmark change against the baseline and return the names that regressed"""
+    regressions = []
+    print(f"\n{'Benchmark':<28} {'baseline us':>12} {'current us':>12} {'change':>9}")
+    print('-' * 64)
+    for name, result in results.items():
+        base = baseline['results'].get(name)
+        if not base:
+            print(f"{name:<28} {'-':>12} {result['per_item_us']:>12.3f} {'new':>9}")
+            continue
+        change = result['per_item_us'] / base['per_item_us'] - 1 if base['per_item_us'] else 0.0
+        flag = ''
+        if change > threshold:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        print(f"{name:<28} {base['per_item_us']:>12.3f} {result['per_item_us']:>12.3f} {change * 100:>+8.1f}%{flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the Python hot-kernel micro-benchmarks")
+    parser.add_argument('--repeats', type=int, default=20, help="Timed repeats per benchmark")
+    parser.add_argument('--only', help="Run only benchmarks whose name contains this text")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="Baseline JSON to compare with or save to")
+    parser.add_argument('--save-baseline', action='store_true', help="Write the results as the new baseline")
+    parser.add_argument('--threshold', type=float, default=0.3,
+                        help="Fractional slowdown of the best per-item time that counts as a regression")
+    parser.add_argument('--output', help="Also write the results JSON here")
+    args = parser.parse_args()
+
+    benchmarks = [bench for bench in all_benchmarks() if not args.only or args.only in bench.name]
+    results = {}
+    for bench in benchmarks:
+        results[bench.name] = bench.measure(args.repeats)
+        print(f"{bench.name:<28} {results[bench.name]['per_item_us']:>10.3f} us/item "
+              f"({bench.size} items, best of {args.repeats})")
+
+    report = {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'seed': SEED,
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nBaseline saved to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to record one on this machine")
+        return
+    with open(args.baseline, 'r') as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} benchmark(s) regressed by more than {args.threshold * 100:.0f}%: {', '.join(regressions)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Precomputed odds candles
+
+market_odds_rollups holds open/high/low/close odds, YES/NO volume and bet
+count per market at 1m, 1h and 1d resolution. The rollupOddsOnBet trigger
+updates the three candles a bet falls into as it is inserted, so
+/markets/<id>/history reads at most a few hundred rows per point instead of
+scanning the market's bets.
+
+Usage:
+    python3 odds_rollups.py install    # create table and trigger if missing, then rebuild
+    python3 odds_rollups.py rebuild    # recompute every candle from bets (e.g. after a bulk load)
+    python3 odds_rollups.py check      # compare the candles' totals with the bets table
+"""
+
+import os
+import sys
+import argparse
+
+import mysql.connector
+from mysql.connector import Error
+from dotenv import load_dotenv
+from sql_loader import SQLLoader
+from candles import RESOLUTIONS, format_interval
+
+load_dotenv()
+
+DB_CONFIG = {
+    'host': os.getenv('DB_HOST', '127.0.0.1'),
+    'user': os.getenv('DB_USER', 'polymarket'),
+    'password': os.getenv('DB_PASSWORD'),
+    'database': os.getenv('DB_DATABASE', 'polymarket')
+}
+
+TRIGGER = 'rollupOddsOnBet'
+
+sql_loader = SQLLoader()
+
+def get_db_connection():
+    try:
+        connection = mysql.connector.connect(**DB_CONFIG)
+        connection.autocommit = False
+        return connection
+    except Error as e:
+        print(f"Error connecting to MySQL: {e}")
+        return None
+
+def create_table(cursor):
+    """market_odds_rollups as in schema.sql, for databases created before it existed"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS market_odds_rollups (
+            mId INT NOT NULL,
+            resolution INT NOT NULL,
+            bucket_start BIGINT NOT NULL,
+            open DECIMAL(3, 2) NOT NULL,
+            high DECIMAL(3, 2) NOT NULL,
+            low DECIMAL(3, 2) NOT NULL,
+            close DECIMAL(3, 2) NOT NULL,
+            open_ts BIGINT NOT NULL,
+            close_ts BIGINT NOT NULL,
+            yes_volume DECIMAL(15, 2) NOT NULL,
+            no_volume DECIMAL(15, 2) NOT NULL,
+            bet_count INT NOT NULL,
+            PRIMARY KEY (mId, resolution, bucket_start),
+            FOREIGN KEY (mId) REFERENCES markets(mid) ON DELETE CASCADE ON UPDATE CASCADE
+        )
+    """)
+
+def install_trigger(cursor):
+    cursor.execute(f"DROP TRIGGER IF EXISTS `{TRIGGER}`")
+    cursor.execute(sql_loader.get_query('bets.odds_rollup_trigger'))
+
+def rebuild(connection) -> int:
+    """
+    Recompute every candle from bets in one transaction.
+    Returns the number of candles written.
+    """
+    cursor = connection.cursor()
+    try:
+        cursor.execute("DELETE FROM market_odds_rollups")
+        for resolution in RESOLUTIONS:
+            cursor.execute(sql_loader.get_query('markets.rebuild_odds_rollups'), (resolution, resolution))
+        connection.commit()
+        cursor.execute("SELECT COUNT(*) FROM market_odds_rollups")
+        return cursor.fetchone()[0]
+    except Error:
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
+
+def check(connection) -> bool:
+    """Every resolution should account for each market's bets and traded volume exactly once"""
+    cursor = connection.cursor()
+    cursor.execute("""
+        SELECT mId, COUNT(*), SUM(CASE WHEN yes = 1 THEN ABS(amt) ELSE 0 END),
+               SUM(CASE WHEN yes = 0 THEN ABS(amt) ELSE 0 END), MIN(podd), MAX(podd)
+        FROM bets GROUP BY mId
+    """)
+    expected = {row[0]: row[1:] for row in cursor.fetchall()}
+
+    ok = True
+    for resolution in RESOLUTIONS:
+        cursor.execute("""
+            SELECT mId, SUM(bet_count), SUM(yes_volume), SUM(no_volume), MIN(low), MAX(high)
+            FROM market_odds_rollups WHERE resolution = %s GROUP BY mId
+        """, (resolution,))
+        actual = {row[0]: row[1:] for row in cursor.fetchall()}
+        differing = [market_id for market_id in expected.keys() | actual.keys()
+                     if expected.get(market_id) != actual.get(market_id)]
+        name = format_interval(resolution)
+        if differing:
+            ok = False
+            shown = ', '.join(str(market_id) for market_id in sorted(differing)[:10])
+            print(f"✗ {name}: {len(differing)} markets differ from bets (e.g. {shown})")
+        else:
+            print(f"✓ {name}: {len(actual)} markets match bets")
+    cursor.close()
+    if ok:
+        print("✅ Candles match the bets table")
+    return ok
+
+def main():
+    parser = argparse.ArgumentParser(description="Install, rebuild or check the precomputed odds candles")
+    parser.add_argument('command', choices=['install', 'rebuild', 'check'])
+    args = parser.parse_args()
+
+    connection = get_db_connection()
+    if not connection:
+        sys.exit(1)
+    try:
+        if args.command == 'install':
+            cursor = connection.cursor()
+            create_table(cursor)
+            install_trigger(cursor)
+            cursor.close()
+            print(f"Installed market_odds_rollups and trigger {TRIGGER}")
+        if args.command in ('install', 'rebuild'):
+            print(f"Rebuilt {rebuild(connection)} odds candles")
+        if args.command == 'check' and not check(connection):
+            sys.exit(1)
+    except Error as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    finally:
+        connection.close()
+
+if __name__ == "__main__":
+    main()
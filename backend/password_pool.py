@@ -0,0 +1,131 @@
+import time
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Union
+
+import bcrypt
+
+# bcrypt.gensalt()'s default cost
+DEFAULT_ROUNDS = 12
+
+class PasswordPoolFull(Exception):
+    """Raised when every worker is busy and the queue is at its limit"""
+
+def hash_rounds(hashed: Union[str, bytes]) -> Optional[int]:
+    """The cost factor of a '$2b$12$...' hash, or None if it is not a bcrypt hash"""
+    if isinstance(hashed, bytes):
+        hashed = hashed.decode('ascii', 'replace')
+    parts = hashed.split('$')
+    if len(parts) < 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+def _encode(value: Union[str, bytes]) -> bytes:
+    return value.encode('utf-8') if isinstance(value, str) else value
+
+class PasswordHasher:
+    """
+    bcrypt hashing and checking on a bounded pool of worker threads, off the
+    request threads. bcrypt releases the GIL while it hashes, so `workers`
+    threads use up to that many cores and no more.
+
+    At most workers + max_queue operations are accepted at once; beyond that
+    hash() and check() raise PasswordPoolFull instead of queueing, so a burst
+    of logins is turned away rather than holding every request thread.
+
+    New hashes use `rounds`. needs_rehash() tells whether a stored hash was made
+    with a different cost, so it can be replaced after the next successful login.
+
+    observer, if given, is called as observer(operation, queued_seconds,
+    hash_seconds) for every completed 'hash' or 'check'.
+    """
+
+    def __init__(self, workers: int = 2, max_queue: int = 32, rounds: int = DEFAULT_ROUNDS,
+                 observer: Optional[Callable[[str, float, float], None]] = None):
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        if not 4 <= rounds <= 31:
+            raise ValueError("rounds must be between 4 and 31")
+        self.workers = workers
+        self.max_queue = max_queue
+        self.rounds = rounds
+        self.observer = observer
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+        self._slots = threading.BoundedSemaphore(workers + max_queue)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._stats = {'hash': 0, 'check': 0, 'rejected': 0}
+
+    def _run(self, operation: str, fn: Callable[[], Union[bytes, bool]], submitted: float) -> Union[bytes, bool]:
+        started = time.perf_counter()
+        try:
+            return fn()
+        finally:
+            finished = time.perf_counter()
+            with self._lock:
+                self._stats[operation] += 1
+            if self.observer:
+                self.observer(operation, started - submitted, finished - started)
+
+    def _submit(self, operation: str, fn: Callable[[], Union[bytes, bool]]) -> Future:
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._stats['rejected'] += 1
+            raise PasswordPoolFull(f"Password {operation} queue is full")
+        with self._lock:
+            self._in_flight += 1
+        try:
+            future = self._executor.submit(self._run, operation, fn, time.perf_counter())
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(lambda _: self._release())
+        return future
+
+    def _release(self):
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    def hash_async(self, password: Union[str, bytes]) -> 'Future[bytes]':
+        """
+        Hash a password at the current cost in the pool.
+
+        Raises:
+            PasswordPoolFull: if the pool is saturated
+        """
+        password = _encode(password)
+        return self._submit('hash', lambda: bcrypt.hashpw(password, bcrypt.gensalt(self.rounds)))
+
+    def hash(self, password: Union[str, bytes]) -> str:
+        """hash_async, waiting for the result; the hash is returned as text for the passwordHash column"""
+        return self.hash_async(password).result().decode('utf-8')
+
+    def check(self, password: Union[str, bytes], hashed: Union[str, bytes]) -> bool:
+        """
+        Whether password matches a stored bcrypt hash, checked in the pool.
+
+        Raises:
+            PasswordPoolFull: if the pool is saturated
+            ValueError: if hashed is not a bcrypt hash
+        """
+        password, hashed = _encode(password), _encode(hashed)
+        return self._submit('check', lambda: bcrypt.checkpw(password, hashed)).result()
+
+    def needs_rehash(self, hashed: Union[str, bytes]) -> bool:
+        """Whether a stored hash was made with a cost other than the current one"""
+        rounds = hash_rounds(hashed)
+        return rounds is not None and rounds != self.rounds
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._stats, workers=self.workers, max_queue=self.max_queue, rounds=self.rounds,
+                        in_flight=self._in_flight)
+
+    def queue_depth(self) -> float:
+        """Operations waiting for a worker"""
+        with self._lock:
+            return float(max(0, self._in_flight - self.workers))
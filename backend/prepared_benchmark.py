@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark server-side prepared statements against plain execution.
+
+For every read query in sql/ that has sample parameters, runs it repeatedly
+as plain text (parsed and planned by MySQL on each call) and through
+SQLLoader's prepared-statement path on the same connection, and reports the
+median time saved per key. The prepared timings include the extra round trip
+that binds the parameters, so the saving shown is what the app would see.
+
+Usage:
+    python3 prepared_benchmark.py [--runs 50] [--keys bets.get_user_holdings,...]
+"""
+
+import time
+import argparse
+import statistics
+
+import mysql.connector
+from mysql.connector import Error
+import os
+from dotenv import load_dotenv
+from sql_loader import SQLLoader
+from query_samples import collect_sample_ids, sample_params, is_read_only
+
+load_dotenv()
+
+DB_CONFIG = {
+    'host': os.getenv('DB_HOST', '127.0.0.1'),
+    'user': os.getenv('DB_USER', 'polymarket'),
+    'password': os.getenv('DB_PASSWORD'),
+    'database': os.getenv('DB_DATABASE', 'polymarket')
+}
+
+def get_db_connection():
+    try:
+        connection = mysql.connector.connect(**DB_CONFIG)
+        connection.autocommit = True
+        return connection
+    except Error as e:
+        print(f"Error connecting to MySQL: {e}")
+        return None
+
+def time_runs(cursor, run, runs: int) -> float:
+    """Median seconds of run() followed by fetching its result"""
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        run()
+        cursor.fetchall()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare prepared and plain execution per query key")
+    parser.add_argument('--runs', type=int, default=50, help="Executions per key and mode")
+    parser.add_argument('--keys', help="Comma-separated query keys (default: every read query)")
+    args = parser.parse_args()
+
+    plain = SQLLoader()
+    prepared = SQLLoader(prepared_keys=['*'])
+    keys = args.keys.split(',') if args.keys else sorted(plain.list_queries())
+
+    connection = get_db_connection()
+    if not connection:
+        return
+
+    try:
+        cursor = connection.cursor()
+        samples = collect_sample_ids(cursor)
+        cursor.close()
+
+        cursor = connection.cursor(dictionary=True)
+        results = []
+        for query_key in keys:
+            sql_query = plain.get_query(query_key)
+            if not is_read_only(sql_query) or not prepared.is_prepared(query_key):
+                continue
+            params = sample_params(query_key, sql_query, samples)
+            if params is None:
+                print(f"Skipping {query_key}: no sample parameters")
+                continue
+
+            # Warm the buffer pool and compile the statement before timing either mode
+            plain.execute(cursor, query_key, params)
+            cursor.fetchall()
+            prepared.execute(cursor, query_key, params)
+            cursor.fetchall()
+
+            plain_time = time_runs(cursor, lambda: plain.execute(cursor, query_key, params), args.runs)
+            prepared_time = time_runs(cursor, lambda: prepared.execute(cursor, query_key, params), args.runs)
+            results.append((query_key, plain_time, prepared_time))
+        cursor.close()
+    finally:
+        connection.close()
+
+    print(f"\n{'Query':<55} {'plain (ms)':>11} {'prepared (ms)':>14} {'saved (ms)':>11} {'saved':>7}")
+    print('-' * 102)
+    for query_key, plain_time, prepared_time in sorted(results, key=lambda r: r[1] - r[2], reverse=True):
+        saved = plain_time - prepared_time
+        print(f"{query_key:<55} {plain_time * 1000:>11.3f} {prepared_time * 1000:>14.3f} "
+              f"{saved * 1000:>11.3f} {saved / plain_time * 100 if plain_time else 0:>6.1f}%")
+    print("\nNegative savings mean the extra parameter-binding round trip outweighs parse/plan time;")
+    print("leave those keys out of PREPARED_QUERY_KEYS.")
+
+if __name__ == "__main__":
+    main()
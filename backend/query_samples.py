@@ -0,0 +1,134 @@
+"""
+Representative parameters for the parameterised queries in sql/, and helpers
+for reading their EXPLAIN plans.
+
+Tools that need to EXPLAIN or benchmark statements outside of a request
+(index advisor, query benchmarks) use these so every run targets the same
+realistic rows: the busiest market, the most active bettor, and so on.
+"""
+
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from mysql.connector import Error
+
+# Statement types that only read and can be re-run safely
+READ_ONLY_PREFIXES = ('SELECT', 'WITH')
+
+# How to build the parameters of each query key from the sample row ids
+SAMPLE_PARAMS = {
+    'auth.check_username_exists': lambda s: (s['uname'],),
+    'auth.get_user_by_username': lambda s: (s['uname'],),
+    'auth.check_email_exists': lambda s: (s['email'],),
+    'markets.get_market_by_id': lambda s: (s['mid'],),
+    'markets.get_market_bets': lambda s: (s['mid'],),
+    'markets.get_market_volume_distribution': lambda s: (s['mid'],),
+    'markets.get_market_volume_distribution_excluding_user': lambda s: (s['mid'], s['uid']),
+    'markets.get_markets_by_ids': lambda s: (f"[{s['mid']}]",),
+    'markets.get_market_volume_distributions': lambda s: (f"[{s['mid']}]",),
+    'markets.get_market_volume_distributions_excluding_user': lambda s: (f"[{s['mid']}]", s['uid']),
+    'markets.get_trending_markets': lambda s: (100,),
+    'markets.get_trending_markets_rescan': lambda s: (100,),
+    'markets.get_untrended_markets': lambda s: (100,),
+    'markets.get_odds_candles_from_bets': lambda s: (3600, s['mid'], 0, 2 ** 31),
+    'bets.get_all_market_bets': lambda s: (s['mid'],),
+    'bets.get_user_balance': lambda s: (s['uid'],),
+    'bets.get_user_bets': lambda s: (s['uid'],),
+    'bets.get_user_holdings': lambda s: (s['uid'],),
+    'comments.get_threaded_comments': lambda s: (s['comment_mid'], s['comment_mid']),
+    'validation.check_market_exists': lambda s: (s['mid'],),
+    'validation.check_market_active': lambda s: (s['mid'],),
+    'validation.check_user_exists': lambda s: (s['uid'],),
+    'validation.check_comment_exists_in_market': lambda s: (s['cid'], s['comment_mid']),
+}
+
+
+def is_read_only(sql_query: str) -> bool:
+    return sql_query.lstrip().upper().startswith(READ_ONLY_PREFIXES)
+
+
+def collect_sample_ids(cursor) -> Dict[str, Any]:
+    """
+    Pick representative row ids from the current database.
+
+    Args:
+        cursor: Tuple (non-dictionary) cursor
+
+    Returns:
+        Dictionary with mid, uid, uname, email, cid and comment_mid
+    """
+    samples = {'mid': 1, 'uid': 1, 'uname': '', 'email': '', 'cid': 1, 'comment_mid': 1}
+
+    cursor.execute("SELECT mId FROM bets GROUP BY mId ORDER BY COUNT(*) DESC LIMIT 1")
+    row = cursor.fetchone()
+    if row:
+        samples['mid'] = row[0]
+
+    cursor.execute("SELECT uId FROM bets GROUP BY uId ORDER BY COUNT(*) DESC LIMIT 1")
+    row = cursor.fetchone()
+    if row:
+        samples['uid'] = row[0]
+
+    cursor.execute("SELECT uname, email FROM users WHERE uid = %s", (samples['uid'],))
+    row = cursor.fetchone()
+    if row:
+        samples['uname'], samples['email'] = row
+
+    cursor.execute("SELECT mId FROM comments GROUP BY mId ORDER BY COUNT(*) DESC LIMIT 1")
+    row = cursor.fetchone()
+    if row:
+        samples['comment_mid'] = row[0]
+
+    cursor.execute("SELECT cId FROM comments WHERE mId = %s LIMIT 1", (samples['comment_mid'],))
+    row = cursor.fetchone()
+    if row:
+        samples['cid'] = row[0]
+
+    return samples
+
+
+def sample_params(query_key: str, sql_query: str, samples: Dict[str, Any]) -> Optional[Tuple]:
+    """
+    Return parameters to run query_key with, () if it takes none, or None
+    when no sample is defined for it.
+    """
+    if query_key in SAMPLE_PARAMS:
+        return SAMPLE_PARAMS[query_key](samples)
+    if '%s' not in sql_query:
+        return ()
+    return None
+
+
+def explain(cursor, sql_query: str, params: Tuple = ()) -> Optional[Dict[str, Any]]:
+    """Return the EXPLAIN FORMAT=JSON plan of a statement, or None if it cannot be explained"""
+    statement = sql_query.strip().rstrip(';')
+    try:
+        cursor.execute(f"EXPLAIN FORMAT=JSON {statement}", params or None)
+        row = cursor.fetchone()
+        return json.loads(row[0]) if row else None
+    except Error as e:
+        print(f"  EXPLAIN failed: {e}")
+        return None
+
+
+def plan_table_accesses(plan: Any, accesses: Optional[List[Dict[str, Any]]] = None, sorted_: bool = False) -> List[Dict[str, Any]]:
+    """Flatten an EXPLAIN FORMAT=JSON document into its table access nodes."""
+    if accesses is None:
+        accesses = []
+    if isinstance(plan, dict):
+        sorts = sorted_ or bool(plan.get('using_filesort')) or bool(plan.get('using_temporary_table'))
+        table = plan.get('table')
+        if isinstance(table, dict) and 'table_name' in table:
+            accesses.append({
+                'table': table['table_name'].lower(),
+                'access_type': table.get('access_type'),
+                'key': table.get('key'),
+                'rows': table.get('rows_examined_per_scan') or 0,
+                'filesort': sorts,
+            })
+        for key, value in plan.items():
+            plan_table_accesses(value, accesses, sorts)
+    elif isinstance(plan, list):
+        for value in plan:
+            plan_table_accesses(value, accesses, sorted_)
+    return accesses
@@ -1,17 +1,80 @@
 import time
 import threading
 from collections import defaultdict
-from typing import Dict, List, Tuple, Any
+from contextlib import contextmanager
+from typing import Dict, List, Tuple, Any, Callable, Optional
 import statistics
+from metrics import DEFAULT_BUCKETS, bucket_index
+
+# Rows sampled per result when estimating its size
+BYTES_SAMPLE_ROWS = 10
+
+def _value_size(value: Any) -> int:
+    if value is None:
+        return 1
+    if isinstance(value, (str, bytes, bytearray)):
+        return len(value)
+    # Numbers, Decimals and datetimes are all a handful of bytes on the wire
+    return 8
+
+def estimate_result_bytes(rows: List[Any]) -> int:
+    """
+    Approximate the payload size of a result set.
+    
+    Only the first BYTES_SAMPLE_ROWS rows are measured and the average is
+    extrapolated, so the cost stays constant regardless of result size.
+    """
+    if not rows:
+        return 0
+    sample = rows[:BYTES_SAMPLE_ROWS]
+    sampled = 0
+    for row in sample:
+        values = row.values() if isinstance(row, dict) else row
+        sampled += sum(_value_size(value) for value in values)
+    return sampled * len(rows) // len(sample)
 
 class QueryTimer:    
-    def __init__(self):
-        self._lock = threading.Lock()
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+                 slow_query_threshold: Optional[float] = None,
+                 slow_query_handler: Optional[Callable[[str, str, Any, float], None]] = None):
+        """
+        Args:
+            buckets: Upper bounds (seconds) of the exported latency histograms
+            slow_query_threshold: Execution time (seconds) at or above which
+                slow_query_handler is called; None disables it
+            slow_query_handler: Called as handler(query_key, sql_query, params,
+                execution_time) on the request thread, so it must not block
+        """
+        # Re-entrant so get_all_stats can call get_query_stats while holding it
+        self._lock = threading.RLock()
         self._query_times: Dict[str, List[float]] = defaultdict(list)
         self._total_queries = 0
         self._total_time = 0.0
+        # Pre-bucketed latencies so exporters never have to walk the raw samples
+        self._buckets = tuple(buckets)
+        self._histograms: Dict[str, list] = {}
+        # query_key -> phase -> [count, total_time]; execute lives in _query_times
+        self._phase_times: Dict[str, Dict[str, list]] = defaultdict(dict)
+        # query_key -> [rows returned, approximate bytes returned]
+        self._row_volume: Dict[str, list] = defaultdict(lambda: [0, 0])
+        self.slow_query_threshold = slow_query_threshold
+        self.slow_query_handler = slow_query_handler
     
-    def time_query(self, cursor, query_key: str, sql_query: str, params: Tuple = None) -> Any:
+    def _record(self, query_key: str, execution_time: float):
+        """Store one timing sample. Caller must hold self._lock."""
+        self._query_times[query_key].append(execution_time)
+        self._total_queries += 1
+        self._total_time += execution_time
+        
+        histogram = self._histograms.get(query_key)
+        if histogram is None:
+            histogram = [[0] * (len(self._buckets) + 1), 0.0]
+            self._histograms[query_key] = histogram
+        histogram[0][bucket_index(self._buckets, execution_time)] += 1
+        histogram[1] += execution_time
+    
+    def time_query(self, cursor, query_key: str, sql_query: str, params: Tuple = None,
+                   executor: Optional[Callable[[Any, str, Any], Any]] = None) -> Any:
         """
         Execute a query with timing and store the execution time.
         
@@ -20,6 +83,9 @@ class QueryTimer:
             query_key: Unique identifier for the query (e.g., 'auth.get_user_by_username')
             sql_query: The actual SQL query string
             params: Query parameters (optional)
+            executor: Runs the query as executor(cursor, query_key, params)
+                instead of cursor.execute (e.g. SQLLoader.execute for
+                prepared statements); its whole cost is timed
             
         Returns:
             Result of cursor.execute()
@@ -27,7 +93,9 @@ class QueryTimer:
         start_time = time.perf_counter()
         
         try:
-            if params:
+            if executor is not None:
+                result = executor(cursor, query_key, params)
+            elif params:
                 result = cursor.execute(sql_query, params)
             else:
                 result = cursor.execute(sql_query)
@@ -37,9 +105,11 @@ class QueryTimer:
             
             # Store timing data thread-safely
             with self._lock:
-                self._query_times[query_key].append(execution_time)
-                self._total_queries += 1
-                self._total_time += execution_time
+                self._record(query_key, execution_time)
+            
+            if (self.slow_query_handler is not None and self.slow_query_threshold is not None
+                    and execution_time >= self.slow_query_threshold):
+                self.slow_query_handler(query_key, sql_query, params, execution_time)
             
             return result
             
@@ -49,12 +119,87 @@ class QueryTimer:
             
             # Still record timing even for failed queries
             with self._lock:
-                self._query_times[f"{query_key}_ERROR"].append(execution_time)
-                self._total_queries += 1
-                self._total_time += execution_time
+                self._record(f"{query_key}_ERROR", execution_time)
             
             raise e
     
+    def _record_phase(self, query_key: str, phase: str, elapsed: float):
+        """Accumulate time spent in a non-execute phase. Caller must hold self._lock."""
+        totals = self._phase_times[query_key].get(phase)
+        if totals is None:
+            totals = [0, 0.0]
+            self._phase_times[query_key][phase] = totals
+        totals[0] += 1
+        totals[1] += elapsed
+    
+    def time_fetch(self, cursor, query_key: str, fetch_all: bool = True,
+                   row_factory: Optional[Callable[[str, Any, List[Any]], List[Any]]] = None) -> Any:
+        """
+        Fetch the result of an executed query, timing the fetch phase.
+        
+        With unbuffered cursors most of the transfer and Decimal/datetime
+        decoding happens here rather than in cursor.execute().
+        
+        Args:
+            cursor: Database cursor the query was executed on
+            query_key: Identifier of the query that produced the result
+            fetch_all: Use fetchall() when True, fetchone() otherwise
+            row_factory: Called as row_factory(query_key, cursor, rows) to turn the fetched
+                tuples into records; its time counts towards the fetch, as the
+                dictionary cursor's per-row dicts did
+            
+        Returns:
+            The list of rows, or a single row (or None) when fetch_all is False
+        """
+        start_time = time.perf_counter()
+        result = cursor.fetchall() if fetch_all else cursor.fetchone()
+        if fetch_all:
+            rows = result
+        else:
+            rows = [] if result is None else [result]
+        records = row_factory(query_key, cursor, rows) if row_factory is not None else rows
+        elapsed = time.perf_counter() - start_time
+        
+        row_count = len(rows)
+        approx_bytes = estimate_result_bytes(rows)
+        
+        with self._lock:
+            self._record_phase(query_key, 'fetch', elapsed)
+            volume = self._row_volume[query_key]
+            volume[0] += row_count
+            volume[1] += approx_bytes
+        
+        if fetch_all:
+            return records
+        return records[0] if records else None
+    
+    @contextmanager
+    def phase(self, query_key: str, phase: str = 'transform'):
+        """
+        Time a block of Python work on a query's rows, e.g. the Decimal to
+        float and datetime to isoformat conversion loops in the handlers.
+        
+        Args:
+            query_key: Identifier of the query whose rows are being processed
+            phase: Phase name to record the time under
+        """
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start_time
+            with self._lock:
+                self._record_phase(query_key, phase, elapsed)
+    
+    def _phase_stats(self, query_key: str, times: List[float]) -> Dict[str, Any]:
+        """Per-phase breakdown for a query key. Caller must hold self._lock."""
+        phases = {'execute': {'count': len(times), 'total_time': sum(times)}}
+        for phase, (count, total) in self._phase_times.get(query_key, {}).items():
+            phases[phase] = {'count': count, 'total_time': total}
+        for stats in phases.values():
+            stats['average_time'] = stats['total_time'] / stats['count'] if stats['count'] else 0.0
+        return phases
+    
     def get_query_stats(self, query_key: str) -> Dict[str, Any]:
         """
         Get statistics for a specific query.
@@ -67,6 +212,7 @@ class QueryTimer:
         """
         with self._lock:
             times = self._query_times.get(query_key, [])
+            rows, approx_bytes = self._row_volume.get(query_key, (0, 0))
             
             if not times:
                 return {
@@ -76,7 +222,10 @@ class QueryTimer:
                     'min_time': 0.0,
                     'max_time': 0.0,
                     'median_time': 0.0,
-                    'total_time': 0.0
+                    'total_time': 0.0,
+                    'phases': self._phase_stats(query_key, times),
+                    'rows_returned': rows,
+                    'approx_bytes_returned': approx_bytes
                 }
             
             return {
@@ -86,7 +235,10 @@ class QueryTimer:
                 'min_time': min(times),
                 'max_time': max(times),
                 'median_time': statistics.median(times),
-                'total_time': sum(times)
+                'total_time': sum(times),
+                'phases': self._phase_stats(query_key, times),
+                'rows_returned': rows,
+                'approx_bytes_returned': approx_bytes
             }
     
     def get_all_stats(self) -> Dict[str, Any]:
@@ -109,10 +261,48 @@ class QueryTimer:
             
             return stats
     
+    def get_histograms(self) -> Tuple[Tuple[float, ...], Dict[str, Tuple[List[int], float]]]:
+        """
+        Get a snapshot of the per-key latency histograms.
+        
+        This only copies the bucket counters, so it is cheap enough to call
+        on every metrics scrape.
+        
+        Returns:
+            Tuple of (bucket upper bounds, {query_key: (per-bucket counts with
+            a trailing +Inf slot, sum of execution times)})
+        """
+        with self._lock:
+            return self._buckets, {key: (list(counts), total)
+                                   for key, (counts, total) in self._histograms.items()}
+    
+    def get_phase_totals(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get cumulative fetch/transform times and row volume per query key.
+        
+        Like get_histograms, this only copies counters and is safe to scrape.
+        
+        Returns:
+            {query_key: {'phases': {phase: (count, total_time)}, 'rows': int, 'bytes': int}}
+        """
+        with self._lock:
+            keys = set(self._phase_times) | set(self._row_volume)
+            return {
+                key: {
+                    'phases': {phase: tuple(totals) for phase, totals in self._phase_times.get(key, {}).items()},
+                    'rows': self._row_volume[key][0] if key in self._row_volume else 0,
+                    'bytes': self._row_volume[key][1] if key in self._row_volume else 0,
+                }
+                for key in keys
+            }
+    
     def reset_stats(self):
         """Reset all timing statistics."""
         with self._lock:
             self._query_times.clear()
+            self._histograms.clear()
+            self._phase_times.clear()
+            self._row_volume.clear()
             self._total_queries = 0
             self._total_time = 0.0
     
\ No newline at end of file
@@ -0,0 +1,172 @@
+import time
+import random
+import threading
+import contextvars
+from collections import Counter, deque
+from typing import Any, Dict, List, Optional
+
+_current_trace: contextvars.ContextVar = contextvars.ContextVar('request_trace', default=None)
+
+
+class RequestTrace:
+    """Ordered record of the queries issued while serving one request."""
+
+    def __init__(self, method: str, route: str, path: str):
+        self.method = method
+        self.route = route
+        self.path = path
+        self.started_at = time.time()
+        self.status = None
+        self.duration = None
+        self.queries: List[Dict[str, Any]] = []
+        self.repeated_keys: Dict[str, int] = {}
+        self._start = time.perf_counter()
+        self._pending = None
+
+    def settle(self):
+        """
+        Fill in the row count of the previous query.
+
+        Rows are only known once the caller has fetched them, so this must run
+        before the same cursor executes its next statement.
+        """
+        if self._pending is None:
+            return
+        entry, cursor = self._pending
+        self._pending = None
+        try:
+            rowcount = cursor.rowcount
+        except Exception:
+            rowcount = -1
+        entry['rows'] = rowcount if rowcount is not None and rowcount >= 0 else None
+
+    def record(self, query_key: str, duration: float, cursor=None, error: bool = False):
+        self.settle()
+        entry = {
+            'query_key': query_key,
+            # Seconds from the start of the request to when the query was issued
+            'offset': time.perf_counter() - self._start - duration,
+            'duration': duration,
+            'rows': None,
+        }
+        if error:
+            entry['error'] = True
+        self.queries.append(entry)
+        if cursor is not None and not error:
+            self._pending = (entry, cursor)
+
+    def record_fetch(self, query_key: str, duration: float, rows: int):
+        """Attach the fetch time and exact row count to the query that produced them."""
+        if self._pending is None or self._pending[0]['query_key'] != query_key:
+            return
+        entry = self._pending[0]
+        self._pending = None
+        entry['rows'] = rows
+        entry['fetch_duration'] = duration
+
+    def subtrace(self) -> 'RequestTrace':
+        """
+        A trace for work done on another thread on behalf of this request.
+
+        Queries on separate cursors cannot share one trace (settle() follows a
+        single cursor), so each thread records into its own subtrace, timed from
+        the same start, and adopt() merges it back afterwards.
+        """
+        child = RequestTrace(self.method, self.route, self.path)
+        child._start = self._start
+        return child
+
+    def adopt(self, child: 'RequestTrace'):
+        """Merge a finished subtrace's queries into this trace in issue order."""
+        child.settle()
+        self.settle()
+        self.queries.extend(child.queries)
+        self.queries.sort(key=lambda entry: entry['offset'])
+
+    def finish(self, status: int, repeat_threshold: int):
+        self.settle()
+        self.status = status
+        self.duration = time.perf_counter() - self._start
+        counts = Counter(entry['query_key'] for entry in self.queries)
+        self.repeated_keys = {key: count for key, count in counts.items() if count > repeat_threshold}
+
+    @property
+    def query_time(self) -> float:
+        return sum(entry['duration'] for entry in self.queries)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'method': self.method,
+            'route': self.route,
+            'path': self.path,
+            'status': self.status,
+            'started_at': self.started_at,
+            'duration': self.duration,
+            'query_count': len(self.queries),
+            'query_time': self.query_time,
+            'repeated_keys': self.repeated_keys,
+            'queries': self.queries,
+        }
+
+
+class TraceCollector:
+    """
+    Per-request query traces with N+1 detection.
+
+    Every request is traced so repeated keys are always flagged, but only a
+    sample of finished traces is kept in a bounded ring buffer for inspection.
+    """
+
+    def __init__(self, capacity: int = 200, sample_rate: float = 1.0, repeat_threshold: int = 5):
+        self.sample_rate = sample_rate
+        self.repeat_threshold = repeat_threshold
+        self._lock = threading.Lock()
+        self._traces = deque(maxlen=capacity)
+
+    @staticmethod
+    def current() -> Optional[RequestTrace]:
+        """Return the trace for the request running in this context, if any."""
+        return _current_trace.get()
+
+    def start(self, method: str, route: str, path: str):
+        """
+        Begin tracing a request in the current context.
+
+        Returns:
+            Token to pass to end() once the request is torn down
+        """
+        return _current_trace.set(RequestTrace(method, route, path))
+
+    def finish(self, status: int) -> Optional[RequestTrace]:
+        """Close the current trace and keep it if it was sampled."""
+        trace = _current_trace.get()
+        if trace is None:
+            return None
+        trace.finish(status, self.repeat_threshold)
+        if trace.queries and random.random() < self.sample_rate:
+            with self._lock:
+                self._traces.append(trace)
+        return trace
+
+    def attach(self, trace: Optional[RequestTrace]):
+        """
+        Make `trace` current in this context (e.g. a subtrace on a worker thread).
+
+        Returns:
+            Token to pass to end()
+        """
+        return _current_trace.set(trace)
+
+    def end(self, token):
+        _current_trace.reset(token)
+
+    def slowest(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Return the slowest of the recently sampled traces, slowest first."""
+        with self._lock:
+            traces = list(self._traces)
+        traces.sort(key=lambda trace: trace.duration, reverse=True)
+        return [trace.to_dict() for trace in traces[:limit]]
+
+    def reset(self):
+        with self._lock:
+            self._traces.clear()
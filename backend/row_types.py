@@ -0,0 +1,159 @@
+import keyword
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from mysql.connector.constants import FieldType
+
+# Fields handlers add to a query's rows after fetching them, beyond the columns the SQL selects
+DERIVED_FIELDS: Dict[str, Tuple[str, ...]] = {
+    # market_math.apply_holding_gains
+    'bets.get_user_holdings': ('unrealized_gains', 'current_value', 'percent_change', 'current_odds'),
+    # /api/user-profits without the bet store
+    'bets.get_user_profits': ('unrealized_gains', 'total_profits', 'percent_change'),
+}
+
+# Column types the connector returns as Decimal; to_dict() writes them as floats
+DECIMAL_TYPES = (FieldType.DECIMAL, FieldType.NEWDECIMAL)
+
+class Row:
+    """
+    Base of the generated record types: one __slots__ attribute per column
+    instead of a dict per row, with the mapping access handlers already use
+    (row['col'], row['col'] = value, 'col' in row, row.get('col')).
+
+    Derived fields are slots too, left unset until a handler assigns them;
+    unset fields are absent from keys() and to_dict() as a missing dict key was.
+    """
+
+    __slots__ = ()
+    _fields: frozenset = frozenset()
+
+    def __getitem__(self, name: str) -> Any:
+        if name in self._fields:
+            try:
+                return getattr(self, name)
+            except AttributeError:
+                pass
+        raise KeyError(name)
+
+    def __setitem__(self, name: str, value: Any):
+        if name not in self._fields:
+            raise KeyError(f"{type(self).__name__} has no field '{name}'")
+        setattr(self, name, value)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._fields and hasattr(self, name)
+
+    def get(self, name: str, default: Any = None) -> Any:
+        try:
+            return self[name]
+        except KeyError:
+            return default
+
+    def keys(self) -> List[str]:
+        return [name for name in self.__slots__ if hasattr(self, name)]
+
+    def values(self) -> List[Any]:
+        return [getattr(self, name) for name in self.keys()]
+
+    def items(self) -> List[Tuple[str, Any]]:
+        return [(name, getattr(self, name)) for name in self.keys()]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self.items())
+
+    def __repr__(self) -> str:
+        fields = ', '.join(f"{name}={value!r}" for name, value in self.items())
+        return f"{type(self).__name__}({fields})"
+
+def _class_name(query_key: str) -> str:
+    """'bets.get_user_holdings' -> 'GetUserHoldingsRow'"""
+    return ''.join(part.capitalize() for part in query_key.rsplit('.', 1)[-1].split('_')) + 'Row'
+
+def can_slot(fields: Sequence[str]) -> bool:
+    """Whether every field can be an attribute: an identifier, unique, and not shadowing a Row method"""
+    return (len(set(fields)) == len(fields)
+            and all(field.isidentifier() and not keyword.iskeyword(field) and not field.startswith('_')
+                    and not hasattr(Row, field) for field in fields))
+
+def make_row_type(name: str, columns: Sequence[str], derived: Iterable[str] = (),
+                  decimal_columns: Iterable[str] = ()) -> type:
+    """
+    Generate a Row subclass with a slot per column and derived field.
+
+    __init__ takes the columns positionally, in the order a tuple cursor
+    returns them, and to_dict() builds the dict in one expression, writing
+    decimal_columns as floats so the JSON encoder does not call back into
+    Python for each of them. Both are compiled for the given fields, as
+    namedtuple does.
+
+    Raises:
+        ValueError: if a column or derived field cannot be an attribute name
+    """
+    columns = tuple(columns)
+    derived = tuple(field for field in derived if field not in columns)
+    if not can_slot(columns + derived):
+        raise ValueError(f"Fields {columns + derived} cannot all be attribute names")
+
+    decimal_columns = set(decimal_columns)
+    entries = ', '.join(
+        f"'{field}': None if self.{field} is None else float(self.{field})" if field in decimal_columns
+        else f"'{field}': self.{field}" for field in columns + derived)
+    lines = [f"def __init__(self, {', '.join(columns)}):"]
+    lines += [f"    self.{column} = {column}" for column in columns] or ['    pass']
+    # Derived fields are normally all assigned by the time a row is serialized; otherwise only set ones are written
+    lines += ["def to_dict(self):", "    try:", f"        return {{{entries}}}",
+              "    except AttributeError:", "        return Row.to_dict(self)"]
+    namespace: Dict[str, Any] = {'Row': Row}
+    exec('\n'.join(lines), namespace)
+
+    return type(name, (Row,), {
+        '__slots__': columns + derived,
+        '_fields': frozenset(columns + derived),
+        '__init__': namespace['__init__'],
+        'to_dict': namespace['to_dict'],
+    })
+
+class RowTypes:
+    """
+    Record types per query key, generated on first fetch from the cursor's
+    description (the select list of the query's .sql file with its column
+    types, which also covers SELECT * and CTEs). A key is regenerated if its
+    description changes, e.g. after a column is added to a SELECT * table.
+
+    Results whose columns cannot be attributes (unaliased expressions,
+    duplicates) are returned as dicts, as the dictionary cursor did.
+    """
+
+    def __init__(self, derived: Optional[Dict[str, Tuple[str, ...]]] = None):
+        self.derived = DERIVED_FIELDS if derived is None else derived
+        # query key -> (description the type was generated from, type or None)
+        self._types: Dict[str, Tuple[List[tuple], Optional[type]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, query_key: str, description: Sequence[tuple]) -> Optional[type]:
+        """The record type for query_key's rows, or None if they stay dicts"""
+        cached = self._types.get(query_key)
+        # Comparing descriptions is one C-level comparison, cheaper than building the column names
+        if cached is not None and cached[0] == description:
+            return cached[1]
+        with self._lock:
+            columns = [column[0] for column in description]
+            decimal_columns = [column[0] for column in description if column[1] in DECIMAL_TYPES]
+            try:
+                row_type = make_row_type(_class_name(query_key), columns, self.derived.get(query_key, ()),
+                                         decimal_columns)
+            except ValueError:
+                row_type = None
+            self._types[query_key] = (list(description), row_type)
+            return row_type
+
+    def wrap(self, query_key: str, cursor, rows: List[tuple]) -> List[Any]:
+        """Turn tuples fetched from a plain cursor into records of query_key's type"""
+        if not rows or isinstance(rows[0], dict):
+            return rows
+        row_type = self.get(query_key, cursor.description)
+        if row_type is None:
+            columns = cursor.column_names
+            return [dict(zip(columns, row)) for row in rows]
+        return [row_type(*row) for row in rows]
@@ -1,11 +1,34 @@
 #!/usr/bin/env python3
+"""
+Run the titled queries in test-production.sql and test-sample.sql and write
+their results to the matching .out files.
+
+With --benchmark, instead time every query in test-*.sql and every read query
+in sql/ over N runs, capture their EXPLAIN plans, and diff both against the
+committed baseline (benchmarks/sql_baseline.json). The run fails when a plan
+starts scanning a table in full or a query's p95 regresses past the threshold.
+Point DB_DATABASE at a scaled dataset (see bulk data generation) so timings
+are meaningful.
+
+Usage:
+    python3 run_tests.py
+    python3 run_tests.py --benchmark [--runs 30] [--p95-threshold 0.25]
+    python3 run_tests.py --benchmark --save-baseline
+"""
 
 import mysql.connector
 from mysql.connector import Error
-from datetime import datetime
+from datetime import datetime, timezone
 import os
+import glob
+import json
+import time
+import argparse
+import statistics
 from dotenv import load_dotenv
 import sys
+from sql_loader import SQLLoader
+from query_samples import collect_sample_ids, sample_params, is_read_only, explain, plan_table_accesses
 
 load_dotenv()
 
@@ -48,17 +71,20 @@ def run_query(cursor, query, title, headers):
     except Error as e:
         return f"\nError executing query for {title}: {e}\n"
 
-def run_sql_file(sql_filename, output_filename, test_name):
-    print(f"\n{'='*60}")
-    print(f"Running {test_name}")
-    print(f"{'='*60}")
-    
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BASE_DIR, 'benchmarks', 'sql_baseline.json')
+
+# Row counts may drift this much from the baseline's before timings stop being comparable
+DATASET_TOLERANCE = 0.1
+
+def parse_sql_file(sql_filename):
+    """Split a test SQL file into (title, query) pairs; titles are '-- ' comment lines"""
     try:
         with open(sql_filename, 'r') as f:
             sql_content = f.read()
     except FileNotFoundError:
         print(f"Error: {sql_filename} file not found!")
-        return False
+        return None
     
     queries = []
     current_query = ""
@@ -77,6 +103,17 @@ def run_sql_file(sql_filename, output_filename, test_name):
     if current_query.strip():
         queries.append((current_title, current_query.strip()))
     
+    return queries
+
+def run_sql_file(sql_filename, output_filename, test_name):
+    print(f"\n{'='*60}")
+    print(f"Running {test_name}")
+    print(f"{'='*60}")
+    
+    queries = parse_sql_file(sql_filename)
+    if queries is None:
+        return False
+    
     connection = get_db_connection()
     if not connection:
         print("Failed to connect to database")
@@ -118,7 +155,191 @@ def run_sql_file(sql_filename, output_filename, test_name):
     print(f"\nResults saved to {output_filename}")
     return True
 
+def collect_benchmark_queries(cursor):
+    """
+    Gather (name, sql, params) for every titled query in test-*.sql and every
+    read query in sql/ that has sample parameters.
+    """
+    benchmark_queries = []
+    for sql_filename in sorted(glob.glob(os.path.join(BASE_DIR, 'test-*.sql'))):
+        file_label = os.path.splitext(os.path.basename(sql_filename))[0]
+        for title, query in parse_sql_file(sql_filename) or []:
+            benchmark_queries.append((f"{file_label}: {title}", query, ()))
+    
+    loader = SQLLoader()
+    samples = collect_sample_ids(cursor)
+    for query_key in sorted(loader.list_queries()):
+        query = loader.get_query(query_key)
+        if not is_read_only(query):
+            continue
+        params = sample_params(query_key, query, samples)
+        if params is None:
+            print(f"Skipping {query_key}: no sample parameters")
+            continue
+        benchmark_queries.append((query_key, query, params))
+    return benchmark_queries
+
+def dataset_size(cursor):
+    """Row counts of the tables the benchmark reads, recorded with the results"""
+    sizes = {}
+    for table in ('users', 'markets', 'bets', 'comments', 'isParentOf'):
+        cursor.execute(f"SELECT COUNT(*) FROM {table}")
+        sizes[table] = cursor.fetchone()[0]
+    return sizes
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    index = max(0, min(len(sorted_values) - 1, -(-len(sorted_values) * pct // 100) - 1))
+    return sorted_values[int(index)]
+
+def benchmark_query(cursor, query, params, runs):
+    """Run a query `runs` times after one warm-up run and return its latency distribution in ms"""
+    cursor.execute(query, params or None)
+    cursor.fetchall()
+    
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        cursor.execute(query, params or None)
+        cursor.fetchall()
+        times.append((time.perf_counter() - start) * 1000)
+    times.sort()
+    return {
+        'runs': runs,
+        'min_ms': times[0],
+        'p50_ms': percentile(times, 50),
+        'p95_ms': percentile(times, 95),
+        'p99_ms': percentile(times, 99),
+        'max_ms': times[-1],
+        'mean_ms': statistics.mean(times),
+    }
+
+def summarize_plan(plan):
+    """Reduce an EXPLAIN plan to the per-table access methods that matter for regressions"""
+    return [{'table': access['table'], 'access_type': access['access_type'], 'key': access['key'],
+             'rows': access['rows'], 'filesort': access['filesort']} for access in plan_table_accesses(plan)]
+
+def run_benchmark(runs):
+    connection = get_db_connection()
+    if not connection:
+        print("Failed to connect to database")
+        return None
+    
+    cursor = connection.cursor()
+    benchmark_queries = collect_benchmark_queries(cursor)
+    results = {}
+    print(f"Benchmarking {len(benchmark_queries)} queries, {runs} runs each...")
+    for name, query, params in benchmark_queries:
+        try:
+            plan = explain(cursor, query, params)
+            timing = benchmark_query(cursor, query, params, runs)
+        except Error as e:
+            print(f"Error benchmarking {name}: {e}")
+            continue
+        results[name] = dict(timing, plan=summarize_plan(plan) if plan else None)
+        print(f"  {name:<70} p50 {timing['p50_ms']:>9.2f} ms  p95 {timing['p95_ms']:>9.2f} ms")
+    
+    report = {
+        'database': DB_CONFIG['database'],
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'dataset': dataset_size(cursor),
+        'queries': results,
+    }
+    cursor.close()
+    connection.close()
+    return report
+
+def full_scans(plan):
+    return {access['table'] for access in plan or [] if access['access_type'] == 'ALL'}
+
+def plan_shape(plan):
+    """Access methods without row estimates, which move with every data change"""
+    return [(access['table'], access['access_type'], access['key'], access['filesort']) for access in plan or []]
+
+def compare_with_baseline(report, baseline, p95_threshold):
+    """Print plan and latency changes; return the list of failures"""
+    failures = []
+    
+    for table, rows in report['dataset'].items():
+        base_rows = baseline.get('dataset', {}).get(table)
+        if base_rows and abs(rows - base_rows) / base_rows > DATASET_TOLERANCE:
+            print(f"Warning: {table} has {rows} rows, baseline was measured with {base_rows}")
+    
+    print(f"\n{'Query':<70} {'base p95':>10} {'p95':>10} {'change':>8}")
+    print("-" * 102)
+    for name, result in report['queries'].items():
+        base = baseline['queries'].get(name)
+        if not base:
+            print(f"{name:<70} {'-':>10} {result['p95_ms']:>10.2f} {'new':>8}")
+            continue
+        change = result['p95_ms'] / base['p95_ms'] - 1 if base['p95_ms'] else 0.0
+        print(f"{name:<70} {base['p95_ms']:>10.2f} {result['p95_ms']:>10.2f} {change * 100:>+7.1f}%")
+        if change > p95_threshold:
+            failures.append(f"{name}: p95 {base['p95_ms']:.2f} ms -> {result['p95_ms']:.2f} ms ({change * 100:+.1f}%)")
+        
+        new_scans = full_scans(result['plan']) - full_scans(base['plan'])
+        if new_scans:
+            failures.append(f"{name}: plan now scans {', '.join(sorted(new_scans))} in full")
+        elif plan_shape(result['plan']) != plan_shape(base['plan']):
+            # Changes that keep using indexes are reported but do not fail the run
+            print(f"  note: plan changed for {name}")
+    
+    for name in baseline['queries']:
+        if name not in report['queries']:
+            print(f"Warning: {name} is in the baseline but was not benchmarked")
+    return failures
+
+def benchmark_main(args):
+    print("POLYMARKET SQL BENCHMARK")
+    print("="*60)
+    
+    report = run_benchmark(args.runs)
+    if report is None:
+        sys.exit(1)
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, default=str)
+        print(f"\nResults saved to {args.output}")
+    
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2, default=str)
+        print(f"\nBaseline saved to {args.baseline}")
+        return
+    
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to create one")
+        return
+    with open(args.baseline, 'r') as f:
+        baseline = json.load(f)
+    
+    failures = compare_with_baseline(report, baseline, args.p95_threshold)
+    if failures:
+        print(f"\n{'='*60}")
+        print("SQL BENCHMARK REGRESSIONS:")
+        print(f"{'='*60}")
+        for failure in failures:
+            print(f"- {failure}")
+        sys.exit(1)
+    print("\nNo plan or latency regressions against the baseline.")
+
 def main():
+    parser = argparse.ArgumentParser(description="Run the test SQL files, or benchmark every query")
+    parser.add_argument('--benchmark', action='store_true', help="Time and EXPLAIN every query instead of writing .out files")
+    parser.add_argument('--runs', type=int, default=30, help="Timed runs per query in benchmark mode")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="Baseline JSON to compare with or save to")
+    parser.add_argument('--save-baseline', action='store_true', help="Write the benchmark results as the new baseline")
+    parser.add_argument('--p95-threshold', type=float, default=0.25,
+                        help="Fractional p95 increase that counts as a regression")
+    parser.add_argument('--output', help="Also write the benchmark results JSON here")
+    args = parser.parse_args()
+    
+    if args.benchmark:
+        benchmark_main(args)
+        return
+    
     print("POLYMARKET DATABASE TEST RUNNER")
     print("="*60)
     
@@ -3,6 +3,9 @@ CREATE DATABASE IF NOT EXISTS polymarket;
 USE polymarket;
 
 -- Dropping tables if they exist to ensure a clean setup
+DROP TABLE IF EXISTS catalogue_sync_state;
+DROP TABLE IF EXISTS market_odds_rollups;
+DROP TABLE IF EXISTS market_trending;
 DROP TABLE IF EXISTS isParentOf;
 DROP TABLE IF EXISTS comments;
 DROP TABLE IF EXISTS bets;
@@ -27,7 +30,10 @@ CREATE TABLE markets (
     description TEXT,
     podd DECIMAL(3, 2) NOT NULL DEFAULT 0.50, -- Probability, from 0.00 to 1.00
     volume DECIMAL(15, 2) NOT NULL DEFAULT 0.00,
-    end_date DATETIME NOT NULL
+    end_date DATETIME NOT NULL,
+    external_id VARCHAR(64) NULL, -- Polymarket market id for markets imported by catalogue_sync.py
+    external_hash CHAR(40) NULL, -- Hash of the imported fields, to skip unchanged markets on re-sync
+    UNIQUE INDEX idx_markets_external_id (external_id)
 );
 
 -- Table for Bets placed by Users on Markets
@@ -63,6 +69,48 @@ CREATE TABLE isParentOf (
     FOREIGN KEY (cCId) REFERENCES comments(cId) ON DELETE CASCADE ON UPDATE CASCADE
 );
 
+-- Exponentially decayed activity score per market (bets weigh 1.0, comments 0.5, decay 0.03 per hour).
+-- Kept up to date by the bumpTrendingOnBet / bumpTrendingOnComment triggers; see trending.py.
+CREATE TABLE market_trending (
+    mId INT PRIMARY KEY,
+    score DOUBLE NOT NULL, -- Score as of reference_ts
+    reference_ts BIGINT NOT NULL, -- Epoch seconds the score was last decayed to
+    -- Decaying every score to the same time preserves this order, so it can be indexed
+    rank_key DOUBLE AS (LN(GREATEST(score, 1e-300)) + 0.03 * reference_ts / 3600) STORED,
+    FOREIGN KEY (mId) REFERENCES markets(mid) ON DELETE CASCADE ON UPDATE CASCADE,
+    INDEX idx_market_trending_rank (rank_key DESC, mId)
+);
+
+-- Odds candles per market at 1m, 1h and 1d resolution (seconds), priced at each bet's odds.
+-- Kept up to date by the rollupOddsOnBet trigger; see odds_rollups.py and /markets/<id>/history.
+CREATE TABLE market_odds_rollups (
+    mId INT NOT NULL,
+    resolution INT NOT NULL, -- Bucket width in seconds: 60, 3600 or 86400
+    bucket_start BIGINT NOT NULL, -- Epoch seconds, a multiple of resolution
+    open DECIMAL(3, 2) NOT NULL,
+    high DECIMAL(3, 2) NOT NULL,
+    low DECIMAL(3, 2) NOT NULL,
+    close DECIMAL(3, 2) NOT NULL,
+    open_ts BIGINT NOT NULL, -- Time of the bet that set open
+    close_ts BIGINT NOT NULL, -- Time of the bet that set close
+    yes_volume DECIMAL(15, 2) NOT NULL,
+    no_volume DECIMAL(15, 2) NOT NULL,
+    bet_count INT NOT NULL,
+    PRIMARY KEY (mId, resolution, bucket_start),
+    FOREIGN KEY (mId) REFERENCES markets(mid) ON DELETE CASCADE ON UPDATE CASCADE
+);
+
+-- Conditional-request validators of each catalogue page from the last sync
+CREATE TABLE catalogue_sync_state (
+    source VARCHAR(32) NOT NULL,
+    page_offset INT NOT NULL,
+    etag VARCHAR(255),
+    last_modified VARCHAR(64),
+    row_count INT NOT NULL,
+    synced_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (source, page_offset)
+);
+
 -- Indexes for performance optimization
 CREATE INDEX idx_users_uname ON users(uname); 
 CREATE INDEX idx_markets_end_date ON markets(end_date);
@@ -0,0 +1,105 @@
+import json
+import dataclasses
+from decimal import Decimal
+from datetime import date, datetime, time
+from typing import Any, Callable
+
+from flask.json.provider import JSONProvider
+from row_types import Row
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# JSON_ENCODER values; 'auto' picks orjson when it is installed
+ENCODERS = ('auto', 'orjson', 'stdlib')
+
+def to_json_value(value: Any) -> Any:
+    """
+    Convert a value neither encoder handles natively.
+
+    Decimal columns become floats and temporal columns ISO-8601 strings, as the
+    per-row conversion loops used to do. Row objects are encoded as dicts:
+    dataclasses, anything with __slots__, or a to_dict() method.
+    """
+    # Fetched rows come first: a large result calls this once per row
+    if isinstance(value, Row):
+        return value.to_dict()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if np is not None:
+        if isinstance(value, np.generic):
+            return value.item()
+        if isinstance(value, np.ndarray):
+            return value.tolist()
+    if hasattr(value, 'to_dict'):
+        return value.to_dict()
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return dataclasses.asdict(value)
+    slots = getattr(type(value), '__slots__', None)
+    if slots is not None:
+        return {name: getattr(value, name) for name in slots if not name.startswith('_')}
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if isinstance(value, bytes):
+        return value.decode('utf-8')
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def _orjson_dumps(sort_keys: bool) -> Callable[..., str]:
+    # orjson writes datetime, date, time, dataclasses and numpy arrays itself; to_json_value covers the rest
+    options = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+    if sort_keys:
+        options |= orjson.OPT_SORT_KEYS
+    def dumps(obj: Any, **kwargs: Any) -> str:
+        return orjson.dumps(obj, default=to_json_value, option=options).decode('utf-8')
+    return dumps
+
+def _stdlib_dumps(sort_keys: bool) -> Callable[..., str]:
+    def dumps(obj: Any, **kwargs: Any) -> str:
+        kwargs.setdefault('default', to_json_value)
+        kwargs.setdefault('sort_keys', sort_keys)
+        kwargs.setdefault('separators', (',', ':'))
+        kwargs.setdefault('ensure_ascii', False)
+        return json.dumps(obj, **kwargs)
+    return dumps
+
+class FastJSONProvider(JSONProvider):
+    """
+    Flask JSON provider that serializes MySQL rows (Decimal, datetime) and the
+    app's row types directly, so handlers can return rows as fetched.
+
+    Encodes with orjson when it is installed (or JSON_ENCODER=orjson) and with
+    the standard library otherwise. Keys are sorted like Flask's default provider.
+    """
+
+    sort_keys = True
+    mimetype = 'application/json'
+
+    def __init__(self, app, encoder: str = 'auto'):
+        super().__init__(app)
+        if encoder not in ENCODERS:
+            raise ValueError(f"JSON encoder must be one of {', '.join(ENCODERS)}")
+        if encoder == 'orjson' and orjson is None:
+            raise ValueError("JSON_ENCODER=orjson but orjson is not installed")
+        self.encoder = 'orjson' if encoder != 'stdlib' and orjson is not None else 'stdlib'
+        self._dumps = (_orjson_dumps if self.encoder == 'orjson' else _stdlib_dumps)(self.sort_keys)
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return self._dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs: Any) -> Any:
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumps(obj) + '\n', mimetype=self.mimetype)
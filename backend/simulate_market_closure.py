@@ -9,7 +9,12 @@ It performs the following actions:
 1.  Selects a random, active market from the database.
 2.  Artificially sets its end_date to a time in the past to make it 'expired'.
 3.  Calls the `resolve_markets()` stored procedure to trigger the payout logic.
-4.  Reports on the "before" and "after" state of the market to verify the process.
+4.  Reports on the "before" and "after" state of the market to verify the process,
+    and checks each winner's balance change against the payouts computed in
+    integer cents by fixed_point.allocate_cents.
+
+The payout check assumes no other market resolves and no bets are placed by
+the winners while the script runs.
 
 WARNING: This script performs a DESTRUCTIVE action on one market
 for testing purposes. The selected market's volume will be permanently
@@ -19,8 +24,11 @@ set to 0.
 import mysql.connector
 from mysql.connector import Error
 import os
+from typing import Any, Dict, List
 from dotenv import load_dotenv
 
+from fixed_point import BASIS_POINTS, EVEN_ODDS_BPS, allocate_cents, to_bps, to_cents, units_from_amount
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -41,6 +49,25 @@ def get_db_connection():
         print(f"Error connecting to MySQL: {e}")
         return None
 
+def expected_payouts(bets: List[Dict[str, Any]], market_podd: Any) -> Dict[int, int]:
+    """
+    Payout in cents per winning user, as resolve_markets computes it: the losing
+    side's volume split by net winning units (YES bought at podd, NO at 1 - podd).
+    """
+    winning_outcome = to_bps(market_podd) >= EVEN_ODDS_BPS
+    pool_cents = sum(to_cents(bet['amt']) for bet in bets if bool(bet['yes']) != winning_outcome)
+    units: Dict[int, int] = {}
+    for bet in bets:
+        if bool(bet['yes']) != winning_outcome:
+            continue
+        amount_cents = to_cents(bet['amt'])
+        price_bps = to_bps(bet['podd']) if bet['yes'] else BASIS_POINTS - to_bps(bet['podd'])
+        bet_units = units_from_amount(abs(amount_cents), price_bps)
+        units[bet['uId']] = units.get(bet['uId'], 0) + (bet_units if amount_cents > 0 else -bet_units)
+    # Remainder cents go to the lower user id on ties, as ORDER BY remainder DESC, uId does
+    winners = sorted(user_id for user_id, user_units in units.items() if user_units > 0)
+    return dict(zip(winners, allocate_cents(pool_cents, [units[user_id] for user_id in winners])))
+
 def simulate_market_closure():
     """Finds an active market, expires it, and runs the resolution procedure."""
     connection = get_db_connection()
@@ -71,6 +98,15 @@ def simulate_market_closure():
         connection.commit()
         print("   -> Market end_date updated successfully.")
 
+        cursor.execute("SELECT uId, amt, podd, yes FROM bets WHERE mId = %s", (market_id,))
+        payouts = expected_payouts(cursor.fetchall(), market['podd'])
+        balances_before = {}
+        if payouts:
+            placeholders = ', '.join(['%s'] * len(payouts))
+            cursor.execute(f"SELECT uid, balance FROM users WHERE uid IN ({placeholders})", tuple(payouts))
+            balances_before = {row['uid']: to_cents(row['balance']) for row in cursor.fetchall()}
+        print(f"   -> Expecting ${sum(payouts.values()) / 100:.2f} paid to {len(payouts)} winner(s).")
+
         # 3. Call the stored procedure
         print("\nStep 3: Calling the `resolve_markets()` stored procedure...")
         cursor.callproc('resolve_markets')
@@ -87,6 +123,14 @@ def simulate_market_closure():
         if final_volume == 0:
             print("\n[SUCCESS] The market was successfully resolved and paid out.")
             print(f"   -> Final State: Volume=${final_volume}")
+            if balances_before:
+                cursor.execute(f"SELECT uid, balance FROM users WHERE uid IN ({placeholders})", tuple(payouts))
+                paid = {row['uid']: to_cents(row['balance']) - balances_before[row['uid']] for row in cursor.fetchall()}
+                mismatched = [user_id for user_id, cents in payouts.items() if paid.get(user_id) != cents]
+                if mismatched:
+                    print(f"   -> [WARNING] Payouts differ from the expected cents for users {mismatched[:10]}")
+                else:
+                    print("   -> Every payout matches to the cent.")
         else:
             print("\n[FAILURE] The market was not resolved correctly.")
             print(f"   -> Final State: Volume=${final_volume}")
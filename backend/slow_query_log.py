@@ -0,0 +1,152 @@
+import os
+import json
+import queue
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Optional
+
+from mysql.connector import Error, pooling
+
+# Only these statement types can be passed to EXPLAIN
+EXPLAINABLE_PREFIXES = ('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+REDACTED = '<redacted>'
+
+
+class SlowQueryLog:
+    """
+    Captures slow queries with their EXPLAIN FORMAT=JSON plan into a bounded JSONL log.
+
+    submit() only enqueues, so it is safe to call from QueryTimer on the request
+    thread. A background worker runs EXPLAIN on its own small connection pool and
+    appends one JSON object per line, rotating the file once it reaches max_bytes.
+    """
+
+    def __init__(self, db_config: Dict[str, Any], log_path: str, max_bytes: int = 5 * 1024 * 1024,
+                 backup_count: int = 1, queue_size: int = 100, pool_size: int = 1,
+                 redacted_prefixes: Iterable[str] = ('auth.',)):
+        """
+        Args:
+            db_config: Connection settings for the EXPLAIN pool
+            log_path: JSONL file to append captured queries to
+            max_bytes: Size at which the log is rotated to log_path.1, log_path.2, ...
+            backup_count: Number of rotated files to keep
+            queue_size: Pending captures beyond this are dropped rather than queued
+            pool_size: Connections reserved for EXPLAIN
+            redacted_prefixes: Query keys starting with any of these have their
+                parameters replaced with a placeholder in the log
+        """
+        self.db_config = db_config
+        self.log_path = log_path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.pool_size = pool_size
+        self.redacted_prefixes = tuple(redacted_prefixes)
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._pool = None
+        self._worker = None
+        self._start_lock = threading.Lock()
+        self._file_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {'captured': 0, 'dropped': 0, 'explain_errors': 0}
+
+    def submit(self, query_key: str, sql_query: str, params: Any, duration: float):
+        """Queue a slow query for capture. Never blocks; drops the capture if the queue is full."""
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait((query_key, sql_query, params, duration, datetime.now(timezone.utc)))
+        except queue.Full:
+            self._count('dropped')
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        return dict(stats, pending=self._queue.qsize(), log_path=self.log_path)
+
+    def _count(self, name: str):
+        # submit() runs on request threads, the rest on the worker
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def _ensure_worker(self):
+        if self._worker is not None:
+            return
+        with self._start_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name='slow-query-log', daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        while True:
+            query_key, sql_query, params, duration, captured_at = self._queue.get()
+            try:
+                entry = {
+                    'captured_at': captured_at.isoformat(),
+                    'query_key': query_key,
+                    'duration': duration,
+                    'params': self._redact(query_key, params),
+                    'explain': self._explain(sql_query, params),
+                }
+                self._write(entry)
+                self._count('captured')
+            except Exception as e:
+                print(f"Error capturing slow query {query_key}: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _redact(self, query_key: str, params: Any) -> Any:
+        if params is None:
+            return None
+        if query_key.startswith(self.redacted_prefixes):
+            return [REDACTED] * len(params)
+        return list(params)
+
+    def _get_pool(self):
+        if self._pool is None:
+            self._pool = pooling.MySQLConnectionPool(pool_name='slow_query_explain',
+                                                     pool_size=self.pool_size, **self.db_config)
+        return self._pool
+
+    def _explain(self, sql_query: str, params: Any) -> Optional[Any]:
+        statement = sql_query.strip().rstrip(';')
+        if not statement.upper().startswith(EXPLAINABLE_PREFIXES):
+            return None
+
+        connection = None
+        try:
+            connection = self._get_pool().get_connection()
+            cursor = connection.cursor()
+            if params:
+                cursor.execute(f"EXPLAIN FORMAT=JSON {statement}", params)
+            else:
+                cursor.execute(f"EXPLAIN FORMAT=JSON {statement}")
+            row = cursor.fetchone()
+            cursor.close()
+            return json.loads(row[0]) if row else None
+        except (Error, ValueError) as e:
+            self._count('explain_errors')
+            return {'error': str(e)}
+        finally:
+            if connection is not None:
+                connection.close()
+
+    def _write(self, entry: Dict[str, Any]):
+        line = json.dumps(entry, default=str) + '\n'
+        with self._file_lock:
+            directory = os.path.dirname(self.log_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            if os.path.exists(self.log_path) and os.path.getsize(self.log_path) + len(line) > self.max_bytes:
+                self._rotate()
+            with open(self.log_path, 'a') as f:
+                f.write(line)
+
+    def _rotate(self):
+        if self.backup_count <= 0:
+            os.remove(self.log_path)
+            return
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f"{self.log_path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.log_path}.{index + 1}")
+        os.replace(self.log_path, f"{self.log_path}.1")
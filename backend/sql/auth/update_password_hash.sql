@@ -0,0 +1 @@
+UPDATE users SET passwordHash = %s WHERE uid = %s AND passwordHash = %s
\ No newline at end of file
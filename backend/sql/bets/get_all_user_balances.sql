@@ -0,0 +1 @@
+SELECT uid, uname, balance AS current_balance FROM users
\ No newline at end of file
@@ -0,0 +1,28 @@
+CREATE TRIGGER rollupOddsOnBet
+AFTER INSERT ON bets
+FOR EACH ROW
+BEGIN
+    DECLARE ts BIGINT DEFAULT UNIX_TIMESTAMP(COALESCE(NEW.createdAt, NOW()));
+
+    -- One candle per resolution (1m, 1h, 1d) priced at the bet's odds; volumes count buys and sells alike.
+    -- open/close follow the earliest/latest bet time seen, so bets inserted out of time order land correctly.
+    INSERT INTO market_odds_rollups
+        (mId, resolution, bucket_start, open, high, low, close, open_ts, close_ts, yes_volume, no_volume, bet_count)
+    VALUES
+        (NEW.mId, 60, ts - MOD(ts, 60), NEW.podd, NEW.podd, NEW.podd, NEW.podd, ts, ts,
+         IF(NEW.yes, ABS(NEW.amt), 0), IF(NEW.yes, 0, ABS(NEW.amt)), 1),
+        (NEW.mId, 3600, ts - MOD(ts, 3600), NEW.podd, NEW.podd, NEW.podd, NEW.podd, ts, ts,
+         IF(NEW.yes, ABS(NEW.amt), 0), IF(NEW.yes, 0, ABS(NEW.amt)), 1),
+        (NEW.mId, 86400, ts - MOD(ts, 86400), NEW.podd, NEW.podd, NEW.podd, NEW.podd, ts, ts,
+         IF(NEW.yes, ABS(NEW.amt), 0), IF(NEW.yes, 0, ABS(NEW.amt)), 1)
+    ON DUPLICATE KEY UPDATE
+        open = IF(VALUES(open_ts) < open_ts, VALUES(open), open),
+        open_ts = LEAST(open_ts, VALUES(open_ts)),
+        close = IF(VALUES(close_ts) >= close_ts, VALUES(close), close),
+        close_ts = GREATEST(close_ts, VALUES(close_ts)),
+        high = GREATEST(high, VALUES(high)),
+        low = LEAST(low, VALUES(low)),
+        yes_volume = yes_volume + VALUES(yes_volume),
+        no_volume = no_volume + VALUES(no_volume),
+        bet_count = bet_count + 1;
+END
@@ -0,0 +1,13 @@
+CREATE TRIGGER bumpTrendingOnBet
+AFTER INSERT ON bets
+FOR EACH ROW
+BEGIN
+    -- Decay the stored score to the newer of the two times, then add this bet's weight (1.0) decayed to it
+    INSERT INTO market_trending (mId, score, reference_ts)
+    VALUES (NEW.mId, 1.0, UNIX_TIMESTAMP(COALESCE(NEW.createdAt, NOW())))
+    ON DUPLICATE KEY UPDATE
+        score = IF(VALUES(reference_ts) >= reference_ts,
+                   score * EXP(-0.03 * (VALUES(reference_ts) - reference_ts) / 3600) + VALUES(score),
+                   score + VALUES(score) * EXP(-0.03 * (reference_ts - VALUES(reference_ts)) / 3600)),
+        reference_ts = GREATEST(reference_ts, VALUES(reference_ts));
+END
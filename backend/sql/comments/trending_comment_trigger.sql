@@ -0,0 +1,13 @@
+CREATE TRIGGER bumpTrendingOnComment
+AFTER INSERT ON comments
+FOR EACH ROW
+BEGIN
+    -- Same decay-and-add as bumpTrendingOnBet, with a comment weighing 0.5
+    INSERT INTO market_trending (mId, score, reference_ts)
+    VALUES (NEW.mId, 0.5, UNIX_TIMESTAMP(COALESCE(NEW.created_at, NOW())))
+    ON DUPLICATE KEY UPDATE
+        score = IF(VALUES(reference_ts) >= reference_ts,
+                   score * EXP(-0.03 * (VALUES(reference_ts) - reference_ts) / 3600) + VALUES(score),
+                   score + VALUES(score) * EXP(-0.03 * (reference_ts - VALUES(reference_ts)) / 3600)),
+        reference_ts = GREATEST(reference_ts, VALUES(reference_ts));
+END
@@ -0,0 +1,16 @@
+SELECT 
+    mId,
+    COALESCE(SUM(CASE 
+        WHEN yes = 1 THEN amt 
+        ELSE 0 
+    END), 0) AS yes_volume,
+    
+    COALESCE(SUM(CASE 
+        WHEN yes = 0 THEN amt 
+        ELSE 0 
+    END), 0) AS no_volume
+FROM bets 
+WHERE mId IN (
+    SELECT id FROM JSON_TABLE(%s, '$[*]' COLUMNS (id INT PATH '$')) AS ids
+) AND uId != %s
+GROUP BY mId
@@ -0,0 +1,5 @@
+SELECT mid, name, description, podd, volume, end_date
+FROM markets
+WHERE mid IN (
+    SELECT id FROM JSON_TABLE(%s, '$[*]' COLUMNS (id INT PATH '$')) AS ids
+)
@@ -0,0 +1,17 @@
+SELECT bucket_start, ANY_VALUE(open_podd) AS open, MAX(podd) AS high, MIN(podd) AS low, ANY_VALUE(close_podd) AS close,
+       MIN(ts) AS open_ts, MAX(ts) AS close_ts,
+       SUM(CASE WHEN yes = 1 THEN ABS(amt) ELSE 0 END) AS yes_volume, SUM(CASE WHEN yes = 0 THEN ABS(amt) ELSE 0 END) AS no_volume,
+       COUNT(*) AS bet_count
+FROM (
+    SELECT podd, amt, yes, ts, bucket_start,
+           FIRST_VALUE(podd) OVER (PARTITION BY bucket_start ORDER BY ts, bId) AS open_podd,
+           FIRST_VALUE(podd) OVER (PARTITION BY bucket_start ORDER BY ts DESC, bId DESC) AS close_podd
+    FROM (
+        SELECT bId, podd, amt, yes, UNIX_TIMESTAMP(createdAt) AS ts,
+               UNIX_TIMESTAMP(createdAt) - MOD(UNIX_TIMESTAMP(createdAt), %s) AS bucket_start
+        FROM bets
+        WHERE mId = %s AND createdAt >= FROM_UNIXTIME(%s) AND createdAt < FROM_UNIXTIME(%s)
+    ) AS timed_bets
+) AS ranked_bets
+GROUP BY bucket_start
+ORDER BY bucket_start;
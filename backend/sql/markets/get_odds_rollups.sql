@@ -0,0 +1,4 @@
+SELECT bucket_start, open, high, low, close, open_ts, close_ts, yes_volume, no_volume, bet_count
+FROM market_odds_rollups
+WHERE mId = %s AND resolution = %s AND bucket_start >= %s AND bucket_start < %s
+ORDER BY bucket_start;
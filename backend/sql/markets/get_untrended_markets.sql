@@ -0,0 +1,6 @@
+SELECT m.mid, m.name, m.description, m.podd, m.volume, m.end_date
+FROM markets m
+LEFT JOIN market_trending t ON t.mId = m.mid
+WHERE m.end_date > NOW() AND t.mId IS NULL
+ORDER BY m.mid
+LIMIT %s;
@@ -0,0 +1,9 @@
+INSERT INTO market_trending (mId, score, reference_ts)
+SELECT mId, SUM(weight * EXP(-0.03 * (UNIX_TIMESTAMP(NOW()) - UNIX_TIMESTAMP(activity_date)) / 3600)), UNIX_TIMESTAMP(NOW())
+FROM (
+    SELECT mId, createdAt AS activity_date, 1.0 AS weight FROM bets
+    UNION ALL
+    SELECT mId, created_at AS activity_date, 0.5 AS weight FROM comments
+) AS activities
+GROUP BY mId
+ON DUPLICATE KEY UPDATE score = VALUES(score), reference_ts = VALUES(reference_ts);
@@ -0,0 +1,15 @@
+INSERT INTO market_odds_rollups
+    (mId, resolution, bucket_start, open, high, low, close, open_ts, close_ts, yes_volume, no_volume, bet_count)
+SELECT mId, %s, bucket_start, ANY_VALUE(open_podd), MAX(podd), MIN(podd), ANY_VALUE(close_podd), MIN(ts), MAX(ts),
+       SUM(CASE WHEN yes = 1 THEN ABS(amt) ELSE 0 END), SUM(CASE WHEN yes = 0 THEN ABS(amt) ELSE 0 END), COUNT(*)
+FROM (
+    SELECT mId, podd, amt, yes, ts, bucket_start,
+           FIRST_VALUE(podd) OVER (PARTITION BY mId, bucket_start ORDER BY ts, bId) AS open_podd,
+           FIRST_VALUE(podd) OVER (PARTITION BY mId, bucket_start ORDER BY ts DESC, bId DESC) AS close_podd
+    FROM (
+        SELECT bId, mId, podd, amt, yes, UNIX_TIMESTAMP(createdAt) AS ts,
+               UNIX_TIMESTAMP(createdAt) - MOD(UNIX_TIMESTAMP(createdAt), %s) AS bucket_start
+        FROM bets
+    ) AS timed_bets
+) AS ranked_bets
+GROUP BY mId, bucket_start;
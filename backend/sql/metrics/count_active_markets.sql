@@ -0,0 +1,3 @@
+SELECT COUNT(*) AS active_markets
+FROM markets
+WHERE volume > 0 
\ No newline at end of file
@@ -4,9 +4,8 @@ BEGIN
     DECLARE market_id INT;
     DECLARE market_podd DECIMAL(3, 2);
     DECLARE winning_outcome BOOLEAN;
-    DECLARE total_winning_units DECIMAL(15, 2) DEFAULT 0;
-    DECLARE total_losing_volume DECIMAL(15, 2) DEFAULT 0;
-    DECLARE payout_per_unit DECIMAL(15, 2) DEFAULT 0;
+    -- Integer arithmetic, as fixed_point.py: money in cents, units (amount / price) in millionths
+    DECLARE pool_cents DECIMAL(65, 0) DEFAULT 0;
     
     -- Cursor to select all expired markets that have not been resolved
     DECLARE cur_markets CURSOR FOR 
@@ -26,31 +25,45 @@ BEGIN
         -- If podd is exactly 0.50, we can consider it a push or handle as per business rules.
         SET winning_outcome = (market_podd >= 0.50);
 
-        -- Reset variables for each market
-        SET total_winning_units = 0;
-        SET total_losing_volume = 0;
-        SET payout_per_unit = 0;
-
-        -- Calculate total losing volume and total winning units
-        SELECT 
-            SUM(CASE WHEN yes != winning_outcome THEN amt ELSE 0 END),
-            SUM(CASE WHEN yes = winning_outcome THEN amt / podd ELSE 0 END)
-        INTO total_losing_volume, total_winning_units
+        -- The losing side's net volume is paid out to the winners
+        SELECT COALESCE(SUM(amt * 100), 0)
+        INTO pool_cents
         FROM bets
-        WHERE mId = market_id;
-
-        -- Proceed only if there are winners and losers
-        IF total_winning_units > 0 AND total_losing_volume > 0 THEN
-            SET payout_per_unit = total_losing_volume / total_winning_units;
+        WHERE mId = market_id AND yes != winning_outcome;
 
+        IF pool_cents > 0 THEN
             -- Start transaction
             START TRANSACTION;
 
-            -- Payout to all winners
+            -- Each winner's share of the pool is proportional to their net winning units (YES bought at
+            -- podd, NO at 1 - podd), in whole cents: floor(units * pool / total units), plus one cent each
+            -- to the largest remainders until the whole pool is paid (fixed_point.allocate_cents).
+            -- Units round half away from zero; MOD and DIV keep everything in exact integers.
+            WITH winner_units AS (
+                SELECT uId, SUM(SIGN(amt) * ((2 * ABS(amt) * 100000000 + price) DIV (2 * price))) AS units
+                FROM (
+                    SELECT uId, amt, IF(yes = 1, podd, 1 - podd) * 100 AS price
+                    FROM bets
+                    WHERE mId = market_id AND yes = winning_outcome
+                ) winning_bets
+                GROUP BY uId
+                HAVING units > 0
+            ),
+            shares AS (
+                SELECT uId,
+                       (units * pool_cents) DIV SUM(units) OVER () AS base_cents,
+                       MOD(units * pool_cents, SUM(units) OVER ()) AS remainder
+                FROM winner_units
+            ),
+            payouts AS (
+                SELECT uId,
+                       base_cents + (ROW_NUMBER() OVER (ORDER BY remainder DESC, uId)
+                                     <= pool_cents - SUM(base_cents) OVER ()) AS payout_cents
+                FROM shares
+            )
             UPDATE users u
-            JOIN bets b ON u.uid = b.uId
-            SET u.balance = u.balance + ((b.amt / b.podd) * payout_per_unit)
-            WHERE b.mId = market_id AND b.yes = winning_outcome;
+            JOIN payouts p ON u.uid = p.uId
+            SET u.balance = u.balance + p.payout_cents / 100;
 
             -- Mark the market as resolved
             UPDATE markets SET volume = 0 WHERE mid = market_id;
@@ -58,7 +71,7 @@ BEGIN
             COMMIT;
 
         ELSE
-            -- If there's no winners or losers, just mark the market as resolved.
+            -- Nothing was lost on the other side, so there is nothing to pay out; just mark the market as resolved.
             UPDATE markets SET volume = 0 WHERE mid = market_id;
         END IF;
 
@@ -1,11 +1,35 @@
 import os
-from typing import Dict
+import re
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from mysql.connector import Error
+
+# Statement types MySQL accepts in PREPARE; trigger/procedure/event DDL always runs as plain text
+PREPARABLE_PREFIXES = ('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+# ER_UNKNOWN_STMT_HANDLER: the statement was never prepared on this session (new or reconnected)
+UNKNOWN_STATEMENT_HANDLER = 1243
+
+# Any % that is not a %s placeholder or an escaped %%
+STRAY_PERCENT = re.compile(r'%(?![s%])')
 
 class SQLLoader:
-    def __init__(self, sql_dir: str = "sql"):
-        self.sql_dir = sql_dir
+    def __init__(self, sql_dir: Optional[str] = None, prepared_keys: Optional[Iterable[str]] = None):
+        """
+        Args:
+            sql_dir: Directory containing the .sql files; defaults to the sql/
+                directory next to this module, whatever the working directory
+            prepared_keys: Query keys to run as server-side prepared statements
+                through execute(), or ['*'] for every preparable query
+        """
+        self.sql_dir = sql_dir or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sql')
         self.queries: Dict[str, str] = {}
+        self.param_counts: Dict[str, int] = {}
         self._load_all_queries()
+        
+        # key -> (statement name, PREPARE text, EXECUTE text)
+        self._prepared: Dict[str, Tuple[str, str, str]] = {}
+        self._register_prepared(prepared_keys or [])
     
     def _load_all_queries(self):
         """Load all SQL files from the sql directory structure"""
@@ -20,6 +44,37 @@ class SQLLoader:
                     
                     with open(file_path, 'r') as f:
                         self.queries[key] = f.read().strip()
+                    self.param_counts[key] = self._count_params(key, self.queries[key])
+    
+    @staticmethod
+    def _count_params(key: str, sql_query: str) -> int:
+        """Count %s placeholders, rejecting text that would bind differently once prepared."""
+        if not sql_query.upper().startswith(PREPARABLE_PREFIXES):
+            return 0
+        if '?' in sql_query:
+            raise ValueError(f"SQL query '{key}' contains '?', which PREPARE would treat as a placeholder")
+        if STRAY_PERCENT.search(sql_query):
+            raise ValueError(f"SQL query '{key}' contains a '%' that is not a %s placeholder (use %%)")
+        return sql_query.count('%s')
+    
+    def _register_prepared(self, prepared_keys: Iterable[str]):
+        prepared_keys = list(prepared_keys)
+        if '*' in prepared_keys:
+            prepared_keys = list(self.queries.keys())
+        
+        for key in prepared_keys:
+            sql_query = self.get_query(key)
+            statement = sql_query.rstrip(';').strip()
+            if not statement.upper().startswith(PREPARABLE_PREFIXES) or ';' in statement:
+                # DDL and multi-statement files keep running as plain text
+                continue
+            
+            name = 'stmt_' + key.replace('.', '_')
+            count = self.param_counts[key]
+            execute_sql = f"EXECUTE {name}"
+            if count:
+                execute_sql += " USING " + ", ".join(f"@p{i}" for i in range(count))
+            self._prepared[key] = (name, statement.replace('%%', '%').replace('%s', '?'), execute_sql)
     
     def get_query(self, key: str) -> str:
         """Get a SQL query by its key"""
@@ -29,4 +84,77 @@ class SQLLoader:
     
     def list_queries(self) -> list:
         """List all available query keys"""
-        return list(self.queries.keys()) 
\ No newline at end of file
+        return list(self.queries.keys())
+    
+    def is_prepared(self, key: str) -> bool:
+        """Whether execute() runs this key as a server-side prepared statement"""
+        return key in self._prepared
+    
+    def prepared_keys(self) -> list:
+        """List the keys currently run as prepared statements"""
+        return list(self._prepared.keys())
+    
+    def prepare(self, cursor, key: str) -> bool:
+        """
+        Compile a registered key on the cursor's session.
+        
+        Returns:
+            True if the statement is prepared, False if the key is not registered
+            or could not be prepared and now runs as plain text
+        """
+        prepared = self._prepared.get(key)
+        if prepared is None:
+            return False
+        name, prepare_sql, _ = prepared
+        try:
+            cursor.execute(f"PREPARE {name} FROM %s", (prepare_sql,))
+        except Error as e:
+            # Fall back to plain execution for good; a genuinely broken query fails there too
+            print(f"Could not prepare SQL query '{key}', running it unprepared: {e}")
+            self._prepared.pop(key, None)
+            return False
+        return True
+    
+    def check_params(self, key: str, params: Any):
+        """Raise ValueError if params does not match the placeholders of the query"""
+        expected = self.param_counts[key]
+        given = len(params) if params else 0
+        if given != expected:
+            raise ValueError(f"SQL query '{key}' takes {expected} parameters, got {given}")
+    
+    def execute(self, cursor, key: str, params: Any = None) -> Any:
+        """
+        Execute a query by key, as a prepared statement when registered.
+        
+        Prepared statements live in the MySQL session, so each pooled connection
+        compiles a key once (on its first EXECUTE failing with an unknown handler)
+        and reuses the handle afterwards. Parameters are bound through @p0..@pN.
+        
+        Args:
+            cursor: Database cursor object
+            key: The query identifier (e.g., 'bets.get_user_holdings')
+            params: Query parameters (optional)
+            
+        Returns:
+            Result of cursor.execute()
+        """
+        prepared = self._prepared.get(key)
+        if prepared is None:
+            sql_query = self.get_query(key)
+            if params:
+                return cursor.execute(sql_query, params)
+            return cursor.execute(sql_query)
+        
+        _, _, execute_sql = prepared
+        self.check_params(key, params)
+        if params:
+            cursor.execute("SET " + ", ".join(f"@p{i} = %s" for i in range(len(params))), params)
+        try:
+            return cursor.execute(execute_sql)
+        except Error as e:
+            if e.errno != UNKNOWN_STATEMENT_HANDLER:
+                raise
+        
+        if not self.prepare(cursor, key):
+            return self.execute(cursor, key, params)
+        return cursor.execute(execute_sql)
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Incrementally maintained trending scores
+
+market_trending holds one exponentially decayed activity score per market as a
+(score, reference_ts) pair. Triggers on bets and comments decay the stored
+score to the new activity's time and add its weight, so /markets/trending is an
+indexed top-K read instead of a scan over all bets and comments ever written.
+
+Usage:
+    python3 trending.py install    # create table and triggers if missing, then rebuild
+    python3 trending.py rebuild    # recompute every score from bets and comments (e.g. after a bulk load)
+    python3 trending.py check      # compare the maintained top-K with the full-scan formula
+"""
+
+import os
+import sys
+import math
+import argparse
+from typing import Dict, List
+
+import mysql.connector
+from mysql.connector import Error
+from dotenv import load_dotenv
+from sql_loader import SQLLoader
+
+load_dotenv()
+
+DB_CONFIG = {
+    'host': os.getenv('DB_HOST', '127.0.0.1'),
+    'user': os.getenv('DB_USER', 'polymarket'),
+    'password': os.getenv('DB_PASSWORD'),
+    'database': os.getenv('DB_DATABASE', 'polymarket')
+}
+
+# Per-hour decay rate used in the SQL
+DECAY_PER_HOUR = 0.03
+
+TRIGGERS = {
+    'bumpTrendingOnBet': 'bets.trending_bet_trigger',
+    'bumpTrendingOnComment': 'comments.trending_comment_trigger',
+}
+
+sql_loader = SQLLoader()
+
+def get_db_connection():
+    try:
+        connection = mysql.connector.connect(**DB_CONFIG)
+        connection.autocommit = False
+        return connection
+    except Error as e:
+        print(f"Error connecting to MySQL: {e}")
+        return None
+
+def create_table(cursor):
+    """market_trending as in schema.sql, for databases created before it existed"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS market_trending (
+            mId INT PRIMARY KEY,
+            score DOUBLE NOT NULL,
+            reference_ts BIGINT NOT NULL,
+            rank_key DOUBLE AS (LN(GREATEST(score, 1e-300)) + 0.03 * reference_ts / 3600) STORED,
+            FOREIGN KEY (mId) REFERENCES markets(mid) ON DELETE CASCADE ON UPDATE CASCADE,
+            INDEX idx_market_trending_rank (rank_key DESC, mId)
+        )
+    """)
+
+def install_triggers(cursor):
+    for name, query_key in TRIGGERS.items():
+        cursor.execute(f"DROP TRIGGER IF EXISTS `{name}`")
+        cursor.execute(sql_loader.get_query(query_key))
+
+def rebuild(connection) -> int:
+    """
+    Recompute every market's score from bets and comments in one transaction.
+    Returns the number of markets with a score.
+    """
+    cursor = connection.cursor()
+    try:
+        cursor.execute("DELETE FROM market_trending")
+        cursor.execute(sql_loader.get_query('markets.rebuild_market_trending'))
+        connection.commit()
+        cursor.execute("SELECT COUNT(*) FROM market_trending")
+        return cursor.fetchone()[0]
+    except Error:
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
+
+def check(connection, limit: int) -> bool:
+    """
+    Compare the top `limit` markets from market_trending with the full-scan
+    query. Scores are compared after decaying both to now; the full scan rounds
+    ages down to whole hours, so its scores run up to e^0.03 (about 3%) higher.
+    """
+    cursor = connection.cursor(dictionary=True)
+    cursor.execute(f"""
+        SELECT t.mId, t.score * EXP(-{DECAY_PER_HOUR} * (UNIX_TIMESTAMP(NOW()) - t.reference_ts) / 3600) AS score
+        FROM market_trending t JOIN markets m ON m.mid = t.mId
+        WHERE m.end_date > NOW()
+        ORDER BY t.rank_key DESC, t.mId
+        LIMIT %s
+    """, (limit,))
+    maintained = cursor.fetchall()
+
+    cursor.execute(f"""
+        SELECT mId, SUM(weight * EXP(-{DECAY_PER_HOUR} * TIMESTAMPDIFF(HOUR, activity_date, NOW()))) AS score
+        FROM (
+            SELECT mId, createdAt AS activity_date, 1.0 AS weight FROM bets
+            UNION ALL
+            SELECT mId, created_at AS activity_date, 0.5 AS weight FROM comments
+        ) AS activities
+        GROUP BY mId
+    """)
+    rescanned: Dict[int, float] = {row['mId']: float(row['score']) for row in cursor.fetchall()}
+    cursor.execute(sql_loader.get_query('markets.get_trending_markets_rescan'), (limit,))
+    expected: List[int] = [row['mid'] for row in cursor.fetchall()]
+    cursor.close()
+
+    ok = True
+    tolerance = math.exp(DECAY_PER_HOUR) - 1 + 1e-6
+    for row in maintained:
+        full = rescanned.get(row['mId'], 0.0)
+        if full <= 0 or abs(float(row['score']) - full) / full > tolerance:
+            print(f"✗ market {row['mId']}: maintained score {float(row['score']):.6f}, full scan {full:.6f}")
+            ok = False
+
+    actual = [row['mId'] for row in maintained]
+    overlap = len(set(actual) & set(expected))
+    print(f"Top {limit}: {overlap} of {len(expected)} markets in common with the full-scan ranking, "
+          f"{sum(1 for a, b in zip(actual, expected) if a == b)} in the same position")
+    if ok:
+        print("✅ Maintained scores match the full-scan formula")
+    return ok
+
+def main():
+    parser = argparse.ArgumentParser(description="Install, rebuild or check the maintained trending scores")
+    parser.add_argument('command', choices=['install', 'rebuild', 'check'])
+    parser.add_argument('--limit', type=int, default=50, help="check: markets to compare")
+    args = parser.parse_args()
+
+    connection = get_db_connection()
+    if not connection:
+        sys.exit(1)
+    try:
+        if args.command == 'install':
+            cursor = connection.cursor()
+            create_table(cursor)
+            install_triggers(cursor)
+            cursor.close()
+            print(f"Installed market_trending and triggers {', '.join(TRIGGERS)}")
+        if args.command in ('install', 'rebuild'):
+            print(f"Rebuilt trending scores for {rebuild(connection)} markets")
+        if args.command == 'check' and not check(connection, args.limit):
+            sys.exit(1)
+    except Error as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    finally:
+        connection.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+import time
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from sql_loader import SQLLoader
+
+# Hot read queries (with their parameters) run once during warm-up so their pages are in the buffer pool
+HOT_QUERIES = (('markets.get_active_markets', None), ('markets.get_trending_markets', (100,)))
+
+
+class WarmUp:
+    """
+    Runs start-up warm-up steps in a background thread and tracks readiness.
+
+    Steps run in order; a failing step is retried after retry_delay seconds
+    (e.g. while MySQL is still starting) so ready only flips once every step
+    has completed.
+    """
+
+    def __init__(self, steps: List[Tuple[str, Callable[[], Any]]], retry_delay: float = 5.0):
+        self.steps = steps
+        self.retry_delay = retry_delay
+        self._ready = threading.Event()
+        self._thread = None
+        self._status: Dict[str, Any] = {'started_at': None, 'finished_at': None, 'current_step': None,
+                                        'steps': {}, 'last_error': None}
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='warmup', daemon=True)
+            self._thread.start()
+
+    def mark_ready(self):
+        """Report ready without warming up (warm-up disabled)"""
+        self._status['finished_at'] = time.time()
+        self._ready.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._ready.wait(timeout)
+
+    def get_status(self) -> Dict[str, Any]:
+        return dict(self._status, ready=self.ready, steps=dict(self._status['steps']))
+
+    def _run(self):
+        self._status['started_at'] = time.time()
+        for name, step in self.steps:
+            self._status['current_step'] = name
+            while True:
+                start_time = time.perf_counter()
+                try:
+                    result = step()
+                except Exception as e:
+                    self._status['last_error'] = f"{name}: {e}"
+                    print(f"Warm-up step {name} failed, retrying in {self.retry_delay}s: {e}")
+                    time.sleep(self.retry_delay)
+                    continue
+                self._status['steps'][name] = {'duration': time.perf_counter() - start_time, 'result': result}
+                break
+        self._status['current_step'] = None
+        self.mark_ready()
+        total = self._status['finished_at'] - self._status['started_at']
+        print(f"Warm-up finished in {total:.2f}s")
+
+
+def _close_all(connections: Iterable):
+    for connection in connections:
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+
+def warm_connections(get_connection: Callable, size: int, loader: SQLLoader) -> Dict[str, int]:
+    """
+    Check out `size` connections at once so the pool opens all of them, and
+    compile every registered prepared statement on each session.
+    """
+    connections = []
+    try:
+        for _ in range(size):
+            connection = get_connection()
+            if connection is None:
+                raise RuntimeError("could not get a database connection")
+            connections.append(connection)
+
+        prepared = 0
+        for connection in connections:
+            cursor = connection.cursor()
+            for key in loader.prepared_keys():
+                if loader.prepare(cursor, key):
+                    prepared += 1
+            cursor.close()
+        return {'connections': len(connections), 'statements_prepared': prepared}
+    finally:
+        _close_all(connections)
+
+
+def find_missing(get_connection: Callable, tables: Iterable[str], triggers: Iterable[str]) -> List[str]:
+    """The given tables and triggers that do not exist in the current database"""
+    connection = get_connection()
+    if connection is None:
+        raise RuntimeError("could not get a database connection")
+    try:
+        cursor = connection.cursor()
+        cursor.execute("SELECT TABLE_NAME FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE()")
+        existing = {name for (name,) in cursor.fetchall()}
+        cursor.execute("SELECT TRIGGER_NAME FROM information_schema.TRIGGERS WHERE TRIGGER_SCHEMA = DATABASE()")
+        existing.update(name for (name,) in cursor.fetchall())
+        cursor.close()
+        return [name for name in (*tables, *triggers) if name not in existing]
+    finally:
+        connection.close()
+
+
+def warm_hot_queries(get_connection: Callable, loader: SQLLoader, market_limit: int,
+                     queries: Iterable[Tuple[str, Any]] = HOT_QUERIES) -> Dict[str, int]:
+    """
+    Run the market list, trending and per-market odds queries once so their
+    rows and indexes are resident in the buffer pool.
+
+    Odds are warmed for the market_limit markets with the most volume.
+    """
+    connection = get_connection()
+    if connection is None:
+        raise RuntimeError("could not get a database connection")
+    try:
+        cursor = connection.cursor(dictionary=True)
+        rows = 0
+        for key, params in queries:
+            loader.execute(cursor, key, params)
+            rows += len(cursor.fetchall())
+
+        cursor.execute("SELECT mId FROM markets ORDER BY volume DESC LIMIT %s", (market_limit,))
+        market_ids = [row['mId'] for row in cursor.fetchall()]
+        for market_id in market_ids:
+            loader.execute(cursor, 'markets.get_market_volume_distribution', (market_id,))
+            cursor.fetchall()
+        cursor.close()
+        return {'rows': rows, 'markets': len(market_ids)}
+    finally:
+        connection.close()
+
+
+def touch_indexes(get_connection: Callable, tables: Iterable[str]) -> Dict[str, int]:
+    """
+    Scan every index of the given tables once to pull its pages into the
+    buffer pool. Scanning PRIMARY reads the clustered index, i.e. the rows.
+    """
+    connection = get_connection()
+    if connection is None:
+        raise RuntimeError("could not get a database connection")
+    try:
+        cursor = connection.cursor()
+        touched = 0
+        for table in tables:
+            cursor.execute("""
+                SELECT DISTINCT INDEX_NAME FROM information_schema.STATISTICS
+                WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+            """, (table,))
+            for (index_name,) in cursor.fetchall():
+                cursor.execute(f"SELECT COUNT(*) FROM `{table}` FORCE INDEX (`{index_name}`)")
+                cursor.fetchall()
+                touched += 1
+        cursor.close()
+        return {'indexes': touched}
+    finally:
+        connection.close()